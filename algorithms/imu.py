@@ -0,0 +1,262 @@
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+'''
+Attitude and velocity estimation from the IMUState_ carried by LowState_ and SportModeState_.
+
+The estimator is a complementary filter written as a linear recurrence in the body frame:
+
+- up:       the world vertical expressed in the body frame, rotated by the gyroscope and pulled towards the measured
+            gravity direction with a gain that fades out while the accelerometer norm differs from g (dynamic motion).
+- yaw:      integrated from the gyroscope rate around the world vertical.
+- velocity: body frame velocity, rotated by the gyroscope and integrated from the gravity-compensated acceleration,
+            with a leak so that accelerometer bias does not make it diverge.
+
+Because both recurrences are affine in their state (x[k] = A[k] @ x[k-1] + b[k]), recorded data is processed with a
+parallel prefix scan over NumPy arrays, giving the same estimates as the sample-by-sample update.
+
+- AttitudeEstimator: Incremental filter (update) with O(1) work per sample on plain floats, and batch mode (batch).
+'''
+
+GRAVITY = 9.80665
+
+
+def _rotation_transposed(wx, wy, wz, dt):
+    """ Rodrigues rotation matrix of the body over dt, transposed (rotates world-fixed vectors into the new body frame). """
+    ax, ay, az = wx * dt, wy * dt, wz * dt
+    angle = math.sqrt(ax * ax + ay * ay + az * az)
+    if angle < 1e-9:
+        s, c = 1.0, 0.5
+    else:
+        s, c = math.sin(angle) / angle, (1.0 - math.cos(angle)) / (angle * angle)
+    return (
+        1.0 - c * (ay * ay + az * az), s * az + c * ax * ay, -s * ay + c * ax * az,
+        -s * az + c * ax * ay, 1.0 - c * (ax * ax + az * az), s * ax + c * ay * az,
+        s * ay + c * ax * az, -s * ax + c * ay * az, 1.0 - c * (ax * ax + ay * ay),
+    )
+
+
+def _rotations_transposed(gyro, dt):
+    """ Vectorized _rotation_transposed, (N, 3) rates and (N,) time steps -> (N, 3, 3). """
+    axis = gyro * dt[:, None]
+    ax, ay, az = axis[:, 0], axis[:, 1], axis[:, 2]
+    angle = np.sqrt(ax * ax + ay * ay + az * az)
+    small = angle < 1e-9
+    safe = np.where(small, 1.0, angle)
+    s = np.where(small, 1.0, np.sin(safe) / safe)
+    c = np.where(small, 0.5, (1.0 - np.cos(safe)) / (safe * safe))
+    rotation = np.empty((len(gyro), 3, 3))
+    rotation[:, 0, 0] = 1.0 - c * (ay * ay + az * az)
+    rotation[:, 0, 1] = s * az + c * ax * ay
+    rotation[:, 0, 2] = -s * ay + c * ax * az
+    rotation[:, 1, 0] = -s * az + c * ax * ay
+    rotation[:, 1, 1] = 1.0 - c * (ax * ax + az * az)
+    rotation[:, 1, 2] = s * ax + c * ay * az
+    rotation[:, 2, 0] = s * ay + c * ax * az
+    rotation[:, 2, 1] = -s * ax + c * ay * az
+    rotation[:, 2, 2] = 1.0 - c * (ax * ax + ay * ay)
+    return rotation
+
+
+def affine_scan(matrices, offsets, initial):
+    """
+    Solves x[k] = matrices[k] @ x[k-1] + offsets[k] for all k with a Hillis-Steele prefix scan, x[-1] = initial.
+    matrices is (N, d, d) and offsets (N, d); both are overwritten. Returns x as (N, d).
+    """
+    count = len(matrices)
+    step = 1
+    while step < count:
+        # Compose every map with the one `step` samples earlier: (A2, b2) o (A1, b1) = (A2 A1, A2 b1 + b2)
+        later_m, later_b = matrices[step:], offsets[step:]
+        earlier_m, earlier_b = matrices[:-step].copy(), offsets[:-step].copy()
+        offsets[step:] = np.einsum("nij,nj->ni", later_m, earlier_b) + later_b
+        matrices[step:] = np.matmul(later_m, earlier_m)
+        step *= 2
+    return np.einsum("nij,j->ni", matrices, initial) + offsets
+
+
+class AttitudeEstimator:
+    """
+    AttitudeEstimator: Complementary attitude and velocity filter over IMUState_ samples.
+
+    update() processes one sample with scalar arithmetic only; batch() processes recorded arrays and leaves the
+    estimator in the state reached after the last sample, so the two can be mixed.
+
+    Parameters:
+        attitude_time_constant (float): Seconds over which the accelerometer corrects the gyroscope tilt.
+        velocity_time_constant (float): Seconds after which an unobserved velocity error has decayed by 1/e.
+        acceleration_gate (float): Relative deviation of the accelerometer norm from g at which the tilt correction is off.
+        chunk (int): Samples per prefix scan in batch mode, bounds the memory used for long recordings.
+    """
+    def __init__(self, attitude_time_constant=1.0, velocity_time_constant=2.0, acceleration_gate=0.2, chunk=8192):
+        self.attitude_time_constant = attitude_time_constant
+        self.velocity_time_constant = velocity_time_constant
+        self.acceleration_gate = acceleration_gate
+        self.chunk = chunk
+        self.reset()
+
+    def reset(self, yaw=0.0):
+        self.initialized = False
+        self.up_x, self.up_y, self.up_z = 0.0, 0.0, 1.0
+        self.yaw = yaw
+        self.vx = self.vy = self.vz = 0.0
+        self.last_time = None
+
+    def _gain(self, norm, dt):
+        """ Tilt correction gain for an accelerometer norm and time step. """
+        trust = 1.0 - abs(norm - GRAVITY) / (self.acceleration_gate * GRAVITY)
+        return dt / (self.attitude_time_constant + dt) * trust if trust > 0.0 else 0.0
+
+    def update(self, gyro, accel, dt):
+        """
+        Processes one IMU sample.
+
+        Parameters:
+            gyro: Angular velocity (rad/s) in the body frame, e.g. IMUState_.gyroscope.
+            accel: Specific force (m/s^2) in the body frame, e.g. IMUState_.accelerometer.
+            dt (float): Seconds since the previous sample.
+        """
+        wx, wy, wz = gyro[0], gyro[1], gyro[2]
+        fx, fy, fz = accel[0], accel[1], accel[2]
+        norm = math.sqrt(fx * fx + fy * fy + fz * fz)
+
+        if not self.initialized:
+            if norm > 0.0:
+                self.up_x, self.up_y, self.up_z = fx / norm, fy / norm, fz / norm
+            self.initialized = True
+            return
+
+        r00, r01, r02, r10, r11, r12, r20, r21, r22 = _rotation_transposed(wx, wy, wz, dt)
+        ux, uy, uz = self.up_x, self.up_y, self.up_z
+
+        # Attitude: rotate the vertical with the body, blend in the measured gravity direction
+        gain = self._gain(norm, dt) if norm > 0.0 else 0.0
+        keep = 1.0 - gain
+        scale = gain / norm if norm > 0.0 else 0.0
+        ux, uy, uz = (keep * (r00 * ux + r01 * uy + r02 * uz) + scale * fx,
+                      keep * (r10 * ux + r11 * uy + r12 * uz) + scale * fy,
+                      keep * (r20 * ux + r21 * uy + r22 * uz) + scale * fz)
+        self.up_x, self.up_y, self.up_z = ux, uy, uz
+
+        horizontal = uy * uy + uz * uz
+        if horizontal > 1e-12:
+            self.yaw += (wy * uy + wz * uz) / horizontal * dt
+
+        # Velocity: rotate with the body, integrate the acceleration without gravity, leak towards zero
+        length = math.sqrt(ux * ux + uy * uy + uz * uz)
+        leak = 1.0 - dt / (self.velocity_time_constant + dt)
+        vx, vy, vz = self.vx, self.vy, self.vz
+        self.vx = leak * (r00 * vx + r01 * vy + r02 * vz) + (fx - GRAVITY * ux / length) * dt
+        self.vy = leak * (r10 * vx + r11 * vy + r12 * vz) + (fy - GRAVITY * uy / length) * dt
+        self.vz = leak * (r20 * vx + r21 * vy + r22 * vz) + (fz - GRAVITY * uz / length) * dt
+
+    def update_imu(self, imu_state, timestamp):
+        """ Processes an IMUState_ received at `timestamp` (seconds, e.g. the stamp of the enclosing message). """
+        dt = 0.0 if self.last_time is None else timestamp - self.last_time
+        self.last_time = timestamp
+        self.update(imu_state.gyroscope, imu_state.accelerometer, dt)
+
+    @property
+    def rpy(self):
+        """ Roll, pitch, yaw in radians (ZYX convention, as IMUState_.rpy). """
+        ux, uy, uz = self.up_x, self.up_y, self.up_z
+        return math.atan2(uy, uz), math.atan2(-ux, math.sqrt(uy * uy + uz * uz)), self.yaw
+
+    @property
+    def quaternion(self):
+        """ Orientation as (w, x, y, z), as IMUState_.quaternion. """
+        return tuple(_quaternion_from_rpy(np.array([self.rpy]))[0].tolist())
+
+    @property
+    def velocity(self):
+        """ Velocity in the body frame, m/s. """
+        return self.vx, self.vy, self.vz
+
+    def batch(self, gyro, accel, dt=None, timestamps=None):
+        """
+        Processes a recording at once, equivalent to calling update() for every sample.
+
+        Parameters:
+            gyro (array-like): (N, 3) angular velocities.
+            accel (array-like): (N, 3) specific forces.
+            dt (float or array-like): Time step, constant or one per sample (time since the previous sample).
+            timestamps (array-like): (N,) sample times in seconds, alternative to dt.
+
+        Returns:
+            dict: 'rpy' (N, 3), 'quaternion' (N, 4), 'up' (N, 3) and 'velocity' (N, 3) after every sample.
+        """
+        gyro = np.asarray(gyro, dtype=float).reshape(-1, 3)
+        accel = np.asarray(accel, dtype=float).reshape(-1, 3)
+        count = len(gyro)
+        if len(accel) != count:
+            raise ValueError("gyro and accel must have the same number of samples.")
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=float)
+            previous = self.last_time if self.last_time is not None else timestamps[0]
+            dt = np.diff(timestamps, prepend=previous)
+            self.last_time = timestamps[-1]
+        elif dt is None:
+            raise ValueError("Either dt or timestamps is required.")
+        dt = np.broadcast_to(np.asarray(dt, dtype=float), (count,))
+
+        up = np.empty((count, 3))
+        yaw = np.empty(count)
+        velocity = np.empty((count, 3))
+        start = 0
+        if count and not self.initialized:
+            # The first sample only initializes the attitude, as in update()
+            self.update(gyro[0], accel[0], dt[0])
+            up[0] = self.up_x, self.up_y, self.up_z
+            yaw[0] = self.yaw
+            velocity[0] = self.velocity
+            start = 1
+        for begin in range(start, count, self.chunk):
+            end = min(begin + self.chunk, count)
+            self._batch_chunk(gyro[begin:end], accel[begin:end], dt[begin:end],
+                              up[begin:end], yaw[begin:end], velocity[begin:end])
+
+        rpy = np.empty((count, 3))
+        rpy[:, 0] = np.arctan2(up[:, 1], up[:, 2])
+        rpy[:, 1] = np.arctan2(-up[:, 0], np.hypot(up[:, 1], up[:, 2]))
+        rpy[:, 2] = yaw
+        return {"rpy": rpy, "quaternion": _quaternion_from_rpy(rpy), "up": up, "velocity": velocity}
+
+    def _batch_chunk(self, gyro, accel, dt, up, yaw, velocity):
+        rotation = _rotations_transposed(gyro, dt)
+        norm = np.linalg.norm(accel, axis=1)
+        valid = norm > 0.0
+        safe_norm = np.where(valid, norm, 1.0)
+
+        trust = 1.0 - np.abs(norm - GRAVITY) / (self.acceleration_gate * GRAVITY)
+        gain = np.where(valid & (trust > 0.0), dt / (self.attitude_time_constant + dt) * trust, 0.0)
+        up[:] = affine_scan(rotation * (1.0 - gain)[:, None, None], accel * (gain / safe_norm)[:, None],
+                            np.array([self.up_x, self.up_y, self.up_z]))
+
+        horizontal = up[:, 1] ** 2 + up[:, 2] ** 2
+        rate = np.where(horizontal > 1e-12, (gyro[:, 1] * up[:, 1] + gyro[:, 2] * up[:, 2]) /
+                        np.where(horizontal > 1e-12, horizontal, 1.0), 0.0)
+        np.cumsum(rate * dt, out=yaw)
+        yaw += self.yaw
+
+        leak = 1.0 - dt / (self.velocity_time_constant + dt)
+        linear = accel - GRAVITY * up / np.linalg.norm(up, axis=1)[:, None]
+        rotation *= leak[:, None, None]
+        velocity[:] = affine_scan(rotation, linear * dt[:, None], np.array(self.velocity))
+
+        self.up_x, self.up_y, self.up_z = up[-1].tolist()
+        self.yaw = float(yaw[-1])
+        self.vx, self.vy, self.vz = velocity[-1].tolist()
+
+
+def _quaternion_from_rpy(rpy):
+    """ (N, 3) ZYX roll, pitch, yaw -> (N, 4) quaternions (w, x, y, z). """
+    half = rpy * 0.5
+    cr, cp, cy = np.cos(half).T
+    sr, sp, sy = np.sin(half).T
+    return np.stack((cr * cp * cy + sr * sp * sy,
+                     sr * cp * cy - cr * sp * sy,
+                     cr * sp * cy + sr * cp * sy,
+                     cr * cp * sy - sr * sp * cy), axis=1)
@@ -0,0 +1,150 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+'''
+Go2 leg kinematics on batched joint arrays.
+
+Joint arrays have the LowState_ motor order, 12 values per sample: FR, FL, RR, RL legs with hip (abduction), thigh
+and calf joints each. Foot arrays have the SportModeState_.foot_position_body order, x, y, z per leg in the body
+frame. Every function takes a single sample of shape (12,) or a batch of shape (N, 12) and computes all legs at once.
+
+- forward_kinematics: Foot positions in the body frame.
+- jacobian: Foot Jacobians, d foot / d joints per leg.
+- foot_velocities: Foot velocities in the body frame from joint positions and velocities.
+- inverse_kinematics: Joint positions reaching given foot positions, knee backwards as on the Go2.
+- joint_positions: Extracts the leg joint positions of LowState_ samples.
+'''
+
+LEGS = ("FR", "FL", "RR", "RL")
+# Hip joint positions in the body frame
+HIP_OFFSETS = np.array([
+    [0.1934, -0.0465, 0.0],
+    [0.1934, 0.0465, 0.0],
+    [-0.1934, -0.0465, 0.0],
+    [-0.1934, 0.0465, 0.0],
+])
+# Lateral offset of the thigh joint from the hip joint, then thigh and calf lengths (hip joint to foot center)
+HIP_LENGTH = 0.0955
+THIGH_LENGTH = 0.213
+CALF_LENGTH = 0.213
+# +1 for the left legs, -1 for the right legs
+SIDE_SIGN = np.array([-1.0, 1.0, -1.0, 1.0])
+
+
+def _legs(values):
+    """ (12,) or (N, 12) -> (N, 4, 3) float array and whether the input was a single sample. """
+    values = np.asarray(values, dtype=float)
+    single = values.ndim == 1
+    if values.shape[-1] != 12 or values.ndim > 2:
+        raise ValueError("Expected an array of shape (12,) or (N, 12).")
+    return values.reshape(-1, 4, 3), single
+
+
+def _result(values, single):
+    values = values.reshape(len(values), -1)
+    return values[0] if single else values
+
+
+def _trig(q):
+    q1, q2, q3 = q[..., 0], q[..., 1], q[..., 2]
+    return np.sin(q1), np.cos(q1), np.sin(q2), np.cos(q2), np.sin(q2 + q3), np.cos(q2 + q3)
+
+
+def forward_kinematics(q):
+    """
+    Foot positions in the body frame.
+
+    Parameters:
+        q (array-like): Joint positions, (12,) or (N, 12).
+
+    Returns:
+        numpy.ndarray: Foot positions, same shape as q.
+    """
+    q, single = _legs(q)
+    s1, c1, s2, c2, s23, c23 = _trig(q)
+    l1 = SIDE_SIGN * HIP_LENGTH
+    l2, l3 = -THIGH_LENGTH, -CALF_LENGTH
+
+    feet = np.empty_like(q)
+    feet[..., 0] = l3 * s23 + l2 * s2
+    feet[..., 1] = -l3 * s1 * c23 + l1 * c1 - l2 * c2 * s1
+    feet[..., 2] = l3 * c1 * c23 + l1 * s1 + l2 * c1 * c2
+    feet += HIP_OFFSETS
+    return _result(feet, single)
+
+
+def jacobian(q):
+    """
+    Foot Jacobians with respect to the joints of the same leg.
+
+    Parameters:
+        q (array-like): Joint positions, (12,) or (N, 12).
+
+    Returns:
+        numpy.ndarray: (4, 3, 3) for a single sample or (N, 4, 3, 3), rows x, y, z and columns hip, thigh, calf.
+    """
+    q, single = _legs(q)
+    s1, c1, s2, c2, s23, c23 = _trig(q)
+    l1 = SIDE_SIGN * HIP_LENGTH
+    l2, l3 = -THIGH_LENGTH, -CALF_LENGTH
+
+    jac = np.zeros(q.shape + (3,))
+    jac[..., 1, 0] = -l3 * c1 * c23 - l2 * c1 * c2 - l1 * s1
+    jac[..., 2, 0] = -l3 * s1 * c23 - l2 * c2 * s1 + l1 * c1
+    jac[..., 0, 1] = l3 * c23 + l2 * c2
+    jac[..., 1, 1] = l3 * s1 * s23 + l2 * s1 * s2
+    jac[..., 2, 1] = -l3 * c1 * s23 - l2 * c1 * s2
+    jac[..., 0, 2] = l3 * c23
+    jac[..., 1, 2] = l3 * s1 * s23
+    jac[..., 2, 2] = -l3 * c1 * s23
+    return jac[0] if single else jac
+
+
+def foot_velocities(q, dq):
+    """ Foot velocities in the body frame, J(q) @ dq per leg; q and dq of shape (12,) or (N, 12). """
+    dq, single = _legs(dq)
+    jac = jacobian(q).reshape(-1, 4, 3, 3)
+    return _result(np.einsum("nlij,nlj->nli", jac, dq), single)
+
+
+def inverse_kinematics(feet):
+    """
+    Joint positions placing the feet at the given body frame positions, with the knees bent backwards.
+    Unreachable targets are clamped to the closest leg extension.
+
+    Parameters:
+        feet (array-like): Foot positions, (12,) or (N, 12).
+
+    Returns:
+        numpy.ndarray: Joint positions, same shape as feet.
+    """
+    feet, single = _legs(feet)
+    p = feet - HIP_OFFSETS
+    px, py, pz = p[..., 0], p[..., 1], p[..., 2]
+    l1 = SIDE_SIGN * HIP_LENGTH
+
+    # Hip: the foot lies in the plane at distance l1 from the leg's sagittal plane
+    length = np.sqrt(np.maximum(py ** 2 + pz ** 2 - l1 ** 2, 0.0))
+    q1 = np.arctan2(pz * l1 + py * length, py * l1 - pz * length)
+
+    # Knee: law of cosines on the distance from the thigh joint to the foot
+    reach_sq = np.maximum(px ** 2 + py ** 2 + pz ** 2 - HIP_LENGTH ** 2, 0.0)
+    cos_knee = np.clip((THIGH_LENGTH ** 2 + CALF_LENGTH ** 2 - reach_sq) / (2 * THIGH_LENGTH * CALF_LENGTH), -1.0, 1.0)
+    q3 = np.arccos(cos_knee) - np.pi
+
+    # Thigh: angle of the foot in the leg plane minus the calf contribution
+    a1 = py * np.sin(q1) - pz * np.cos(q1)
+    m1 = -CALF_LENGTH * np.sin(q3)
+    m2 = -THIGH_LENGTH - CALF_LENGTH * np.cos(q3)
+    q2 = np.arctan2(m1 * a1 + m2 * px, m1 * px - m2 * a1)
+
+    return _result(np.stack((q1, q2, q3), axis=-1), single)
+
+
+def joint_positions(samples):
+    """ Leg joint positions of LowState_ samples, (12,) for one sample or (N, 12) for a sequence of samples. """
+    if hasattr(samples, "motor_state"):
+        return np.fromiter((motor.q for motor in samples.motor_state[:12]), dtype=float, count=12)
+    return np.array([[motor.q for motor in sample.motor_state[:12]] for sample in samples], dtype=float)
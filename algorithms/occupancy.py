@@ -0,0 +1,342 @@
+import math
+import time
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+'''
+Persistent local occupancy map fused from LiDAR voxel frames.
+
+The map is a spatial hash of dense chunks: voxel coordinates are split into a chunk key and a position inside the
+chunk, the key is looked up in a dict giving a slot of a preallocated pool of chunks. Evidence per voxel grows with
+every hit, shrinks along the free space in front of hits and decays exponentially with time, so moved obstacles
+disappear. When the pool is full, the chunks farthest from the robot are evicted, which bounds memory.
+
+All updates and queries are vectorized over points; only the distinct chunks touched go through Python.
+
+- OccupancyMap: integrate() fuses a frame of points (odometry frame), occupied()/evidence() answer point queries,
+   raycast() returns the distance to the first occupied voxel along many rays, boxes_occupied() tests many boxes.
+'''
+
+# Chunk and voxel coordinates are packed into one int64 key, 21 bits per axis
+_KEY_BITS = 21
+_KEY_OFFSET = 1 << (_KEY_BITS - 1)
+_KEY_MASK = (1 << _KEY_BITS) - 1
+
+
+def _pack(chunks):
+    """ (N, 3) integer chunk coordinates -> (N,) int64 keys. """
+    shifted = chunks.astype(np.int64) + _KEY_OFFSET
+    return (shifted[:, 0] << (2 * _KEY_BITS)) | (shifted[:, 1] << _KEY_BITS) | shifted[:, 2]
+
+
+def _unpack(key):
+    key = int(key)
+    return (((key >> (2 * _KEY_BITS)) & _KEY_MASK) - _KEY_OFFSET,
+            ((key >> _KEY_BITS) & _KEY_MASK) - _KEY_OFFSET,
+            (key & _KEY_MASK) - _KEY_OFFSET)
+
+
+def _unique_rows(coordinates):
+    """ Distinct rows of (N, 3) integer coordinates, sorting packed keys instead of rows. """
+    return _unique_rows_of_keys(_pack(coordinates))
+
+
+def _unique_rows_of_keys(keys):
+    keys = np.unique(keys)
+    return np.stack((((keys >> (2 * _KEY_BITS)) & _KEY_MASK) - _KEY_OFFSET,
+                     ((keys >> _KEY_BITS) & _KEY_MASK) - _KEY_OFFSET,
+                     (keys & _KEY_MASK) - _KEY_OFFSET), axis=1)
+
+
+class OccupancyMap:
+    """
+    OccupancyMap: Sparse chunked occupancy evidence grid in the odometry frame.
+
+    Parameters:
+        resolution (float): Voxel edge length in meters, e.g. the resolution of the LiDAR voxel map.
+        chunk_size (int): Voxels per chunk edge.
+        max_chunks (int): Chunks kept in memory, each holds chunk_size^3 float32 values.
+        hit (float): Evidence added by a hit.
+        miss (float): Evidence removed from voxels a ray passed through (0 disables free space clearing).
+        max_evidence (float): Upper bound of the evidence of a voxel.
+        threshold (float): Evidence at which a voxel counts as occupied.
+        decay_time (float): Seconds for the evidence to decay by 1/e, None disables decay.
+        clear_range (float): Free space is cleared up to this distance from the sensor, bounding the cost of a frame.
+    """
+    # Cells of the scratch grid marking the free voxels of a frame, larger clear ranges sort the samples instead
+    MAX_SCRATCH = 1 << 24
+    def __init__(self, resolution=0.05, chunk_size=16, max_chunks=1024, hit=1.0, miss=0.4, max_evidence=4.0,
+                 threshold=1.0, decay_time=10.0, clear_range=3.0):
+        self.resolution = resolution
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.hit = hit
+        self.miss = miss
+        self.max_evidence = max_evidence
+        self.threshold = threshold
+        self.decay_time = decay_time
+        self.clear_range = clear_range
+
+        self.pool = np.zeros((max_chunks, chunk_size, chunk_size, chunk_size), dtype=np.float32)
+        self.slot_chunks = np.zeros((max_chunks, 3), dtype=np.int64)  # chunk coordinates of every slot
+        self.slot_times = np.zeros(max_chunks)  # time the decay of a slot was last applied
+        self.slot_used = np.zeros(max_chunks, dtype=bool)
+        self.slots = {}  # packed chunk key -> slot
+        self._free = list(range(max_chunks - 1, -1, -1))
+        self._lock = threading.RLock()
+        self.center = np.zeros(3)
+        self.frames = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    # Coordinates
+
+    def voxels(self, points):
+        """ Integer voxel coordinates (N, 3) of points (N, 3). """
+        return np.floor(np.asarray(points, dtype=float).reshape(-1, 3) / self.resolution).astype(np.int64)
+
+    def _split(self, voxels):
+        """ Voxel coordinates -> (packed chunk keys, local coordinates). """
+        chunks = voxels // self.chunk_size
+        return _pack(chunks), voxels - chunks * self.chunk_size
+
+    def _decay_factors(self, slots, now):
+        if self.decay_time is None:
+            return None
+        return np.exp(-(now - self.slot_times[slots]) / self.decay_time).astype(np.float32)
+
+    def _lookup_slots(self, keys):
+        """ Slot of every key, -1 for chunks not in the map. """
+        unique, inverse = np.unique(keys, return_inverse=True)
+        slots = np.fromiter((self.slots.get(key, -1) for key in unique.tolist()), dtype=np.int64, count=len(unique))
+        return slots[inverse]
+
+    def _allocate(self, key, now):
+        slot = self._free.pop()
+        self.slots[key] = slot
+        self.slot_chunks[slot] = _unpack(key)
+        self.slot_times[slot] = now
+        self.slot_used[slot] = True
+        self.pool[slot] = 0.0
+        return slot
+
+    def _release(self, slot):
+        chunk = self.slot_chunks[slot]
+        del self.slots[int(_pack(chunk[None])[0])]
+        self.slot_used[slot] = False
+        self._free.append(int(slot))
+
+    def _evict_farthest(self, count, keep=()):
+        """ Releases the `count` slots farthest from the map center, except the slots in `keep`. """
+        used = np.flatnonzero(self.slot_used)
+        used = used[~np.isin(used, list(keep))]
+        centers = (self.slot_chunks[used] + 0.5) * self.chunk_size * self.resolution
+        distances = np.linalg.norm(centers - self.center, axis=1)
+        for slot in used[np.argsort(distances)[len(used) - count:]]:
+            self._release(slot)
+
+    def evict(self, center, radius):
+        """ Drops the chunks whose center is farther than `radius` meters from `center`. Returns the number dropped. """
+        with self._lock:
+            used = np.flatnonzero(self.slot_used)
+            centers = (self.slot_chunks[used] + 0.5) * self.chunk_size * self.resolution
+            far = used[np.linalg.norm(centers - np.asarray(center, dtype=float), axis=1) > radius]
+            for slot in far:
+                self._release(slot)
+            return len(far)
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self.slots.values()):
+                self._release(slot)
+
+    # Updates
+
+    def _apply(self, voxels, delta, now, create):
+        """ Adds delta to the evidence of distinct voxels, creating their chunks if `create`. """
+        if not len(voxels):
+            return
+        keys, local = self._split(voxels)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        unique = unique.tolist()
+        if create:
+            # Make room for the new chunks at once, evicting at least 1/16 of the pool to amortize the sort
+            missing = sum(1 for key in unique if key not in self.slots)
+            if missing > len(self._free):
+                keep = [self.slots[key] for key in unique if key in self.slots]
+                count = min(max(missing - len(self._free), self.max_chunks // 16), len(self.slots) - len(keep))
+                self._evict_farthest(count, keep)
+        slots = np.empty(len(unique), dtype=np.int64)
+        for index, key in enumerate(unique):
+            slot = self.slots.get(key)
+            if slot is None:
+                # Chunks that don't fit even after eviction (a frame larger than the pool) are dropped
+                slot = self._allocate(key, now) if create and self._free else -1
+            elif self.decay_time is not None and self.slot_times[slot] != now:
+                # Bring the whole chunk to the current time before changing it
+                self.pool[slot] *= math.exp(-(now - self.slot_times[slot]) / self.decay_time)
+                self.slot_times[slot] = now
+            slots[index] = slot
+        slots = slots[inverse]
+        valid = slots >= 0
+        slots, local = slots[valid], local[valid]
+        index = (slots, local[:, 0], local[:, 1], local[:, 2])
+        self.pool[index] = np.clip(self.pool[index] + delta, 0.0, self.max_evidence)
+
+    def integrate(self, points, origin=None, stamp=None):
+        """
+        Fuses one frame of points into the map.
+
+        Parameters:
+            points (array-like): (N, 3) occupied points (e.g. voxel centers) in the odometry frame.
+            origin (array-like): Sensor position in the odometry frame. Enables free space clearing along the rays,
+                and sets the center used for eviction.
+            stamp (float): Time of the frame in seconds, defaults to time.monotonic().
+        """
+        now = time.monotonic() if stamp is None else stamp
+        hits = _unique_rows(self.voxels(points))
+        with self._lock:
+            if origin is not None:
+                origin = np.asarray(origin, dtype=float)
+                self.center = origin
+                if self.miss > 0 and len(hits):
+                    free = self._free_voxels(origin, (hits + 0.5) * self.resolution, hits)
+                    self._apply(free, -self.miss, now, create=False)
+            self._apply(hits, self.hit, now, create=True)
+            self.frames += 1
+
+    def _free_voxels(self, origin, targets, hits):
+        """ Distinct voxels traversed by the rays from origin to the targets, excluding the hit voxels. """
+        offsets = targets - origin
+        lengths = np.linalg.norm(offsets, axis=1)
+        reach = np.minimum(lengths - self.resolution, self.clear_range)
+        # Samples every voxel length along each ray, stopping one voxel before the target or at the clear range
+        counts = np.maximum(np.ceil(reach / self.resolution), 0).astype(np.int64)
+        if not counts.any():
+            return np.empty((0, 3), dtype=np.int64)
+        # Longest rays first, so the rays still sampled at step k are a prefix
+        order = np.argsort(-counts, kind="stable")
+        directions = (offsets / np.maximum(lengths, 1e-9)[:, None])[order]
+        active = np.searchsorted(-counts[order], -np.arange(1, counts.max() + 1), side="right")
+        start = origin / self.resolution
+
+        # Distinct voxels are marked in a dense grid around the origin instead of sorting the samples
+        radius = int(counts.max()) + 1
+        lower = self.voxels(origin)[0] - radius
+        grid = np.zeros((2 * radius + 1,) * 3, dtype=bool) if (2 * radius + 1) ** 3 <= self.MAX_SCRATCH else None
+        keys = []
+        for step, count in enumerate(active):
+            samples = np.floor(start + directions[:count] * step).astype(np.int64)
+            if grid is not None:
+                samples -= lower
+                grid[samples[:, 0], samples[:, 1], samples[:, 2]] = True
+            else:
+                keys.append(_pack(samples))
+
+        if grid is not None:
+            # Never clear a voxel hit in the same frame
+            local = hits - lower
+            local = local[np.all((local >= 0) & (local < grid.shape[0]), axis=1)]
+            grid[local[:, 0], local[:, 1], local[:, 2]] = False
+            return np.argwhere(grid) + lower
+        free = _unique_rows_of_keys(np.concatenate(keys))
+        return free[~np.isin(_pack(free), _pack(hits))]
+
+    # Queries
+
+    def evidence(self, points, now=None):
+        """ Current evidence of the voxels containing the points, (N,) float32, 0 for unknown space. """
+        now = time.monotonic() if now is None else now
+        keys, local = self._split(self.voxels(points))
+        with self._lock:
+            slots = self._lookup_slots(keys)
+            values = np.zeros(len(keys), dtype=np.float32)
+            known = slots >= 0
+            slots, local = slots[known], local[known]
+            values[known] = self.pool[slots, local[:, 0], local[:, 1], local[:, 2]]
+            factors = self._decay_factors(slots, now)
+            if factors is not None:
+                values[known] *= np.minimum(factors, 1.0)
+        return values
+
+    def occupied(self, points, now=None):
+        """ (N,) bool, True where the voxel containing a point is occupied. """
+        return self.evidence(points, now) >= self.threshold
+
+    def raycast(self, origins, directions, max_range=5.0, now=None):
+        """
+        Distance along each ray to the first occupied voxel, sampled every voxel length.
+
+        Parameters:
+            origins (array-like): (3,) or (R, 3) ray origins.
+            directions (array-like): (R, 3) ray directions, normalized here.
+            max_range (float): Rays without hit within this distance return inf.
+
+        Returns:
+            numpy.ndarray: (R,) distances in meters.
+        """
+        directions = np.asarray(directions, dtype=float).reshape(-1, 3)
+        directions = directions / np.linalg.norm(directions, axis=1)[:, None]
+        origins = np.broadcast_to(np.asarray(origins, dtype=float), directions.shape)
+        distances = np.arange(1, int(np.ceil(max_range / self.resolution)) + 1) * self.resolution
+        samples = origins[:, None, :] + directions[:, None, :] * distances[None, :, None]
+        hits = self.occupied(samples.reshape(-1, 3), now).reshape(len(directions), len(distances))
+        first = np.argmax(hits, axis=1)
+        return np.where(hits.any(axis=1), distances[first], np.inf)
+
+    def occupied_points(self, lower=None, upper=None, now=None):
+        """ Centers (K, 3) of the occupied voxels, optionally limited to the box [lower, upper]. """
+        now = time.monotonic() if now is None else now
+        size = self.chunk_size
+        with self._lock:
+            slots = np.flatnonzero(self.slot_used)
+            if lower is not None:
+                chunk_lower = np.floor(np.asarray(lower, dtype=float) / (self.resolution * size))
+                chunk_upper = np.floor(np.asarray(upper, dtype=float) / (self.resolution * size))
+                chunks = self.slot_chunks[slots]
+                slots = slots[np.all((chunks >= chunk_lower) & (chunks <= chunk_upper), axis=1)]
+            if not len(slots):
+                return np.empty((0, 3))
+            values = self.pool[slots]
+            factors = self._decay_factors(slots, now)
+            if factors is not None:
+                values = values * np.minimum(factors, 1.0)[:, None, None, None]
+            slot_index, x, y, z = np.nonzero(values >= self.threshold)
+            voxels = self.slot_chunks[slots[slot_index]] * size + np.stack((x, y, z), axis=1)
+        centers = (voxels + 0.5) * self.resolution
+        if lower is not None:
+            inside = np.all((centers >= lower) & (centers <= upper), axis=1)
+            centers = centers[inside]
+        return centers
+
+    def boxes_occupied(self, lowers, uppers, now=None, block=1 << 20):
+        """
+        Tests many axis-aligned boxes at once, e.g. footprints along a planned path.
+
+        Parameters:
+            lowers, uppers (array-like): (B, 3) box corners in the odometry frame.
+            block (int): Box and point pairs tested at once, bounds the temporary arrays to about `block` bytes each.
+
+        Returns:
+            numpy.ndarray: (B,) number of occupied voxel centers inside each box.
+        """
+        lowers = np.asarray(lowers, dtype=float).reshape(-1, 3)
+        uppers = np.asarray(uppers, dtype=float).reshape(-1, 3)
+        points = self.occupied_points(lowers.min(axis=0), uppers.max(axis=0), now)
+        counts = np.zeros(len(lowers), dtype=np.int64)
+        if not len(points):
+            return counts
+        rows = max(1, block // len(points))
+        for start in range(0, len(lowers), rows):
+            low, high = lowers[start:start + rows], uppers[start:start + rows]
+            inside = np.ones((len(low), len(points)), dtype=bool)
+            for axis in range(3):
+                coordinates = points[None, :, axis]
+                inside &= coordinates >= low[:, axis, None]
+                inside &= coordinates <= high[:, axis, None]
+            counts[start:start + rows] = np.count_nonzero(inside, axis=1)
+        return counts
@@ -0,0 +1,317 @@
+import math
+import heapq
+import logging
+import numpy as np
+from algorithms.trajectory import TrajectoryGenerator
+
+logger = logging.getLogger(__name__)
+
+'''
+Path planning on the LiDAR height map (HeightMap_ on ULIDAR_HEIGHT_MAP) for SportClient.TrajectoryFollow.
+
+- height_grid: Converts a HeightMap_ into a (height, width) array with NaN for unknown cells.
+- traversal_cost: Vectorized cost map from a height grid: slope and step height per cell, lethal cells inflated by
+   the robot radius.
+- CostMapCache: Keeps the cost of fixed world-aligned tiles and recomputes only the tiles whose heights (including
+   the margin the cost depends on) changed since the last map, even when the local map moved with the robot.
+- astar: Heap-based 8-connected A* on a cost grid.
+- HeightMapPlanner: Cost map, A* on a coarser planning grid, and the 30-point horizon for TrajectoryFollow.
+'''
+
+
+def height_grid(height_map, unknown_above=1e3):
+    """
+    Heights of a HeightMap_ as a (height, width) float32 array, row y and column x, NaN for unknown cells.
+    Returns (grid, origin (x, y) of cell (0, 0), resolution).
+    """
+    grid = np.asarray(height_map.data, dtype=np.float32).reshape(height_map.height, height_map.width)
+    grid = np.where(np.isfinite(grid) & (np.abs(grid) < unknown_above), grid, np.nan)
+    return grid, (float(height_map.origin[0]), float(height_map.origin[1])), float(height_map.resolution)
+
+
+def _shifted(grid, dy, dx, fill):
+    """ grid shifted by (dy, dx) cells, out-of-range cells filled with `fill`. """
+    result = np.full_like(grid, fill)
+    h, w = grid.shape
+    result[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] = \
+        grid[max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)]
+    return result
+
+
+def _dilate(mask, radius):
+    """ Binary dilation of a mask by a disc of `radius` cells. """
+    result = mask.copy()
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            if (dy or dx) and dy * dy + dx * dx <= radius * radius:
+                result |= _shifted(mask, dy, dx, False)
+    return result
+
+
+def traversal_cost(heights, resolution, max_step=0.16, max_slope=0.5, slope_weight=4.0, step_weight=20.0,
+                   unknown_cost=3.0, robot_radius=0.3):
+    """
+    Cost per cell of crossing a height grid, 1 on flat ground and inf for lethal cells.
+
+    Parameters:
+        heights (numpy.ndarray): Height grid, NaN for unknown cells.
+        resolution (float): Cell size in meters.
+        max_step (float): Height difference to a neighbour (m) above which a cell is lethal.
+        max_slope (float): Slope (rise over run) above which a cell is lethal.
+        slope_weight, step_weight (float): Extra cost per unit of slope and per meter of step.
+        unknown_cost (float): Cost of unknown cells, inf to forbid them.
+        robot_radius (float): Lethal cells are inflated by this radius.
+    """
+    heights = np.asarray(heights, dtype=np.float32)
+    known = np.isfinite(heights)
+    filled = np.where(known, heights, 0.0)
+
+    # Step: largest height difference to a known 8-neighbour
+    step = np.zeros_like(filled)
+    for dy, dx in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+        neighbour = _shifted(heights, dy, dx, np.nan)
+        difference = np.abs(neighbour - filled)
+        np.fmax(step, np.where(known & np.isfinite(neighbour), difference, 0.0), out=step)
+
+    # Slope from central differences where both neighbours are known, one-sided differences where only one is
+    gradients = []
+    for dy, dx in ((1, 0), (0, 1)):
+        before = _shifted(heights, dy, dx, np.nan)
+        after = _shifted(heights, -dy, -dx, np.nan)
+        central = (after - before) / (2 * resolution)
+        forward = (after - filled) / resolution
+        backward = (filled - before) / resolution
+        gradient = np.where(np.isfinite(central), central,
+                            np.where(np.isfinite(forward), forward, np.where(np.isfinite(backward), backward, 0.0)))
+        gradients.append(gradient)
+    slope = np.hypot(*gradients)
+    slope[~known] = 0.0
+
+    cost = 1.0 + slope_weight * slope + step_weight * step
+    cost[~known] = unknown_cost
+    lethal = known & ((step > max_step) | (slope > max_slope))
+    radius = int(math.ceil(robot_radius / resolution))
+    if radius > 0 and lethal.any():
+        lethal = _dilate(lethal, radius)
+    cost[lethal] = np.inf
+    return cost
+
+
+class CostMapCache:
+    """
+    CostMapCache: Tile-wise cache of traversal_cost for a local height map moving in a fixed world frame.
+
+    Cells are addressed by their world index (origin / resolution). The cost of a tile depends on the heights of the
+    tile and of a margin around it (neighbours and robot radius); a tile is recomputed only when these heights changed.
+
+    Parameters:
+        tile (int): Tile edge in cells.
+        cost_args: Keyword arguments of traversal_cost.
+    """
+    def __init__(self, tile=32, max_tiles=4096, **cost_args):
+        self.tile = tile
+        self.max_tiles = max_tiles
+        self.cost_args = cost_args
+        self.tiles = {}  # (world tile row, world tile column) -> (padded heights, cost of the tile)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def margin(self):
+        resolution = self._resolution
+        return int(math.ceil(self.cost_args.get("robot_radius", 0.3) / resolution)) + 2
+
+    def update(self, heights, origin, resolution):
+        """ Cost grid of the same shape as `heights`, recomputing only the changed tiles. """
+        self._resolution = resolution
+        heights = np.asarray(heights, dtype=np.float32)
+        rows, cols = heights.shape
+        # World index of cell (0, 0), the local map moves in whole cells
+        offset_y, offset_x = int(round(origin[1] / resolution)), int(round(origin[0] / resolution))
+        margin, tile = self.margin, self.tile
+        padded = np.pad(heights, margin, constant_values=np.nan)
+        cost = np.empty_like(heights)
+
+        first_ty, first_tx = offset_y // tile, offset_x // tile
+        last_ty, last_tx = (offset_y + rows - 1) // tile, (offset_x + cols - 1) // tile
+        seen = set()
+        for ty in range(first_ty, last_ty + 1):
+            # Local cell range of the tile, clipped to the map
+            y0, y1 = max(ty * tile - offset_y, 0), min((ty + 1) * tile - offset_y, rows)
+            for tx in range(first_tx, last_tx + 1):
+                x0, x1 = max(tx * tile - offset_x, 0), min((tx + 1) * tile - offset_x, cols)
+                window = padded[y0:y1 + 2 * margin, x0:x1 + 2 * margin]
+                key = (ty, tx, y0 + offset_y, x0 + offset_x, y1 - y0, x1 - x0)
+                seen.add(key)
+                cached = self.tiles.get(key)
+                if cached is not None and np.array_equal(cached[0], window, equal_nan=True):
+                    self.hits += 1
+                    cost[y0:y1, x0:x1] = cached[1]
+                    continue
+                self.misses += 1
+                tile_cost = traversal_cost(window, resolution, **self.cost_args)[margin:-margin, margin:-margin]
+                self.tiles[key] = (window.copy(), tile_cost)
+                cost[y0:y1, x0:x1] = tile_cost
+
+        if len(self.tiles) > self.max_tiles:
+            # Forget the tiles the current map doesn't cover
+            for key in [key for key in self.tiles if key not in seen]:
+                del self.tiles[key]
+        return cost
+
+
+def astar(cost, start, goal):
+    """
+    8-connected A* on a cost grid (cost of entering a cell per meter of cell size, inf for blocked cells).
+
+    Parameters:
+        cost (numpy.ndarray): (rows, cols) costs, all >= 1.
+        start, goal: (row, col) cells.
+
+    Returns:
+        list of (row, col) from start to goal, or None if the goal can't be reached.
+    """
+    inf = math.inf
+    rows, cols = cost.shape
+    width = cols + 2
+    # A border of blocked cells removes the bounds checks from the inner loop
+    flat = np.pad(cost, 1, constant_values=np.inf).ravel().tolist()
+    start_index = (start[0] + 1) * width + start[1] + 1
+    goal_index = (goal[0] + 1) * width + goal[1] + 1
+    if flat[goal_index] == inf:
+        return None
+    diagonal = math.sqrt(2.0)
+    moves = ((-width, 1.0), (width, 1.0), (-1, 1.0), (1, 1.0),
+             (-width - 1, diagonal), (-width + 1, diagonal), (width - 1, diagonal), (width + 1, diagonal))
+
+    # Octile distance to the goal of every cell, computed at once instead of per push
+    dy = np.abs(np.arange(rows + 2) - (goal[0] + 1))[:, None]
+    dx = np.abs(np.arange(width) - (goal[1] + 1))[None, :]
+    heuristic = ((dx + dy) + (diagonal - 2.0) * np.minimum(dx, dy)).ravel().tolist()
+
+    # Flat lists instead of dicts: the grid is small and list indexing is the cheapest lookup in the inner loop
+    g = [inf] * len(flat)
+    parents = [-1] * len(flat)
+    closed = bytearray(len(flat))
+    g[start_index] = 0.0
+    # Ties on f are broken towards the larger g (the node closer to the goal), which avoids expanding whole plateaus
+    heap = [(heuristic[start_index], 0.0, start_index)]
+    while heap:
+        _, g_current, current = heapq.heappop(heap)
+        g_current = -g_current
+        if closed[current]:
+            continue
+        if current == goal_index:
+            path = []
+            while current != -1:
+                path.append(((current // width) - 1, (current % width) - 1))
+                current = parents[current]
+            return path[::-1]
+        closed[current] = 1
+        cost_current = flat[current]
+        for offset, length in moves:
+            neighbour = current + offset
+            cost_neighbour = flat[neighbour]
+            if cost_neighbour == inf or closed[neighbour]:
+                continue
+            candidate = g_current + length * 0.5 * (cost_current + cost_neighbour)
+            if candidate < g[neighbour]:
+                g[neighbour] = candidate
+                parents[neighbour] = current
+                heapq.heappush(heap, (candidate + heuristic[neighbour], -candidate, neighbour))
+    return None
+
+
+class HeightMapPlanner:
+    """
+    HeightMapPlanner: Plans from the robot pose to a goal on the latest height map and produces the TrajectoryFollow
+    horizon along the path.
+
+    The cost map is computed at the map resolution (cached per tile), then max-pooled into planning cells of
+    `plan_resolution` for the search, which keeps replanning on a 10 m x 10 m map at 5 cm well below 20 ms.
+
+    Parameters:
+        plan_resolution (float): Cell size of the search grid in meters, a multiple of the map resolution.
+        speed (float): Travel speed along the path in m/s.
+        cost_args: Keyword arguments of traversal_cost.
+    """
+    def __init__(self, plan_resolution=0.1, speed=0.5, tile=32, **cost_args):
+        self.plan_resolution = plan_resolution
+        self.speed = speed
+        self.cache = CostMapCache(tile=tile, **cost_args)
+        self.generator = TrajectoryGenerator()
+        self.cost = None
+        self.origin = None
+        self.resolution = None
+
+    def update_map(self, heights, origin, resolution):
+        """ Updates the cost map from a height grid, see height_grid. """
+        self.cost = self.cache.update(heights, origin, resolution)
+        self.origin = origin
+        self.resolution = resolution
+
+    def update_height_map(self, height_map):
+        """ Updates the cost map from a HeightMap_ sample. """
+        self.update_map(*height_grid(height_map))
+
+    def _planning_grid(self):
+        factor = max(1, int(round(self.plan_resolution / self.resolution)))
+        rows, cols = self.cost.shape
+        rows, cols = rows // factor * factor, cols // factor * factor
+        pooled = self.cost[:rows, :cols].reshape(rows // factor, factor, cols // factor, factor).max(axis=(1, 3))
+        return pooled, factor * self.resolution
+
+    def plan(self, start, goal):
+        """
+        Path from start to goal (x, y) in the map frame, as an (M, 2) array of waypoints or None if there is none.
+        Goals outside the map are moved to the closest map border cell.
+        """
+        if self.cost is None:
+            raise RuntimeError("No height map received yet.")
+        grid, cell = self._planning_grid()
+        rows, cols = grid.shape
+
+        def to_cell(point):
+            col = int((point[0] - self.origin[0]) / cell)
+            row = int((point[1] - self.origin[1]) / cell)
+            return min(max(row, 0), rows - 1), min(max(col, 0), cols - 1)
+
+        start_cell = to_cell(start)
+        # The robot stands on its own cell even if the inflated cost map marks it blocked
+        grid[start_cell] = min(grid[start_cell], 1.0)
+        cells = astar(grid, start_cell, to_cell(goal))
+        if cells is None:
+            return None
+        cells = np.asarray(cells, dtype=float)
+        waypoints = np.empty((len(cells), 2))
+        waypoints[:, 0] = self.origin[0] + (cells[:, 1] + 0.5) * cell
+        waypoints[:, 1] = self.origin[1] + (cells[:, 0] + 0.5) * cell
+        waypoints[0] = start[:2]
+        return _simplify(waypoints)
+
+    def plan_trajectory(self, start, goal, t_start=0.0):
+        """
+        (30, 7) TrajectoryFollow horizon along the planned path (see algorithms.trajectory), or None if the goal is
+        unreachable. The array is reused by the next call.
+        Once the goal is reached the horizon holds the start position, with the yaw of start (x, y, yaw) if given.
+        """
+        waypoints = self.plan(start, goal)
+        if waypoints is None:
+            return None
+        if len(waypoints) < 2:
+            waypoints = np.vstack((waypoints, np.asarray(goal[:2], dtype=float)))
+        if np.hypot(*np.diff(waypoints, axis=0).T).sum() <= 1e-6:
+            yaw = float(start[2]) if len(start) > 2 else 0.0
+            return self.generator.from_velocity(0.0, x=float(start[0]), y=float(start[1]), yaw=yaw)
+        return self.generator.from_waypoints(waypoints, speed=self.speed, t_start=t_start)
+
+
+def _simplify(waypoints):
+    """ Drops waypoints in the middle of straight grid runs, so the spline follows the path shape and not the grid. """
+    if len(waypoints) < 3:
+        return waypoints
+    direction = np.diff(waypoints, axis=0)
+    direction = np.round(direction / np.linalg.norm(direction, axis=1)[:, None], 6)
+    turns = np.any(direction[1:] != direction[:-1], axis=1)
+    keep = np.concatenate(([True], turns, [True]))
+    return waypoints[keep]
@@ -0,0 +1,166 @@
+import math
+import bisect
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+'''
+Time-indexed pose history on compact NumPy arrays.
+
+Poses are a position (x, y, z) and a unit quaternion (x, y, z, w), the field order of geometry_msgs Pose_.
+
+- PoseHistory: Bounded history of stamped poses, appended in O(1) amortized, with O(log n) lookup of the pose at any
+   time (linear interpolation of the position, spherical interpolation of the orientation) and a vectorized variant
+   for many times at once.
+'''
+
+
+def slerp(q0, q1, fraction):
+    """ Spherical interpolation between (N, 4) quaternion arrays, fraction of shape (N,). """
+    dot = np.einsum("ni,ni->n", q0, q1)
+    # Take the short way around
+    q1 = np.where((dot < 0)[:, None], -q1, q1)
+    dot = np.abs(dot)
+    angle = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin = np.sin(angle)
+    close = sin < 1e-6
+    safe = np.where(close, 1.0, sin)
+    w0 = np.where(close, 1.0 - fraction, np.sin((1.0 - fraction) * angle) / safe)
+    w1 = np.where(close, fraction, np.sin(fraction * angle) / safe)
+    result = w0[:, None] * q0 + w1[:, None] * q1
+    return result / np.linalg.norm(result, axis=1)[:, None]
+
+
+def _slerp_one(q0, q1, fraction):
+    """ slerp for a single pair of quaternions given as sequences of floats, returns a (4,) array. """
+    dot = q0[0] * q1[0] + q0[1] * q1[1] + q0[2] * q1[2] + q0[3] * q1[3]
+    sign = -1.0 if dot < 0 else 1.0
+    dot = min(abs(dot), 1.0)
+    angle = math.acos(dot)
+    sin = math.sin(angle)
+    if sin < 1e-6:
+        w0, w1 = 1.0 - fraction, fraction
+    else:
+        w0, w1 = math.sin((1.0 - fraction) * angle) / sin, math.sin(fraction * angle) / sin
+    w1 *= sign
+    result = [w0 * a + w1 * b for a, b in zip(q0, q1)]
+    norm = math.sqrt(sum(v * v for v in result))
+    return np.array(result) / norm
+
+
+def yaw_of(quaternions):
+    """ Yaw (rad) of (..., 4) quaternions (x, y, z, w). """
+    x, y, z, w = np.moveaxis(np.asarray(quaternions, dtype=float), -1, 0)
+    return np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+
+
+class PoseHistory:
+    """
+    PoseHistory: Stamped poses in preallocated arrays, oldest first.
+
+    Samples must arrive in time order; older samples are dropped. When the arrays are full the oldest half of the
+    capacity is discarded, so appending stays O(1) amortized and memory is bounded.
+
+    Parameters:
+        capacity (int): Maximum number of poses kept.
+    """
+    def __init__(self, capacity=100000):
+        if capacity < 2:
+            raise ValueError("Capacity must be at least 2.")
+        self.capacity = capacity
+        self.times = np.empty(capacity)
+        self.positions = np.empty((capacity, 3))
+        self.orientations = np.empty((capacity, 4))
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, stamp, position, orientation):
+        """ Adds the pose at time `stamp` (seconds), position (x, y, z) and quaternion (x, y, z, w). """
+        with self._lock:
+            count = self.count
+            if count and stamp <= self.times[count - 1]:
+                logger.debug(f"Dropped out-of-order pose at {stamp:.6f}")
+                return False
+            if count == self.capacity:
+                keep = self.capacity // 2
+                self.times[:keep] = self.times[count - keep:count]
+                self.positions[:keep] = self.positions[count - keep:count]
+                self.orientations[:keep] = self.orientations[count - keep:count]
+                count = keep
+            self.times[count] = stamp
+            self.positions[count] = position
+            self.orientations[count] = orientation
+            self.count = count + 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self.count = 0
+
+    @property
+    def span(self):
+        """ (oldest, newest) stamp, or None when empty. """
+        return (self.times[0], self.times[self.count - 1]) if self.count else None
+
+    def latest(self):
+        """ (stamp, position, orientation) of the newest pose, or None. """
+        with self._lock:
+            if not self.count:
+                return None
+            index = self.count - 1
+            return self.times[index], self.positions[index].copy(), self.orientations[index].copy()
+
+    def pose_at(self, stamp, extrapolate=False):
+        """
+        Pose at time `stamp`, interpolated between the two surrounding samples.
+
+        Returns:
+            (position, orientation) as NumPy arrays, or None if `stamp` lies outside the history and `extrapolate`
+            is False. With `extrapolate`, the closest pose is returned instead.
+        """
+        with self._lock:
+            count = self.count
+            if not count:
+                return None
+            times = self.times
+            # bisect on the array is O(log n) without creating a view or temporary
+            index = bisect.bisect_left(times, stamp, 0, count)
+            if index < count and times[index] == stamp:
+                return self.positions[index].copy(), self.orientations[index].copy()
+            if index == 0 or index == count:
+                if not extrapolate:
+                    return None
+                index = 0 if index == 0 else count - 1
+                return self.positions[index].copy(), self.orientations[index].copy()
+
+            fraction = float((stamp - times[index - 1]) / (times[index] - times[index - 1]))
+            position = self.positions[index - 1] + fraction * (self.positions[index] - self.positions[index - 1])
+            orientation = _slerp_one(self.orientations[index - 1].tolist(), self.orientations[index].tolist(), fraction)
+            return position, orientation
+
+    def poses_at(self, stamps):
+        """
+        Poses at many times at once, times outside the history are clamped to its ends.
+
+        Returns:
+            (positions (N, 3), orientations (N, 4)), or None when the history is empty.
+        """
+        stamps = np.asarray(stamps, dtype=float)
+        with self._lock:
+            count = self.count
+            if not count:
+                return None
+            times = self.times[:count]
+            if count == 1:
+                return np.repeat(self.positions[:1], len(stamps), 0), np.repeat(self.orientations[:1], len(stamps), 0)
+            upper = np.clip(np.searchsorted(times, stamps), 1, count - 1)
+            lower = upper - 1
+            fraction = np.clip((stamps - times[lower]) / (times[upper] - times[lower]), 0.0, 1.0)
+            positions = self.positions[lower] + fraction[:, None] * (self.positions[upper] - self.positions[lower])
+            orientations = slerp(self.orientations[lower], self.orientations[upper], fraction)
+            return positions, orientations
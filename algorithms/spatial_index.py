@@ -0,0 +1,311 @@
+import math
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+'''
+Nearest-obstacle queries over LiDAR point clouds.
+
+- KDTree: Balanced k-d tree over an (N, 3) or (N, 2) point array. Queries are answered in bulk: all query points
+   descend the tree together, level by level, as NumPy arrays of (query, node) pairs, so the Python overhead is per
+   tree level rather than per query or per node.
+- ObstacleIndex: Holds the KDTree of the latest frame. update() rebuilds the tree on a background thread and swaps it
+   in when done; queries always run on the current tree and never wait for a rebuild.
+'''
+
+
+class KDTree:
+    """
+    KDTree: Static k-d tree, built once per point cloud.
+
+    Parameters:
+        points (array-like): (N, D) points.
+        leaf_size (int): Maximum number of points in a leaf. Nearest neighbour queries are cheapest for k below
+            half of it.
+    """
+    def __init__(self, points, leaf_size=64):
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2:
+            raise ValueError("Points must be an (N, D) array.")
+        self.leaf_size = leaf_size
+        self.size, self.dims = points.shape
+        self.indices = np.arange(self.size)
+        self._build(points)
+
+    def __len__(self):
+        return self.size
+
+    def _build(self, points):
+        capacity = 2 * max(1, math.ceil(self.size / max(1, self.leaf_size // 2))) + 1
+        self.starts = np.zeros(capacity, dtype=np.int64)
+        self.ends = np.zeros(capacity, dtype=np.int64)
+        self.children = np.full((capacity, 2), -1, dtype=np.int64)
+        self.split_dims = np.zeros(capacity, dtype=np.int64)
+        self.split_values = np.zeros(capacity)
+        self.lower = np.zeros((capacity, self.dims))
+        self.upper = np.zeros((capacity, self.dims))
+
+        # Points and their original indices are reordered in place, every node covers a contiguous range
+        order = self.indices
+        ordered = points.copy()
+        lower, upper = self.lower, self.upper
+        count = 1
+        stack = [(0, 0, self.size)]
+        while stack:
+            node, start, end = stack.pop()
+            block = ordered[start:end]
+            self.starts[node], self.ends[node] = start, end
+            if end > start:
+                lower[node] = block.min(axis=0)
+                upper[node] = block.max(axis=0)
+            if end - start <= self.leaf_size:
+                continue
+            # Split at the median of the widest dimension
+            dim = int(np.argmax(upper[node] - lower[node]))
+            half = (end - start) // 2
+            partition = np.argpartition(block[:, dim], half)
+            ordered[start:end] = block[partition]
+            order[start:end] = order[start:end][partition]
+            self.split_dims[node] = dim
+            self.split_values[node] = ordered[start + half, dim]
+            self.children[node] = count, count + 1
+            stack.append((count + 1, start + half, end))
+            stack.append((count, start, start + half))
+            count += 2
+
+        self.node_count = count
+        self.data = points  # in the order the tree was built from
+        self.points = ordered
+
+    # Traversal helpers
+
+    def _leaf_of(self, queries):
+        """ Leaf reached by every query following the split planes. """
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        while True:
+            internal = self.children[nodes, 0] >= 0
+            if not internal.any():
+                return nodes
+            active = np.flatnonzero(internal)
+            node = nodes[active]
+            right = queries[active, self.split_dims[node]] >= self.split_values[node]
+            nodes[active] = self.children[node, right.astype(np.int64)]
+
+    def _leaf_points(self, nodes):
+        """ (P, leaf_size) positions of the points of the leaves `nodes` and their validity mask. """
+        offsets = np.arange(self.leaf_size)
+        positions = self.starts[nodes][:, None] + offsets[None, :]
+        valid = positions < self.ends[nodes][:, None]
+        return np.where(valid, positions, 0), valid
+
+    def _candidates(self, queries, bounds):
+        """
+        (query, position, squared distance) of every point within `bounds` (squared, one per query) of its query.
+        """
+        found_q, found_p, found_d = [], [], []
+        pair_q = np.arange(len(queries))
+        pair_n = np.zeros(len(queries), dtype=np.int64)
+        while len(pair_q):
+            # Prune nodes whose bounding box is farther than the bound
+            q = queries[pair_q]
+            gap = np.maximum(self.lower[pair_n] - q, 0.0) + np.maximum(q - self.upper[pair_n], 0.0)
+            near = np.einsum("ij,ij->i", gap, gap) <= bounds[pair_q]
+            pair_q, pair_n = pair_q[near], pair_n[near]
+
+            leaf = self.children[pair_n, 0] < 0
+            if leaf.any():
+                leaf_q, leaf_n = pair_q[leaf], pair_n[leaf]
+                positions, valid = self._leaf_points(leaf_n)
+                offsets = self.points[positions] - queries[leaf_q][:, None, :]
+                distances = np.einsum("ijk,ijk->ij", offsets, offsets)
+                hit = valid & (distances <= bounds[leaf_q][:, None])
+                rows, cols = np.nonzero(hit)
+                found_q.append(leaf_q[rows])
+                found_p.append(positions[rows, cols])
+                found_d.append(distances[rows, cols])
+
+            inner_q, inner_n = pair_q[~leaf], pair_n[~leaf]
+            pair_q = np.concatenate((inner_q, inner_q))
+            pair_n = np.concatenate((self.children[inner_n, 0], self.children[inner_n, 1]))
+
+        if not found_q:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        return np.concatenate(found_q), np.concatenate(found_p), np.concatenate(found_d)
+
+    # Queries
+
+    def query(self, queries, k=1):
+        """
+        k nearest neighbours of every query point.
+
+        Returns:
+            (distances, indices), each (M, k), nearest first. Indices refer to the points the tree was built from;
+            missing neighbours (fewer than k points) have distance inf and index -1.
+        """
+        queries = np.asarray(queries, dtype=float).reshape(-1, self.dims)
+        count = len(queries)
+        distances = np.full((count, k), np.inf)
+        indices = np.full((count, k), -1, dtype=np.int64)
+        if not self.size or not count:
+            return distances, indices
+
+        # Initial bound: the k-th nearest point within the leaf of each query
+        leaves = self._leaf_of(queries)
+        positions, valid = self._leaf_points(leaves)
+        offsets = self.points[positions] - queries[:, None, :]
+        leaf_distances = np.where(valid, np.einsum("ijk,ijk->ij", offsets, offsets), np.inf)
+        if k <= leaf_distances.shape[1]:
+            bounds = np.partition(leaf_distances, k - 1, axis=1)[:, k - 1]
+        else:
+            bounds = np.full(count, np.inf)
+
+        found_q, found_p, found_d = self._candidates(queries, bounds)
+        # Keep the k nearest candidates of every query
+        order = np.lexsort((found_d, found_q))
+        found_q, found_p, found_d = found_q[order], found_p[order], found_d[order]
+        first = np.searchsorted(found_q, np.arange(count))
+        rank = np.arange(len(found_q)) - first[found_q]
+        keep = rank < k
+        distances[found_q[keep], rank[keep]] = np.sqrt(found_d[keep])
+        indices[found_q[keep], rank[keep]] = self.indices[found_p[keep]]
+        return distances, indices
+
+    def query_radius(self, queries, radius, return_distances=False):
+        """
+        Points within `radius` of every query point.
+
+        Returns:
+            list of index arrays, one per query (and a list of distance arrays if `return_distances`).
+        """
+        queries = np.asarray(queries, dtype=float).reshape(-1, self.dims)
+        bounds = np.broadcast_to(np.asarray(radius, dtype=float) ** 2, (len(queries),))
+        found_q, found_p, found_d = self._candidates(queries, bounds)
+        order = np.argsort(found_q, kind="stable")
+        splits = np.searchsorted(found_q[order], np.arange(1, len(queries)))
+        indices = np.split(self.indices[found_p[order]], splits)
+        if return_distances:
+            return indices, np.split(np.sqrt(found_d[order]), splits)
+        return indices
+
+    def count_radius(self, queries, radius):
+        """ Number of points within `radius` of every query point, (M,). """
+        queries = np.asarray(queries, dtype=float).reshape(-1, self.dims)
+        bounds = np.broadcast_to(np.asarray(radius, dtype=float) ** 2, (len(queries),))
+        found_q, _, _ = self._candidates(queries, bounds)
+        return np.bincount(found_q, minlength=len(queries))
+
+
+class ObstacleIndex:
+    """
+    ObstacleIndex: Nearest-obstacle queries on the latest point cloud, rebuilt in the background.
+
+    update() hands the new cloud to a builder thread. If frames arrive faster than the tree builds, intermediate frames
+    are skipped and the newest one is built next. Queries use the last completed tree.
+
+    Parameters:
+        leaf_size (int): Leaf size of the trees.
+        min_height, max_height (float): Points outside this height band (z, in the frame of the cloud) are ignored,
+            e.g. to drop the floor and the ceiling. None disables the bound.
+    """
+    def __init__(self, leaf_size=64, min_height=None, max_height=None):
+        self.leaf_size = leaf_size
+        self.min_height = min_height
+        self.max_height = max_height
+        self.tree = None
+        self.stamp = None
+        self.builds = 0
+        self._pending = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """ Starts the builder thread, update() builds synchronously until then. """
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="obstacle-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def update(self, points, stamp=None):
+        """ Schedules a rebuild for a new cloud of (N, 3) points. """
+        if not self._running:
+            self._build(points, stamp)
+            return
+        with self._condition:
+            self._pending = (points, stamp)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                points, stamp = self._pending
+                self._pending = None
+            try:
+                self._build(points, stamp)
+            except Exception as e:
+                logger.error(f"Failed to build the obstacle index: {e!r}")
+
+    def _build(self, points, stamp):
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if self.min_height is not None:
+            points = points[points[:, 2] >= self.min_height]
+        if self.max_height is not None:
+            points = points[points[:, 2] <= self.max_height]
+        tree = KDTree(points, self.leaf_size)
+        # A single reference assignment, readers see either the old or the new tree
+        self.tree, self.stamp = tree, stamp
+        self.builds += 1
+
+    def nearest(self, queries, k=1):
+        """ See KDTree.query, (inf, -1) everywhere before the first build. """
+        tree = self.tree
+        if tree is None:
+            count = len(np.asarray(queries).reshape(-1, 3))
+            return np.full((count, k), np.inf), np.full((count, k), -1, dtype=np.int64)
+        return tree.query(queries, k)
+
+    def within(self, queries, radius):
+        """ See KDTree.query_radius. """
+        tree = self.tree
+        if tree is None:
+            return [np.empty(0, dtype=np.int64) for _ in np.asarray(queries).reshape(-1, 3)]
+        return tree.query_radius(queries, radius)
+
+    def sector_distances(self, position, yaw=0.0, sectors=8, max_range=3.0):
+        """
+        Distance to the nearest obstacle in each of `sectors` equal angular sectors around a position, measured in the
+        horizontal plane. Sector 0 is centered on the heading `yaw` and the sectors go counter-clockwise.
+
+        Returns:
+            numpy.ndarray: (sectors,) distances, inf where no obstacle lies within `max_range`.
+        """
+        distances = np.full(sectors, np.inf)
+        tree = self.tree
+        if tree is None or not len(tree):
+            return distances
+        position = np.asarray(position, dtype=float)
+        indices = tree.query_radius(position, max_range)[0]
+        if not len(indices):
+            return distances
+        offsets = tree.data[indices, :2] - position[:2]
+        ranges = np.hypot(offsets[:, 0], offsets[:, 1])
+        width = 2 * np.pi / sectors
+        angles = np.mod(np.arctan2(offsets[:, 1], offsets[:, 0]) - yaw + width / 2, 2 * np.pi)
+        np.minimum.at(distances, (angles // width).astype(np.int64) % sectors, ranges)
+        return distances
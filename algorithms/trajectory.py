@@ -0,0 +1,240 @@
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+'''
+Trajectory generation for SportClient.TrajectoryFollow.
+
+- TrajectoryGenerator: Builds the 30-point horizon as a (30, 7) float array, either from waypoints through a
+   time-parameterized natural cubic spline, or by integrating a body velocity profile. The array columns follow
+   PathPoint_: t_from_start, x, y, yaw, vx, vy, vyaw (positions and velocities in the odometry frame).
+- TrajectoryStreamer: Receding-horizon streaming, sends a new horizon to the robot only when the plan changed or the
+   horizon sent last is about to run out.
+- encode_path: Serializes a path array into the TrajectoryFollow request parameter in a single formatting step.
+'''
+
+# Number of path points TrajectoryFollow expects
+HORIZON = 30
+# Time between two path points in seconds
+HORIZON_DT = 0.1
+# Columns of a path array, in PathPoint_ field order
+PATH_FIELDS = ("t_from_start", "x", "y", "yaw", "vx", "vy", "vyaw")
+T, X, Y, YAW, VX, VY, VYAW = range(len(PATH_FIELDS))
+
+
+def _natural_spline_second_derivatives(t, y):
+    """ Second derivatives at the knots of the natural cubic spline through (t, y), y of shape (M, k). """
+    m = len(t)
+    second = np.zeros_like(y)
+    if m < 3:
+        return second
+    h = np.diff(t)
+    system = np.zeros((m - 2, m - 2))
+    index = np.arange(m - 2)
+    system[index, index] = (h[:-1] + h[1:]) / 3
+    system[index[1:], index[:-1]] = h[1:-1] / 6
+    system[index[:-1], index[1:]] = h[1:-1] / 6
+    slopes = np.diff(y, axis=0) / h[:, None]
+    second[1:-1] = np.linalg.solve(system, slopes[1:] - slopes[:-1])
+    return second
+
+
+def _evaluate_spline(t, y, second, query, out_value, out_derivative):
+    """ Evaluates the spline and its first derivative at `query` into the given output arrays. """
+    i = np.clip(np.searchsorted(t, query, side="right") - 1, 0, len(t) - 2)
+    h = (t[i + 1] - t[i])[:, None]
+    a = (t[i + 1][:, None] - query[:, None]) / h
+    b = 1.0 - a
+    y0, y1, s0, s1 = y[i], y[i + 1], second[i], second[i + 1]
+    np.copyto(out_value, a * y0 + b * y1 + ((a ** 3 - a) * s0 + (b ** 3 - b) * s1) * h ** 2 / 6)
+    np.copyto(out_derivative, (y1 - y0) / h + (-(3 * a ** 2 - 1) * s0 + (3 * b ** 2 - 1) * s1) * h / 6)
+
+
+class TrajectoryGenerator:
+    """
+    TrajectoryGenerator: Produces TrajectoryFollow horizons with NumPy, reusing preallocated buffers between calls.
+
+    The returned array is owned by the generator and overwritten by the next call; copy it to keep it.
+
+    Parameters:
+        horizon (int): Number of path points, 30 for TrajectoryFollow.
+        dt (float): Time between path points in seconds.
+    """
+    def __init__(self, horizon=HORIZON, dt=HORIZON_DT):
+        self.horizon = horizon
+        self.dt = dt
+        self.path = np.zeros((horizon, len(PATH_FIELDS)))
+        self.offsets = np.arange(horizon) * dt
+        self.path[:, T] = self.offsets
+        self._query = np.empty(horizon)
+        self._position = np.empty((horizon, 2))
+        self._velocity = np.empty((horizon, 2))
+        self._yaw = np.empty((horizon, 1))
+        self._yaw_rate = np.empty((horizon, 1))
+
+    def from_waypoints(self, waypoints, speed=0.5, t_start=0.0, yaw=None):
+        """
+        Fits a natural cubic spline through waypoints, time-parameterized by arc length at constant speed, and samples
+        the horizon starting `t_start` seconds along it. Past the last waypoint the robot holds its final pose.
+
+        Parameters:
+            waypoints (array-like): (M, 2) positions x, y, or (M, 3) with an explicit yaw per waypoint.
+            speed (float): Travel speed along the path in m/s.
+            t_start (float): Time along the trajectory the horizon starts at, e.g. the time elapsed since the plan start.
+            yaw (float): Constant yaw for the whole horizon. By default the yaw follows the waypoints' third column,
+                or the direction of travel when there is none.
+
+        Returns:
+            numpy.ndarray: (horizon, 7) path array.
+        """
+        waypoints = np.asarray(waypoints, dtype=float)
+        if waypoints.ndim != 2 or waypoints.shape[0] < 2 or waypoints.shape[1] not in (2, 3):
+            raise ValueError("Waypoints must be an (M, 2) or (M, 3) array with at least 2 points.")
+        if speed <= 0:
+            raise ValueError("Speed must be positive.")
+
+        # Knot times from the distance between waypoints, coincident waypoints are dropped
+        distances = np.hypot(*np.diff(waypoints[:, :2], axis=0).T)
+        keep = np.concatenate(([True], distances > 1e-6))
+        waypoints, distances = waypoints[keep], distances[keep[1:]]
+        if len(waypoints) < 2:
+            raise ValueError("Waypoints must span a non-zero distance.")
+        knots = np.concatenate(([0.0], np.cumsum(distances / speed)))
+
+        query = self._query
+        np.add(self.offsets, t_start, out=query)
+        np.clip(query, 0.0, knots[-1], out=query)
+
+        xy = waypoints[:, :2]
+        _evaluate_spline(knots, xy, _natural_spline_second_derivatives(knots, xy), query, self._position, self._velocity)
+        # Hold still once the end of the trajectory is reached
+        self._velocity[self.offsets + t_start >= knots[-1]] = 0.0
+
+        path = self.path
+        path[:, X:Y + 1] = self._position
+        path[:, VX:VY + 1] = self._velocity
+
+        if yaw is not None:
+            path[:, YAW] = yaw
+            path[:, VYAW] = 0.0
+        elif waypoints.shape[1] == 3:
+            headings = np.unwrap(waypoints[:, 2])[:, None]
+            _evaluate_spline(knots, headings, _natural_spline_second_derivatives(knots, headings), query,
+                             self._yaw, self._yaw_rate)
+            path[:, YAW] = self._yaw[:, 0]
+            path[:, VYAW] = self._yaw_rate[:, 0]
+            path[self.offsets + t_start >= knots[-1], VYAW] = 0.0
+        else:
+            # Direction of travel, the last moving heading is held once stopped
+            moving = np.hypot(self._velocity[:, 0], self._velocity[:, 1]) > 1e-6
+            heading = np.arctan2(self._velocity[:, 1], self._velocity[:, 0])
+            if not moving.any():
+                segment = waypoints[-1, :2] - waypoints[-2, :2]
+                heading[:] = np.arctan2(segment[1], segment[0])
+            else:
+                last = np.maximum.accumulate(np.where(moving, np.arange(self.horizon), 0))
+                heading = heading[last]
+                heading[:np.argmax(moving)] = heading[np.argmax(moving)]
+            path[:, YAW] = np.unwrap(heading)
+            path[:, VYAW] = np.gradient(path[:, YAW], self.dt)
+        return path
+
+    def from_velocity(self, vx, vy=0.0, vyaw=0.0, x=0.0, y=0.0, yaw=0.0):
+        """
+        Integrates a body-frame velocity profile from the pose (x, y, yaw).
+
+        Parameters:
+            vx, vy, vyaw: Body-frame velocities (m/s, m/s, rad/s), scalars or arrays with one value per path point.
+            x, y, yaw: Start pose in the odometry frame.
+
+        Returns:
+            numpy.ndarray: (horizon, 7) path array with world-frame velocities.
+        """
+        path = self.path
+        dt = self.dt
+        path[:, VYAW] = vyaw
+        # Heading at each point, integrating the yaw rate of the previous steps
+        path[0, YAW] = yaw
+        np.cumsum(path[:-1, VYAW] * dt, out=path[1:, YAW])
+        path[1:, YAW] += yaw
+
+        cos, sin = np.cos(path[:, YAW]), np.sin(path[:, YAW])
+        body_vx = np.broadcast_to(vx, self.horizon)
+        body_vy = np.broadcast_to(vy, self.horizon)
+        np.subtract(body_vx * cos, body_vy * sin, out=path[:, VX])
+        np.add(body_vx * sin, body_vy * cos, out=path[:, VY])
+
+        path[0, X], path[0, Y] = x, y
+        np.cumsum(path[:-1, VX] * dt, out=path[1:, X])
+        np.cumsum(path[:-1, VY] * dt, out=path[1:, Y])
+        path[1:, X] += x
+        path[1:, Y] += y
+        return path
+
+
+# JSON object of one path point, formatted with 9 significant digits (exact for the float32 fields of PathPoint_)
+_POINT_TEMPLATE = "{" + ",".join(f'"{field}":%.9g' for field in PATH_FIELDS) + "}"
+_PATH_TEMPLATE = "[" + ",".join([_POINT_TEMPLATE] * HORIZON) + "]"
+
+
+def encode_path(path):
+    """
+    Encodes a (30, 7) path array as the JSON parameter of a TrajectoryFollow request, the same document the robot
+    receives for a list of PathPoint_ but formatted in one step from a precompiled template, without per-point dicts.
+    """
+    if path.shape != (HORIZON, len(PATH_FIELDS)):
+        raise ValueError(f"Path must be a ({HORIZON}, {len(PATH_FIELDS)}) array.")
+    if not np.isfinite(path).all():
+        raise ValueError("Path contains NaN or infinite values.")
+    return _PATH_TEMPLATE % tuple(path.ravel().tolist())
+
+
+def to_path_points(path):
+    """ Converts a (30, 7) path array into the PathPoint_ list expected by SportClient.TrajectoryFollow. """
+    from communicator.cyclonedds.typeRegistry import type_registry
+    PathPoint_ = type_registry.get_type("unitree_go.msg.dds_.PathPoint_")
+    return [PathPoint_(*map(float, row)) for row in path]
+
+
+class TrajectoryStreamer:
+    """
+    TrajectoryStreamer: Receding-horizon streaming to SportClient.TrajectoryFollow.
+
+    update() sends the horizon only when it differs from the one sent last by more than the tolerances, or when the
+    last horizon has been followed for `resend_after` seconds. The last horizon is kept in a preallocated buffer.
+
+    Parameters:
+        sport_client (SportClient): Client used to send the horizon.
+        position_tolerance (float): Position change in meters that counts as a new plan.
+        yaw_tolerance (float): Yaw change in radians that counts as a new plan.
+        resend_after (float): Seconds after which the horizon is sent again even if unchanged.
+    """
+    def __init__(self, sport_client, position_tolerance=0.02, yaw_tolerance=0.02, resend_after=1.0):
+        self.sport_client = sport_client
+        self.position_tolerance = position_tolerance
+        self.yaw_tolerance = yaw_tolerance
+        self.resend_after = resend_after
+        self.last_path = np.zeros((HORIZON, len(PATH_FIELDS)))
+        self.last_sent = None
+        self.sent = 0
+        self.skipped = 0
+
+    def changed(self, path):
+        """ True if `path` has to be sent. """
+        if self.last_sent is None or time.monotonic() - self.last_sent >= self.resend_after:
+            return True
+        if np.max(np.abs(path[:, X:Y + 1] - self.last_path[:, X:Y + 1])) > self.position_tolerance:
+            return True
+        return np.max(np.abs(path[:, YAW] - self.last_path[:, YAW])) > self.yaw_tolerance
+
+    async def update(self, path, ack=False):
+        """ Sends the horizon if the plan changed. Returns True if it was sent. """
+        if not self.changed(path):
+            self.skipped += 1
+            return False
+        np.copyto(self.last_path, path)
+        self.last_sent = time.monotonic()
+        self.sent += 1
+        return await self.sport_client.TrajectoryFollow(path, ack=ack)
@@ -0,0 +1,297 @@
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from algorithms.kinematics import LEGS
+from algorithms.pose_history import PoseHistory
+
+logger = logging.getLogger(__name__)
+
+'''
+Coordinate frames of the Go2 (odom, body, feet, LiDAR, camera) and the transforms between them over time.
+
+A transform of `child` in `parent` is a rotation R (3, 3) and a translation t (3,) mapping points given in the child
+frame to the parent frame: p_parent = R @ p_child + t. Quaternions are (x, y, z, w) as in geometry_msgs Pose_.
+
+- rotation_matrices: (N, 4) quaternions -> (N, 3, 3) rotation matrices.
+- TransformBuffer: Tree of frames, each with one parent. Static edges hold a fixed transform, dynamic edges a
+   PoseHistory, so lookups at any time interpolate between the surrounding samples. Lookups compose the edges up to
+   the common ancestor and are cached per (target, source, stamp); point clouds are transformed in one call, with
+   one stamp for the whole cloud or one per point.
+'''
+
+ODOM_FRAME = "odom"
+BODY_FRAME = "body"
+FOOT_FRAMES = tuple(f"{leg}_foot" for leg in LEGS)
+
+# Static extrinsics of the Go2 in the body frame: (parent, child, translation, quaternion).
+# The L1 LiDAR is mounted upside down at the front, pitched by 2.8782 rad (radar_joint of the Go2 URDF).
+GO2_EXTRINSICS = [
+    (BODY_FRAME, "lidar", (0.28945, 0.0, -0.046825), (0.0, 0.991341, 0.0, 0.131316)),
+]
+
+
+def rotation_matrices(quaternions):
+    """ (N, 4) or (4,) quaternions (x, y, z, w) -> (N, 3, 3) or (3, 3) rotation matrices, normalizing them. """
+    q = np.asarray(quaternions, dtype=float)
+    x, y, z, w = np.moveaxis(q, -1, 0)
+    s = 2.0 / np.einsum("...i,...i->...", q, q)
+    matrices = np.empty(q.shape[:-1] + (3, 3))
+    matrices[..., 0, 0] = 1 - s * (y * y + z * z)
+    matrices[..., 0, 1] = s * (x * y - z * w)
+    matrices[..., 0, 2] = s * (x * z + y * w)
+    matrices[..., 1, 0] = s * (x * y + z * w)
+    matrices[..., 1, 1] = 1 - s * (x * x + z * z)
+    matrices[..., 1, 2] = s * (y * z - x * w)
+    matrices[..., 2, 0] = s * (x * z - y * w)
+    matrices[..., 2, 1] = s * (y * z + x * w)
+    matrices[..., 2, 2] = 1 - s * (x * x + y * y)
+    return matrices
+
+
+class TransformBuffer:
+    """
+    TransformBuffer: Static and time-indexed transforms between named frames.
+
+    Dynamic edges accept samples in time order (see PoseHistory); lookups between their first and last sample are
+    interpolated, lookups outside return None. A cached lookup is only returned while the histories it was computed
+    from still reach back to its stamp (they drop their oldest samples at capacity); the cache is cleared when a
+    static transform changes and is trimmed least recently used first when full.
+
+    Parameters:
+        capacity (int): Samples kept per dynamic edge.
+        cache_size (int): Number of (target, source, stamp) lookups kept.
+        static (list): (parent, child, translation, quaternion) static transforms, e.g. GO2_EXTRINSICS.
+    """
+    def __init__(self, capacity=10000, cache_size=1024, static=GO2_EXTRINSICS):
+        self.capacity = capacity
+        self.cache_size = cache_size
+        self.parents = {}  # child -> parent
+        self.static = {}  # child -> (R, t)
+        self.dynamic = {}  # child -> PoseHistory
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        for parent, child, translation, rotation in static or ():
+            self.set_static(parent, child, translation, rotation)
+
+    def _link(self, parent, child):
+        if parent == child:
+            raise ValueError(f"Frame {child} can't be its own parent.")
+        current = self.parents.get(child)
+        if current is not None and current != parent:
+            raise ValueError(f"Frame {child} already has the parent {current}, not {parent}.")
+        # Walking up from the parent must not reach the child
+        frame = parent
+        while frame is not None:
+            if frame == child:
+                raise ValueError(f"Linking {child} to {parent} would create a cycle.")
+            frame = self.parents.get(frame)
+        self.parents[child] = parent
+
+    # Population
+
+    def set_static(self, parent, child, translation, rotation=(0.0, 0.0, 0.0, 1.0)):
+        """ Sets the fixed transform of `child` in `parent`, e.g. a sensor extrinsic. """
+        with self._lock:
+            if child in self.dynamic:
+                raise ValueError(f"Frame {child} already has a dynamic transform.")
+            self._link(parent, child)
+            self.static[child] = (rotation_matrices(rotation), np.asarray(translation, dtype=float))
+            self.cache.clear()
+
+    def add(self, parent, child, stamp, translation, rotation=(0.0, 0.0, 0.0, 1.0)):
+        """ Adds a sample of the transform of `child` in `parent` at time `stamp` (seconds). """
+        history = self.dynamic.get(child)
+        if history is None:
+            with self._lock:
+                if child in self.static:
+                    raise ValueError(f"Frame {child} already has a static transform.")
+                self._link(parent, child)
+                history = self.dynamic.setdefault(child, PoseHistory(self.capacity))
+        elif self.parents[child] != parent:
+            raise ValueError(f"Frame {child} already has the parent {self.parents[child]}, not {parent}.")
+        return history.append(stamp, translation, rotation)
+
+    def add_sport_state(self, sample, parent=ODOM_FRAME, child=BODY_FRAME):
+        """
+        Adds the body pose (position and IMU orientation) and the foot positions of a SportModeState_ sample.
+        The feet become frames "FR_foot", ... in the body frame, without rotation.
+        """
+        stamp = sample.stamp.sec + sample.stamp.nanosec * 1e-9
+        w, x, y, z = sample.imu_state.quaternion  # IMUState_ order is (w, x, y, z)
+        if not self.add(parent, child, stamp, sample.position, (x, y, z, w)):
+            return False
+        feet = sample.foot_position_body
+        for leg, frame in enumerate(FOOT_FRAMES):
+            self.add(child, frame, stamp, feet[3 * leg:3 * leg + 3])
+        return True
+
+    def add_odometry(self, sample, parent=ODOM_FRAME, child=BODY_FRAME):
+        """ Adds a PoseStamped_ or PoseWithCovarianceStamped_ sample, e.g. of ROBOTODOM, as `child` in `parent`. """
+        stamp = sample.header.stamp.sec + sample.header.stamp.nanosec * 1e-9
+        pose = sample.pose
+        if hasattr(pose, "pose"):
+            pose = pose.pose
+        p, q = pose.position, pose.orientation
+        return self.add(parent, child, stamp, (p.x, p.y, p.z), (q.x, q.y, q.z, q.w))
+
+    # Lookups
+
+    def _chain(self, frame):
+        """ Frames from `frame` up to its root, `frame` first. """
+        chain = [frame]
+        parent = self.parents.get(frame)
+        while parent is not None:
+            chain.append(parent)
+            parent = self.parents.get(parent)
+        return chain
+
+    def _path(self, target, source):
+        """ (edges from source up to the common ancestor, edges from target up to it), as lists of child frames. """
+        source_chain, target_chain = self._chain(source), self._chain(target)
+        common = set(target_chain)
+        for depth, frame in enumerate(source_chain):
+            if frame in common:
+                return source_chain[:depth], target_chain[:target_chain.index(frame)]
+        raise ValueError(f"Frames {source} and {target} are not connected.")
+
+    def _edge(self, child, stamp):
+        """ (R, t) of an edge at `stamp` (None: latest sample), None without data at that time. """
+        transform = self.static.get(child)
+        if transform is not None:
+            return transform
+        history = self.dynamic[child]
+        if stamp is None:
+            latest = history.latest()
+            if latest is None:
+                return None
+            _, position, orientation = latest
+        else:
+            pose = history.pose_at(stamp)
+            if pose is None:
+                return None
+            position, orientation = pose
+        return rotation_matrices(orientation), position
+
+    def _to_root(self, edges, stamp):
+        """ (R, t) mapping the first frame of `edges` to the frame above the last one. """
+        rotation, translation = np.eye(3), np.zeros(3)
+        for child in edges:
+            edge = self._edge(child, stamp)
+            if edge is None:
+                return None
+            edge_rotation, edge_translation = edge
+            rotation, translation = edge_rotation @ rotation, edge_rotation @ translation + edge_translation
+        return rotation, translation
+
+    def lookup(self, target, source, stamp=None):
+        """
+        Transform mapping points from the `source` frame to the `target` frame at time `stamp`.
+
+        Returns:
+            (R (3, 3), t (3,)) such that p_target = R @ p_source + t, or None if a dynamic edge has no data at that
+            time. With stamp None, the latest sample of every dynamic edge is used and nothing is cached.
+        """
+        key = (target, source, stamp)
+        if stamp is not None:
+            with self._lock:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    result, histories = cached
+                    if all(history.times[0] <= stamp for history in histories):
+                        self.cache.move_to_end(key)
+                        self.hits += 1
+                        return result
+                    # A history dropped the samples around the stamp since
+                    del self.cache[key]
+        self.misses += 1
+        if target == source:
+            return np.eye(3), np.zeros(3)
+
+        source_edges, target_edges = self._path(target, source)
+        up = self._to_root(source_edges, stamp)
+        down = self._to_root(target_edges, stamp)
+        if up is None or down is None:
+            return None
+        # Target <- ancestor is the inverse of ancestor <- target
+        down_rotation = down[0].T
+        result = down_rotation @ up[0], down_rotation @ (up[1] - down[1])
+
+        if stamp is not None:
+            histories = [self.dynamic[child] for child in source_edges + target_edges if child in self.dynamic]
+            with self._lock:
+                self.cache[key] = result, histories
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return result
+
+    def _edges_at(self, child, stamps):
+        """ (N, 3, 3) rotations and (N, 3) translations of an edge at many stamps, clamped to its history. """
+        transform = self.static.get(child)
+        if transform is not None:
+            rotation, translation = transform
+            return np.broadcast_to(rotation, (len(stamps), 3, 3)), np.broadcast_to(translation, (len(stamps), 3))
+        poses = self.dynamic[child].poses_at(stamps)
+        if poses is None:
+            return None
+        positions, orientations = poses
+        return rotation_matrices(orientations), positions
+
+    def lookup_many(self, target, source, stamps):
+        """
+        Transforms from `source` to `target` at many times at once; stamps outside a dynamic edge's history use its
+        first or last sample.
+
+        Returns:
+            (R (N, 3, 3), t (N, 3)), or None if a dynamic edge on the path has no samples.
+        """
+        stamps = np.asarray(stamps, dtype=float).reshape(-1)
+        count = len(stamps)
+        if target == source:
+            return np.broadcast_to(np.eye(3), (count, 3, 3)), np.zeros((count, 3))
+
+        source_edges, target_edges = self._path(target, source)
+        chains = []
+        for edges in (source_edges, target_edges):
+            rotation, translation = np.broadcast_to(np.eye(3), (count, 3, 3)), np.zeros((count, 3))
+            for child in edges:
+                edge = self._edges_at(child, stamps)
+                if edge is None:
+                    return None
+                edge_rotation, edge_translation = edge
+                translation = np.einsum("nij,nj->ni", edge_rotation, translation) + edge_translation
+                rotation = edge_rotation @ rotation
+            chains.append((rotation, translation))
+        (up_rotation, up_translation), (down_rotation, down_translation) = chains
+        down_rotation = np.swapaxes(down_rotation, 1, 2)
+        return down_rotation @ up_rotation, np.einsum("nij,nj->ni", down_rotation, up_translation - down_translation)
+
+    def transform_points(self, points, target, source, stamp=None):
+        """
+        Transforms (N, 3) points from `source` to `target`.
+
+        Parameters:
+            stamp: A single time for the whole cloud, None for the latest transforms, or an (N,) array with the time
+                of every point (e.g. to deskew a LiDAR sweep); points sharing a stamp share one lookup.
+
+        Returns:
+            numpy.ndarray: (N, 3) points in `target`, or None when the transform is not available.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if stamp is None or np.ndim(stamp) == 0:
+            transform = self.lookup(target, source, None if stamp is None else float(stamp))
+            if transform is None:
+                return None
+            rotation, translation = transform
+            return points @ rotation.T + translation
+
+        stamps, inverse = np.unique(np.asarray(stamp, dtype=float).reshape(-1), return_inverse=True)
+        if len(inverse) != len(points):
+            raise ValueError("Expected one stamp per point.")
+        transforms = self.lookup_many(target, source, stamps)
+        if transforms is None:
+            return None
+        rotations, translations = transforms
+        return np.einsum("nij,nj->ni", rotations[inverse], points) + translations[inverse]
@@ -0,0 +1,126 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
+import argparse
+import statistics
+import subprocess
+
+'''
+Compares the CycloneDDS configuration profiles (DDS_CONFIG_PROFILES) with a ping-pong between this process and an
+echo process, one participant each, configured with the same profile:
+
+- latency:    round-trip time of small messages, one in flight at a time.
+- throughput: large messages sent back to back, measured until the last echo is back.
+
+Both sides run on this machine by default; start the echo on another host (--echo) to measure a real link.
+Usage: python benchmarks/dds_profiles.py --interface eth0 [--profiles default lossy_wifi] [--domain 42]
+'''
+
+PING_TOPIC = "bench/ping"
+PONG_TOPIC = "bench/pong"
+
+
+def _open(interface, domain_id, profile, read_topic, write_topic):
+    from communicator.cyclonedds.ddsCommunicator import DDSCommunicator
+    from communicator.cyclonedds.typeRegistry import type_registry
+    from cyclonedds.core import WaitSet, ReadCondition, SampleState, ViewState, InstanceState
+    from cyclonedds.sub import DataReader
+    from cyclonedds.pub import DataWriter
+    from cyclonedds.topic import Topic
+
+    String_ = type_registry.get_type("std_msgs.msg.dds_.String_")
+    participant = DDSCommunicator._get_participant(domain_id, interface, profile)
+    reader = DataReader(participant, Topic(participant, read_topic, String_))
+    writer = DataWriter(participant, Topic(participant, write_topic, String_))
+    waitset = WaitSet(participant)
+    waitset.attach(ReadCondition(reader, SampleState.NotRead | ViewState.Any | InstanceState.Any))
+    return String_, reader, writer, waitset
+
+
+def echo(args):
+    from cyclonedds.util import duration
+    String_, reader, writer, waitset = _open(args.interface, args.domain, args.profile, PING_TOPIC, PONG_TOPIC)
+    while True:
+        waitset.wait(duration(seconds=1))
+        for sample in reader.take(N=256):
+            if sample.sample_info.valid_data:
+                writer.write(sample)
+
+
+def run_profile(args, profile):
+    from cyclonedds.util import duration
+    String_, reader, writer, waitset = _open(args.interface, args.domain, profile, PONG_TOPIC, PING_TOPIC)
+
+    def roundtrip(messages):
+        received = 0
+        for message in messages:
+            writer.write(message)
+        deadline = time.monotonic() + 5
+        while received < len(messages) and time.monotonic() < deadline:
+            waitset.wait(duration(milliseconds=100))
+            received += sum(1 for sample in reader.take(N=256) if sample.sample_info.valid_data)
+        return received
+
+    # Wait for the echo to be discovered
+    probe = String_(data="probe")
+    while roundtrip([probe]) == 0:
+        pass
+
+    small = String_(data="x" * args.small)
+    latencies = []
+    for _ in range(args.count):
+        start = time.perf_counter()
+        if roundtrip([small]):
+            latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+
+    large = [String_(data="x" * args.large) for _ in range(args.burst)]
+    start = time.perf_counter()
+    received = roundtrip(large)
+    elapsed = time.perf_counter() - start
+
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    throughput = received * args.large / elapsed / 1e6
+    print(f"{profile:>18}: rtt p50 {p50:8.1f} us, p99 {p99:8.1f} us, "
+          f"throughput {throughput:7.1f} MB/s ({received}/{args.burst} echoed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput of the DDS config profiles")
+    parser.add_argument("--interface", default="lo")
+    parser.add_argument("--domain", type=int, default=42)
+    parser.add_argument("--profiles", nargs="*", default=None)
+    parser.add_argument("--count", type=int, default=1000, help="round trips for the latency test")
+    parser.add_argument("--small", type=int, default=64, help="latency message size in bytes")
+    parser.add_argument("--large", type=int, default=256 * 1024, help="throughput message size in bytes")
+    parser.add_argument("--burst", type=int, default=200, help="messages in the throughput test")
+    parser.add_argument("--echo", action="store_true", help="run the echo side only")
+    parser.add_argument("--profile", default="default", help="profile of the echo side")
+    args = parser.parse_args()
+
+    if args.echo:
+        echo(args)
+        return
+
+    from communicator.constants import DDS_CONFIG_PROFILES
+    for profile in args.profiles or list(DDS_CONFIG_PROFILES):
+        # A fresh process per profile, CycloneDDS reads the configuration once per domain
+        if os.environ.get("DDS_BENCH_PROFILE") == profile:
+            run_profile(args, profile)
+            return
+        echo_process = subprocess.Popen([sys.executable, __file__, "--echo", "--interface", args.interface,
+                                         "--domain", str(args.domain), "--profile", profile])
+        try:
+            subprocess.run([sys.executable, __file__, *sys.argv[1:], "--profiles", profile],
+                           env=dict(os.environ, DDS_BENCH_PROFILE=profile), check=True)
+        finally:
+            echo_process.terminate()
+            echo_process.wait()
+
+
+# Usage example
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import subprocess
+import statistics
+
+'''
+Measures the cold import time of the SDK in a fresh interpreter.
+
+- lazy:  importing the DDS communicator and the sport client, IDL types are loaded on first use only.
+- eager: the same imports followed by resolving every generated IDL type, which is what importing
+         communicator.idl used to cost before the types were loaded through the TypeRegistry.
+'''
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUNS = 10
+
+LAZY = """
+import communicator.cyclonedds.ddsCommunicator
+import clients.sport_client
+"""
+
+EAGER = LAZY + """
+import importlib
+for package in ("builtin_interfaces", "geometry_msgs", "std_msgs", "unitree_api", "unitree_go"):
+    module = importlib.import_module(f"communicator.idl.{package}.msg.dds_")
+    for name in module.__all__:
+        getattr(module, name)
+"""
+
+TEMPLATE = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+loaded = sum(1 for name in sys.modules if name.startswith("communicator.idl."))
+print(elapsed, loaded)
+"""
+
+
+def measure(code):
+    timings = []
+    loaded = 0
+    for _ in range(RUNS):
+        output = subprocess.check_output([sys.executable, "-c", TEMPLATE.format(code=code)], cwd=PROJECT_ROOT, text=True)
+        elapsed, loaded = output.split()[-2:]
+        timings.append(float(elapsed) * 1000)
+    return statistics.median(timings), min(timings), int(loaded)
+
+
+def main():
+    for name, code in (("lazy", LAZY), ("eager", EAGER)):
+        median, best, loaded = measure(code)
+        print(f"{name:>6}: median {median:7.1f} ms, best {best:7.1f} ms, {loaded} communicator.idl modules loaded")
+
+
+# Usage example
+if __name__ == "__main__":
+    main()
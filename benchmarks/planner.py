@@ -0,0 +1,83 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
+import argparse
+import numpy as np
+
+'''
+Replanning cost of the HeightMapPlanner on a synthetic height map (rolling ground, boxes, a wall with a gap):
+
+- cost cold:  cost map of a new map, every tile computed.
+- cost warm:  the same map again, every tile served from the cache.
+- cost moved: the map shifted under the robot by a few cells, only tiles with changed surroundings recomputed.
+- replan:     A* and the 30-point TrajectoryFollow horizon, worst of several start/goal pairs.
+
+Usage: python benchmarks/planner.py [--size 10] [--resolution 0.05] [--plan-resolution 0.1]
+'''
+
+
+def make_heights(cells, resolution, rng):
+    y, x = np.mgrid[0:cells, 0:cells] * resolution
+    heights = (0.03 * np.sin(x * 0.8) * np.cos(y * 0.6)).astype(np.float32)
+    for _ in range(12):
+        row, col = rng.integers(0, cells - 20, 2)
+        heights[row:row + rng.integers(5, 20), col:col + rng.integers(5, 20)] = rng.uniform(0.2, 0.6)
+    heights[:, cells // 2:cells // 2 + 3] = 0.5
+    heights[cells // 2 - 10:cells // 2 + 10, cells // 2:cells // 2 + 3] = 0.0
+    return heights
+
+
+def best_of(function, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Height map planner benchmark")
+    parser.add_argument("--size", type=float, default=10.0, help="map edge in meters")
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--plan-resolution", type=float, default=0.1)
+    args = parser.parse_args()
+
+    from algorithms.planner import HeightMapPlanner
+    rng = np.random.default_rng(0)
+    cells = int(args.size / args.resolution)
+    half = args.size / 2
+    heights = make_heights(cells, args.resolution, rng)
+    origin = (-half, -half)
+
+    def cold():
+        HeightMapPlanner(args.plan_resolution).update_map(heights, origin, args.resolution)
+
+    planner = HeightMapPlanner(args.plan_resolution)
+    planner.update_map(heights, origin, args.resolution)
+    moved = np.roll(heights, -4, axis=1)
+    moved_origin = (origin[0] + 4 * args.resolution, origin[1])
+
+    def shift():
+        planner.update_map(heights, origin, args.resolution)
+        planner.update_map(moved, moved_origin, args.resolution)
+
+    results = {
+        "cost cold": best_of(cold, repeat=3),
+        "cost warm": best_of(lambda: planner.update_map(heights, origin, args.resolution)),
+        "cost moved": best_of(shift) - best_of(lambda: planner.update_map(heights, origin, args.resolution)),
+    }
+    planner.update_map(heights, origin, args.resolution)
+    margin = half * 0.9
+    pairs = [((-margin, -margin), (margin, margin)), ((-margin, 0.0), (margin, 0.0)),
+             ((margin, -margin), (-margin, margin)), ((0.0, -margin), (0.0, margin))]
+    results["replan"] = max(best_of(lambda: planner.plan_trajectory(start, goal)) for start, goal in pairs)
+    summary = ", ".join(f"{name} {value:7.2f} ms" for name, value in results.items())
+    print(f"{cells}x{cells} cells at {args.resolution} m: {summary}")
+
+
+# Usage example
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
+import asyncio
+import argparse
+import statistics
+import threading
+from types import SimpleNamespace
+
+'''
+Reaction time of the SafetyMonitor: a tilt violation is injected into the state callback while the event loop is
+busy-waiting (like a slow callback), and the emergency request is read back by a DataReader on the sport request topic.
+
+- monitor:  violation -> write completed, as measured by the monitor itself.
+- delivery: violation -> request received by the local reader.
+
+Runs on the loopback interface and a domain of its own by default; never run it on the domain of a real robot,
+every iteration sends a Damp.
+Usage: python benchmarks/safety_monitor.py [--count 200] [--switch-interval 0.0005] [--no-load]
+'''
+
+
+def percentiles(values):
+    values = sorted(values)
+    return statistics.median(values), values[int(len(values) * 0.99) - 1], values[-1]
+
+
+async def busy_loop(stop):
+    """ Keeps the event loop thread busy in Python code, like a slow callback. """
+    while not stop.is_set():
+        deadline = time.time() + 0.05
+        while time.time() < deadline:
+            pass
+        await asyncio.sleep(0)
+
+
+async def run(args):
+    from communicator.cyclonedds.ddsCommunicator import DDSCommunicator
+    from communicator.cyclonedds.typeRegistry import type_registry, REQUEST_TYPENAME
+    from clients.safety_monitor import SafetyMonitor
+    from cyclonedds.core import WaitSet, ReadCondition, SampleState, ViewState, InstanceState
+    from cyclonedds.sub import DataReader
+    from cyclonedds.topic import Topic
+    from cyclonedds.util import duration
+
+    communicator = DDSCommunicator(interface=args.interface, domain_id=args.domain)
+    topic = communicator.get_topic_by_name("SPORT_MOD")
+    reader = DataReader(communicator.participant, Topic(communicator.participant, topic,
+                                                        type_registry.get_type(REQUEST_TYPENAME)))
+    waitset = WaitSet(communicator.participant)
+    waitset.attach(ReadCondition(reader, SampleState.NotRead | ViewState.Any | InstanceState.Any))
+
+    # Only the state callback is used, the samples are injected below
+    monitor = SafetyMonitor(communicator, max_tilt=0.5, rate=args.rate, switch_interval=args.switch_interval,
+                            repeat=1)
+    monitor.start()
+
+    stop = threading.Event()
+    load = None if args.no_load else asyncio.ensure_future(busy_loop(stop))
+    level = SimpleNamespace(imu_state=SimpleNamespace(rpy=(0.0, 0.0, 0.0)), position=(0.0, 0.0, 0.0))
+    tilted = SimpleNamespace(imu_state=SimpleNamespace(rpy=(1.0, 0.0, 0.0)), position=(0.0, 0.0, 0.0))
+
+    def measure():
+        delivery = []
+        for _ in range(args.count):
+            monitor.reset()
+            monitor._state_callback(level)
+            time.sleep(0.002)
+            start = time.monotonic()
+            monitor._state_callback(tilted)
+            received = None
+            while received is None and time.monotonic() - start < 1.0:
+                waitset.wait(duration(milliseconds=100))
+                if any(sample.sample_info.valid_data for sample in reader.take(N=16)):
+                    received = time.monotonic()
+            if received is not None:
+                delivery.append((received - start) * 1e3)
+        return delivery
+
+    delivery = await asyncio.get_running_loop().run_in_executor(None, measure)
+    stop.set()
+    if load is not None:
+        await load
+    switch_interval = sys.getswitchinterval()
+    monitor.stop()
+
+    reactions = [value * 1e3 for value in monitor.reaction_times]
+    for name, values in (("monitor", reactions), ("delivery", delivery)):
+        if values:
+            p50, p99, worst = percentiles(values)
+            print(f"{name:>9}: p50 {p50:7.3f} ms, p99 {p99:7.3f} ms, max {worst:7.3f} ms ({len(values)} trips)")
+    print(f"event loop load: {'off' if args.no_load else 'busy-wait'}, switch interval {switch_interval * 1e3:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reaction time of the safety monitor")
+    parser.add_argument("--interface", default="lo")
+    parser.add_argument("--domain", type=int, default=43)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=500.0)
+    parser.add_argument("--switch-interval", type=float, default=None, help="sys.setswitchinterval() in seconds")
+    parser.add_argument("--no-load", action="store_true", help="don't keep the event loop busy")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+# Usage example
+if __name__ == "__main__":
+    main()
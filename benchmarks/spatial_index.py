@@ -0,0 +1,76 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
+import argparse
+import numpy as np
+
+'''
+KDTree build and bulk query cost on synthetic LiDAR-like clouds (points on walls and obstacles around the robot,
+within 10 m, between 0 and 2 m height):
+
+- build:   constructing the tree, what ObstacleIndex does in the background for every frame.
+- knn:     k nearest neighbours of a batch of query points.
+- radius:  points within a radius of a batch of query points.
+- sectors: ObstacleIndex.sector_distances, the per-Move-update nearest obstacle per sector.
+- brute:   the same k nearest neighbours by brute force, for reference (skipped above 100k points).
+
+Usage: python benchmarks/spatial_index.py [--sizes 50000 100000 200000] [--queries 1000] [--k 4]
+'''
+
+
+def make_cloud(count, rng):
+    angles = rng.uniform(0, 2 * np.pi, count)
+    ranges = rng.choice([2.0, 4.5, 7.0, 9.5], count) + rng.normal(0, 0.3, count)
+    heights = rng.uniform(0, 2.0, count)
+    return np.stack((ranges * np.cos(angles), ranges * np.sin(angles), heights), axis=1)
+
+
+def best_of(function, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KDTree benchmark")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[50000, 100000, 200000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--radius", type=float, default=0.5)
+    parser.add_argument("--leaf-size", type=int, default=64)
+    args = parser.parse_args()
+
+    from algorithms.spatial_index import KDTree, ObstacleIndex
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        cloud = make_cloud(size, rng)
+        queries = make_cloud(args.queries, rng)
+        tree = KDTree(cloud, args.leaf_size)
+        index = ObstacleIndex(args.leaf_size)
+        index.update(cloud)
+
+        results = {
+            "build": best_of(lambda: KDTree(cloud, args.leaf_size), repeat=3),
+            "knn": best_of(lambda: tree.query(queries, args.k)),
+            "radius": best_of(lambda: tree.query_radius(queries, args.radius)),
+            "sectors": best_of(lambda: index.sector_distances((0.0, 0.0, 0.3), 0.0, 8, 3.0)),
+        }
+        if size <= 100000:
+            def brute():
+                for start in range(0, len(queries), 64):
+                    block = queries[start:start + 64]
+                    distances = np.einsum("ijk,ijk->ij", cloud[None] - block[:, None], cloud[None] - block[:, None])
+                    np.argpartition(distances, args.k - 1, axis=1)
+            results["brute"] = best_of(brute, repeat=1)
+        summary = ", ".join(f"{name} {value:8.2f} ms" for name, value in results.items())
+        print(f"{size:>7} points, {args.queries} queries: {summary}")
+
+
+# Usage example
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import json
+import timeit
+import argparse
+
+'''
+Cost of producing the TrajectoryFollow request parameter for one 30-point horizon, per call:
+
+- legacy:  PathPoint_ dicts, json.dumps, then json.dumps again on the resulting string in the communicator.
+- dicts:   PathPoint_ dicts and a single json.dumps (what a list of PathPoint_ costs now).
+- array:   encode_path on the (30, 7) array produced by the TrajectoryGenerator.
+- plan:    TrajectoryGenerator.from_waypoints followed by encode_path, a full replanning step.
+
+PathPoint_ objects are emulated by plain objects when cyclonedds is not installed, the encoding cost is the same.
+Usage: python benchmarks/trajectory_encoding.py [--number 20000]
+'''
+
+
+class _PathPoint:
+    def __init__(self, *values):
+        from algorithms.trajectory import PATH_FIELDS
+        self.__dict__.update(zip(PATH_FIELDS, values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrajectoryFollow parameter encoding cost")
+    parser.add_argument("--number", type=int, default=20000, help="encodings per measurement")
+    args = parser.parse_args()
+
+    from algorithms.trajectory import TrajectoryGenerator, encode_path
+    generator = TrajectoryGenerator()
+    waypoints = [[0.0, 0.0], [1.0, 0.2], [2.0, 1.0], [3.0, 1.0]]
+    path = generator.from_waypoints(waypoints, speed=0.5).copy()
+    try:
+        from algorithms.trajectory import to_path_points
+        points = to_path_points(path)
+    except ImportError:
+        points = [_PathPoint(*map(float, row)) for row in path]
+
+    # The encodings must describe the same path
+    decoded = json.loads(encode_path(path))
+    assert all(abs(a[k] - b[k]) < 1e-6 for a, b in zip(decoded, json.loads(json.dumps([p.__dict__ for p in points])))
+               for k in a)
+
+    cases = {
+        "legacy": lambda: json.dumps(json.dumps([point.__dict__ for point in points]), ensure_ascii=False),
+        "dicts": lambda: json.dumps([point.__dict__ for point in points]),
+        "array": lambda: encode_path(path),
+        "plan": lambda: encode_path(generator.from_waypoints(waypoints, speed=0.5)),
+    }
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=args.number, repeat=5)) / args.number
+        print(f"{name:>8}: {best * 1e6:8.2f} us per horizon ({1 / best:10.0f} Hz)")
+
+
+# Usage example
+if __name__ == "__main__":
+    main()
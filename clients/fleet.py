@@ -0,0 +1,244 @@
+import os
+import asyncio
+import logging
+import itertools
+import multiprocessing
+from communicator.sharedState import SharedStateSegment, SPORT_MODE_STATE_LAYOUT
+
+logger = logging.getLogger(__name__)
+
+'''
+The fleet runner spreads robot connections over worker processes, so decoding the state streams of many robots
+is not bound to the GIL of a single interpreter.
+
+- FleetRunner: Starts one worker process per CPU core (at most one per robot) and assigns the robots round-robin.
+   Commands are forwarded to the owning worker over a pipe and awaited in the parent; the latest SportModeState_
+   of every robot is published by the workers into one shared memory segment the parent reads without IPC.
+- RobotProxy: Per-robot view on the fleet with the same client attributes as clients.robot.Robot.
+'''
+
+class FleetRunner:
+    """
+    FleetRunner: Drives a fleet of robots from worker processes behind a single asyncio API.
+
+    Parameters:
+        robots (list of dict): One entry per robot with the keys 'name', 'interface', 'domain_id'
+            and optionally 'profile' (see DDS_CONFIG_PROFILES).
+        workers (int): Number of worker processes, defaults to the number of CPU cores.
+        frequency (str): SportModeState_ stream to publish into shared memory ('lf', 'mf' or anything else for full rate).
+    """
+    def __init__(self, robots, workers=None, frequency='lf'):
+        names = [robot['name'] for robot in robots]
+        if len(set(names)) != len(names):
+            raise ValueError("Robot names must be unique within a fleet.")
+
+        self.robots = robots
+        self.frequency = frequency
+        self.num_workers = max(1, min(workers or os.cpu_count() or 1, len(robots)))
+        self.slots = {name: slot for slot, name in enumerate(names)}
+
+        self.state = None
+        self._processes = []
+        self._connections = {}  # worker index -> parent end of the pipe
+        self._owners = {}       # robot name -> worker index
+        self._pending = {}      # call id -> (worker index, future)
+        self._call_ids = itertools.count()
+        self._loop = None
+
+    async def start(self):
+        """ Creates the shared state segment and spawns the workers. """
+        self._loop = asyncio.get_running_loop()
+        self.state = SharedStateSegment(SPORT_MODE_STATE_LAYOUT, slots=len(self.robots), create=True)
+
+        # Spawn instead of fork: the workers must not inherit DDS threads or sockets of the parent
+        context = multiprocessing.get_context("spawn")
+        shards = [self.robots[index::self.num_workers] for index in range(self.num_workers)]
+        for index, shard in enumerate(shards):
+            parent_conn, child_conn = context.Pipe()
+            assignments = [dict(robot, slot=self.slots[robot['name']]) for robot in shard]
+            process = context.Process(target=_worker_main, args=(child_conn, assignments, self.state.name, self.frequency),
+                                      name=f"fleet-worker-{index}", daemon=True)
+            process.start()
+            child_conn.close()
+
+            self._processes.append(process)
+            self._connections[index] = parent_conn
+            for robot in shard:
+                self._owners[robot['name']] = index
+            self._loop.add_reader(parent_conn.fileno(), self._on_readable, index, parent_conn)
+
+        logger.info(f"Fleet of {len(self.robots)} robots started on {self.num_workers} worker processes")
+
+    async def stop(self):
+        """ Stops the workers and releases the shared state segment. """
+        for index, conn in self._connections.items():
+            self._loop.remove_reader(conn.fileno())
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            await self._loop.run_in_executor(None, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._connections.values():
+            conn.close()
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Fleet stopped"))
+
+        self._processes.clear()
+        self._connections.clear()
+        self._pending.clear()
+        if self.state is not None:
+            self.state.close()
+            self.state = None
+
+    async def call(self, robot, client, method, *args, timeout=None, **kwargs):
+        """
+        Invokes a client method on a robot inside its worker and returns the result.
+        Example: await fleet.call("dog1", "sport", "Move", {'x': 0.3})
+
+        `timeout` (seconds) bounds the wait for the result (asyncio.TimeoutError), it is not passed to the method.
+        Raises ConnectionError when the worker of the robot is gone.
+        """
+        worker = self._owners[robot]
+        conn = self._connections.get(worker)
+        if conn is None:
+            raise ConnectionError(f"The fleet worker of {robot} is not running")
+        call_id = next(self._call_ids)
+        future = self._loop.create_future()
+        self._pending[call_id] = (worker, future)
+        try:
+            conn.send((call_id, robot, client, method, args, kwargs))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(call_id, None)
+
+    def robot(self, name):
+        """ Returns a proxy exposing the clients of one robot, e.g. await fleet.robot("dog1").sport.Hello() """
+        if name not in self._owners:
+            raise KeyError(f"Unknown robot {name}")
+        return RobotProxy(self, name)
+
+    def get_state(self, name):
+        """
+        Returns (sequence, monotonic write time in ns, dict) with the latest SportModeState_ of a robot,
+        or None if no state was received yet. Reads the shared memory segment directly.
+        """
+        return self.state.read(self.slots[name])
+
+    def _on_readable(self, worker, conn):
+        try:
+            while conn.poll():
+                call_id, ok, result = conn.recv()
+                _, future = self._pending.pop(call_id, (None, None))
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(result))
+        except (EOFError, OSError):
+            logger.error(f"Fleet worker {worker} connection closed unexpectedly")
+            self._worker_lost(worker, conn)
+
+    def _worker_lost(self, worker, conn):
+        """ Forgets a dead worker and fails the calls waiting on it. """
+        self._loop.remove_reader(conn.fileno())
+        self._connections.pop(worker, None)
+        conn.close()
+        for call_id, (owner, future) in list(self._pending.items()):
+            if owner == worker:
+                del self._pending[call_id]
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Fleet worker {worker} exited"))
+
+
+class RobotProxy:
+    """
+    RobotProxy: Forwards client method calls of one robot to the worker owning it.
+    """
+    def __init__(self, fleet, name):
+        self._fleet = fleet
+        self.name = name
+
+    def __getattr__(self, client):
+        return _ClientProxy(self._fleet, self.name, client)
+
+    def get_state(self):
+        return self._fleet.get_state(self.name)
+
+
+class _ClientProxy:
+    def __init__(self, fleet, robot, client):
+        self._fleet = fleet
+        self._robot = robot
+        self._client = client
+
+    def __getattr__(self, method):
+        async def call(*args, **kwargs):
+            return await self._fleet.call(self._robot, self._client, method, *args, **kwargs)
+        return call
+
+
+def _worker_main(conn, assignments, shm_name, frequency):
+    """ Entry point of a worker process. """
+    try:
+        asyncio.run(_worker_loop(conn, assignments, shm_name, frequency))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_loop(conn, assignments, shm_name, frequency):
+    # Imported in the worker only, the parent does not need a DDS stack
+    from clients.robot import Robot
+
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    # Workers share the resource tracker of the parent, which owns the segment
+    state = SharedStateSegment(SPORT_MODE_STATE_LAYOUT, name=shm_name, track=True)
+    robots = {}
+
+    for assignment in assignments:
+        robot = Robot.dds(interface=assignment['interface'], domain_id=assignment['domain_id'], name=assignment['name'],
+                          profile=assignment.get('profile', "default"))
+        robots[robot.name] = robot
+
+        async def publish_state(sample, slot=assignment['slot']):
+            state.write(slot, sample)
+
+        robot.sport_state(frequency).add_callback(publish_state)
+
+    async def execute(call_id, robot, client, method, args, kwargs):
+        try:
+            result = await getattr(getattr(robots[robot], client), method)(*args, **kwargs)
+            reply = (call_id, True, result)
+        except Exception as e:
+            reply = (call_id, False, f"{robot}.{client}.{method} failed: {e!r}")
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # e.g. results that can't be pickled
+            conn.send((call_id, False, f"{robot}.{client}.{method} returned an unsendable result: {e!r}"))
+
+    def on_readable():
+        try:
+            while conn.poll():
+                message = conn.recv()
+                if message is None:
+                    stopped.set_result(None)
+                    return
+                loop.create_task(execute(*message))
+        except (EOFError, OSError):
+            # Parent went away
+            if not stopped.done():
+                stopped.set_result(None)
+
+    loop.add_reader(conn.fileno(), on_readable)
+    try:
+        await stopped
+    finally:
+        loop.remove_reader(conn.fileno())
+        state.close()
+        conn.close()
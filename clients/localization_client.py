@@ -0,0 +1,100 @@
+import logging
+from algorithms.pose_history import PoseHistory, yaw_of
+
+logger = logging.getLogger(__name__)
+
+'''
+The localization_client keeps the odometry of the Go2 in memory for navigation code.
+
+- LocalizationClient: Subscribes to ROBOTODOM (rt/utlidar/robot_pose) and appends every pose to a PoseHistory;
+   "pose at time t" is answered from the arrays without touching the messages.
+
+The SLAM topics (SLAM_ODOMETRY, SLAM_ADD_NODE/EDGE, QUERY_RESULT_NODE/EDGE) have no message type in DDS_TOPIC_TYPES
+and are not consumed.
+'''
+
+# Topic names of the odometry streams with a registered message type, each gets its own PoseHistory
+ODOMETRY_TOPICS = ("ROBOTODOM",)
+
+
+def stamp_of(sample):
+    """ Stamp in seconds of a message with a std_msgs Header_. """
+    stamp = sample.header.stamp
+    return stamp.sec + stamp.nanosec * 1e-9
+
+
+def pose_of(sample):
+    """ (position, orientation) tuples of PoseStamped_, PoseWithCovarianceStamped_ or odometry-like messages. """
+    pose = sample.pose
+    # PoseWithCovariance_ wraps the Pose_
+    if hasattr(pose, "pose"):
+        pose = pose.pose
+    p, q = pose.position, pose.orientation
+    return (p.x, p.y, p.z), (q.x, q.y, q.z, q.w)
+
+
+class LocalizationClient:
+    """
+    LocalizationClient: Maintains the odometry history of a robot.
+
+    Parameters:
+        communicator: Communicator of the robot.
+        capacity (int): Poses kept per odometry topic, e.g. 100000 is more than 1.5 hours at 15 Hz.
+    """
+    def __init__(self, communicator, capacity=100000):
+        self.communicator = communicator
+        self.histories = {name: PoseHistory(capacity) for name in ODOMETRY_TOPICS}
+        self.subscriptions = {}  # topic -> callback
+
+    @property
+    def odometry(self):
+        """ PoseHistory of ROBOTODOM. """
+        return self.histories["ROBOTODOM"]
+
+    async def start(self):
+        """ Subscribes to the odometry topics. """
+        for name in ODOMETRY_TOPICS:
+            callback = self._odometry_callback(name)
+            topic = self.communicator.subscribe_by_name(name, callback)
+            self.subscriptions[topic] = callback
+            logger.info(f"Subscribed to {topic}")
+
+    async def stop(self):
+        for topic, callback in self.subscriptions.items():
+            self.communicator.unsubscribe(topic, callback)
+        self.subscriptions.clear()
+
+    def _odometry_callback(self, name):
+        history = self.histories[name]
+
+        async def on_odometry(sample):
+            position, orientation = pose_of(sample)
+            history.append(stamp_of(sample), position, orientation)
+        return on_odometry
+
+    def pose_at(self, stamp, source="ROBOTODOM", extrapolate=False):
+        """
+        Pose at robot time `stamp` (seconds), interpolated from the odometry of `source`.
+        Returns (position, orientation) or None outside the recorded span, see PoseHistory.pose_at.
+        """
+        return self.histories[source].pose_at(stamp, extrapolate)
+
+    def pose_at_host_time(self, host_time, source="ROBOTODOM", extrapolate=False):
+        """ Pose at a host time.monotonic() value, requires the communicator's latency monitor for the clock offset. """
+        monitor = getattr(self.communicator, "latency_monitor", None)
+        clock = monitor.clocks.get(self.communicator.get_topic_by_name(source)) if monitor is not None else None
+        if clock is None or not clock.synchronized:
+            raise RuntimeError("Host time lookups need a synchronized clock, call enable_latency_monitor() first.")
+        return self.pose_at(clock.to_robot(host_time), source, extrapolate)
+
+    def poses_at(self, stamps, source="ROBOTODOM"):
+        """ Poses at many robot times, (positions (N, 3), orientations (N, 4)), see PoseHistory.poses_at. """
+        return self.histories[source].poses_at(stamps)
+
+    def pose2d_at(self, stamp, source="ROBOTODOM"):
+        """ (x, y, yaw) at robot time `stamp`, or None outside the recorded span. """
+        pose = self.pose_at(stamp, source)
+        if pose is None:
+            return None
+        position, orientation = pose
+        return float(position[0]), float(position[1]), float(yaw_of(orientation))
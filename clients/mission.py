@@ -0,0 +1,255 @@
+import json
+import time
+import asyncio
+import logging
+from communicator.constants import SPORT_CLIENT_API_ID
+from clients.sport_client import SportState, move_parameters
+
+logger = logging.getLogger(__name__)
+
+'''
+The mission module runs choreographies of sport commands as a declarative sequence of steps.
+
+- Command: A SportClient command by name (e.g. "Hello", "Dance1"), sent once its `when` condition on SportModeState_
+   holds and finished once its `until` condition holds.
+- MoveSegment: Move at constant speed for a duration, re-sent at a fixed rate, optionally followed by a stop.
+- WaitState: Waits for a condition on SportModeState_.
+- Pause: Waits for a fixed time.
+- Mission: Encodes every request before the start, then runs the steps in order. Conditions are awaited with
+   SportState.wait_for, so the next request is written as soon as the sample satisfying its condition is processed,
+   and the time of every step is recorded.
+
+    mission = Mission(communicator, [
+        Command("StandUp", until=lambda s: s.body_height > 0.3),
+        Command("BalanceStand"),
+        Command("Hello"),
+        Pause(2.0),
+        MoveSegment(x=0.3, duration=2.0),
+        Command("Dance1", when=lambda s: abs(s.velocity[0]) < 0.05),
+    ])
+    await mission.prepare()
+    records = await mission.run()
+'''
+
+# Commands sent with priority 1, as SportClient does
+PRIORITY_COMMANDS = ("Damp", "StopMove")
+
+
+class Command:
+    """
+    Command: One SportClient command.
+
+    Parameters:
+        name (str): Key of SPORT_CLIENT_API_ID, e.g. "Hello".
+        parameter: JSON-serializable parameter of the request (e.g. {"data": True} for Pose), None for none.
+        when: Predicate on SportModeState_ to hold before sending, None to send right away.
+        until: Predicate on SportModeState_ marking the end of the step, None to go on after sending.
+        timeout (float): Maximum seconds for each of the two waits.
+    """
+    def __init__(self, name, parameter=None, when=None, until=None, timeout=10.0):
+        if name not in SPORT_CLIENT_API_ID:
+            raise ValueError(f"Unknown sport command {name}")
+        self.name = name
+        self.parameter = parameter
+        self.when = when
+        self.until = until
+        self.timeout = timeout
+
+    def requests(self):
+        return {"send": (self.name, self.parameter)}
+
+
+class MoveSegment:
+    """
+    MoveSegment: Moves with body frame speeds x, y (m/s) and z (rad/s) for `duration` seconds.
+
+    Parameters:
+        rate (float): Move requests per second while the segment runs.
+        stop (bool): Send a zero speed Move at the end, otherwise the next step takes over from the current speed.
+        when: Predicate on SportModeState_ to hold before starting, None to start right away.
+    """
+    def __init__(self, x=0.0, y=0.0, z=0.0, duration=1.0, rate=10.0, stop=True, when=None, timeout=10.0):
+        if duration <= 0 or rate <= 0:
+            raise ValueError("duration and rate must be positive.")
+        self.name = "Move"
+        self.parameter = move_parameters({"x": x, "y": y, "z": z})
+        self.duration = duration
+        self.rate = rate
+        self.stop = stop
+        self.when = when
+        self.until = None
+        self.timeout = timeout
+
+    def requests(self):
+        requests = {"send": ("Move", self.parameter)}
+        if self.stop:
+            requests["stop"] = ("Move", move_parameters({}))
+        return requests
+
+
+class WaitState:
+    """ WaitState: Waits until `until` holds on SportModeState_, for at most `timeout` seconds. """
+    def __init__(self, until, timeout=10.0, name="wait"):
+        self.name = name
+        self.when = None
+        self.until = until
+        self.timeout = timeout
+
+    def requests(self):
+        return {}
+
+
+class Pause:
+    """ Pause: Waits for `seconds`. """
+    def __init__(self, seconds, name="pause"):
+        self.name = name
+        self.seconds = seconds
+        self.when = None
+        self.until = None
+
+    def requests(self):
+        return {}
+
+
+class _QueuedRequest:
+    """ Fallback for communicators without prepare_request: the encoded request goes through publishReq. """
+    def __init__(self, communicator, topic, request_data):
+        self.communicator = communicator
+        self.topic = topic
+        self.request_data = request_data
+
+    def send(self):
+        asyncio.ensure_future(self.communicator.publishReq(self.topic, self.request_data))
+        return time.monotonic()
+
+
+class Mission:
+    """
+    Mission: Runs a sequence of steps, see the module description.
+
+    All requests are built in prepare(): parameters are encoded to JSON once and, with a DDS communicator, turned into
+    PreparedRequest objects sharing one DataWriter, so sending a step is a single write. Each send still carries a
+    request id of its own, also for repeated steps, Move re-sends and later runs. Requests are sent without reply;
+    step completion is observed on SportModeState_ through the `until` conditions.
+
+    Parameters:
+        communicator: Communicator of the robot.
+        steps (list): Command, MoveSegment, WaitState and Pause steps.
+        frequency (str): SportState stream the conditions are evaluated on ('lf', 'mf' or 'hf').
+        stop_on_abort (bool): Send StopMove when a wait times out.
+    """
+    def __init__(self, communicator, steps, frequency='lf', stop_on_abort=True):
+        self.communicator = communicator
+        self.steps = list(steps)
+        self.state = SportState(communicator, frequency)
+        self.stop_on_abort = stop_on_abort
+        self.topic = communicator.get_topic_by_name("SPORT_MOD")
+        self.prepared = None  # One dict of requests per step
+        self.abort_request = None
+        self.records = []
+
+    def _request_data(self, name, parameter):
+        data = {"api_id": SPORT_CLIENT_API_ID[name], "priority": 1 if name in PRIORITY_COMMANDS else 0, "noreply": True}
+        if parameter is not None:
+            data["parameter"] = json.dumps(parameter)
+        return data
+
+    async def prepare(self):
+        """ Encodes every request of the mission; creating the DDS writer blocks, so it runs in an executor. """
+        await asyncio.get_running_loop().run_in_executor(None, self._prepare)
+
+    def _prepare(self):
+        prepare_request = getattr(self.communicator, "prepare_request", None)
+        cache = {}
+        writer = None
+
+        def build(name, parameter):
+            nonlocal writer
+            data = self._request_data(name, parameter)
+            key = json.dumps(data, sort_keys=True)
+            if key not in cache:
+                try:
+                    request = prepare_request(self.topic, data, writer=writer) if prepare_request else None
+                except NotImplementedError:
+                    request = None
+                if request is None:
+                    request = _QueuedRequest(self.communicator, self.topic, data)
+                else:
+                    writer = request.writer
+                cache[key] = request
+            return cache[key]
+
+        self.prepared = [{kind: build(*request) for kind, request in step.requests().items()} for step in self.steps]
+        self.abort_request = build("StopMove", None)
+        logger.info(f"Mission prepared: {len(self.steps)} steps, {len(cache)} distinct requests")
+
+    async def _wait(self, predicate, timeout):
+        if predicate is None:
+            return True
+        return await self.state.wait_for(predicate, timeout) is not None
+
+    async def run(self):
+        """
+        Runs the steps in order and returns one record per step run: name, status ("done" or "timeout"), and the
+        times (time.monotonic) the step started, its condition held, its request was written and it ended, plus the
+        total duration. A timeout ends the mission.
+        """
+        if self.prepared is None:
+            await self.prepare()
+        self.records = []
+        mission_start = time.monotonic()
+        for step, requests in zip(self.steps, self.prepared):
+            record = {"name": step.name, "status": "done", "start": time.monotonic(), "ready": None, "sent": None,
+                      "end": None}
+            self.records.append(record)
+
+            if not await self._wait(step.when, getattr(step, "timeout", None)):
+                record["status"] = "timeout"
+            else:
+                record["ready"] = time.monotonic()
+                if isinstance(step, Pause):
+                    await asyncio.sleep(step.seconds)
+                elif isinstance(step, MoveSegment):
+                    record["sent"] = await self._move(step, requests)
+                elif "send" in requests:
+                    record["sent"] = requests["send"].send()
+                if not await self._wait(step.until, getattr(step, "timeout", None)):
+                    record["status"] = "timeout"
+
+            record["end"] = time.monotonic()
+            record["duration"] = record["end"] - record["start"]
+            if record["status"] == "timeout":
+                logger.error(f"Mission step {len(self.records)} ({step.name}) timed out, aborting")
+                if self.stop_on_abort:
+                    self.abort_request.send()
+                break
+            logger.info(f"Mission step {len(self.records)} ({step.name}) done in {record['duration'] * 1000:.1f} ms")
+
+        logger.info(f"Mission finished in {time.monotonic() - mission_start:.3f} s")
+        return self.records
+
+    async def _move(self, step, requests):
+        """ Re-sends the Move request at the step rate for its duration, returns the time of the first write. """
+        send = requests["send"]
+        period = 1.0 / step.rate
+        first = send.send()
+        end = first + step.duration
+        next_time = first + period
+        while next_time < end:
+            await asyncio.sleep(next_time - time.monotonic())
+            send.send()
+            next_time += period
+        await asyncio.sleep(max(0.0, end - time.monotonic()))
+        if "stop" in requests:
+            requests["stop"].send()
+        return first
+
+    def report(self):
+        """ One line per step with its duration, the wait for its condition and the send latency after it held. """
+        lines = []
+        for index, record in enumerate(self.records, 1):
+            wait = (record["ready"] - record["start"]) * 1000 if record["ready"] is not None else float("nan")
+            send = (record["sent"] - record["ready"]) * 1000 if record["sent"] is not None else float("nan")
+            lines.append(f"{index:3d} {record['name']:<14} {record['status']:<8} total {record['duration'] * 1000:9.1f} ms"
+                         f"  wait {wait:8.1f} ms  send {send:6.3f} ms")
+        return "\n".join(lines)
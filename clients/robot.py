@@ -0,0 +1,63 @@
+import logging
+from clients.sport_client import SportClient, SportState
+from clients.motion_switcher_client import MotionSwitcher
+
+logger = logging.getLogger(__name__)
+
+class Robot:
+    """
+    Robot: Handle for a single Go2, bundling its communicator with the clients bound to it.
+    Several handles can be used from the same process and event loop, e.g. one per robot on its own DDS domain:
+
+        robots = [Robot.dds(interface="eth0", domain_id=i, name=f"dog{i}") for i in range(3)]
+        await asyncio.gather(*(robot.sport.Hello() for robot in robots))
+    """
+    def __init__(self, communicator, name=None):
+        self.communicator = communicator
+        self.name = name or f"robot-{id(self):x}"
+        self.sport = SportClient(communicator)
+        self.motion_switcher = MotionSwitcher(communicator)
+        self._sport_state = None
+        self._localization = None
+        self._transforms = None
+
+    @classmethod
+    def dds(cls, interface="eth0", domain_id=0, name=None, profile="default"):
+        """ Creates a handle for a robot reachable through CycloneDDS on the given interface and domain. """
+        # Imported here so that WebRTC-only setups don't require cyclonedds
+        from communicator.cyclonedds.ddsCommunicator import DDSCommunicator
+        communicator = DDSCommunicator(interface=interface, domain_id=domain_id, profile=profile)
+        return cls(communicator, name=name or f"dds{domain_id}@{interface}")
+
+    def sport_state(self, frequency='lf'):
+        """ Returns the SportState of this robot, created on first use. """
+        if self._sport_state is None:
+            self._sport_state = SportState(self.communicator, frequency)
+        return self._sport_state
+
+    def localization(self):
+        """ Returns the LocalizationClient of this robot, created on first use; await its start() to subscribe. """
+        if self._localization is None:
+            # Imported here so that NumPy is only needed when localization is used
+            from clients.localization_client import LocalizationClient
+            self._localization = LocalizationClient(self.communicator)
+        return self._localization
+
+    def transforms(self, frequency='lf'):
+        """
+        Returns the TransformBuffer of this robot, created on first use and fed with the SportState of `frequency`.
+        Call from the event loop, the SportState subscription starts there.
+        """
+        if self._transforms is None:
+            from algorithms.transforms import TransformBuffer
+            transforms = TransformBuffer()
+
+            async def on_state(sample):
+                transforms.add_sport_state(sample)
+
+            self.sport_state(frequency).add_callback(on_state)
+            self._transforms = transforms
+        return self._transforms
+
+    def __repr__(self):
+        return f"Robot(name={self.name!r}, communicator={self.communicator.name})"
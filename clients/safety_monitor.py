@@ -0,0 +1,266 @@
+import os
+import sys
+import math
+import time
+import logging
+import threading
+from collections import deque
+from communicator.constants import SPORT_CLIENT_API_ID
+
+logger = logging.getLogger(__name__)
+
+'''
+The safety_monitor stops the Go2 when a safety condition is violated, without relying on the asyncio event loop.
+
+- SafetyMonitor: Watches the robot state from the DDS listener threads and a dedicated watchdog thread, and sends a
+   prebuilt Damp (or StopMove) request through a writer of its own as soon as a condition trips. The time from the
+   violation becoming observable to the completed write is measured for every trip.
+
+Conditions:
+- max_tilt: Roll/pitch tilt from imu_state.rpy of SportModeState_.
+- geofence: Polygon (x, y vertices) in the odometry frame of SportModeState_.position.
+- stale: Maximum age of the latest sample per topic, e.g. {"rt/sportmodestate": 0.1}.
+- heartbeat_timeout: Maximum time between two heartbeat() calls of the control code.
+- add_condition(): Any function of time.monotonic(), evaluated on the watchdog thread.
+'''
+
+
+def tilt_of(rpy):
+    """ Angle (rad) between the body z axis and the vertical for a roll, pitch, yaw triple. """
+    return math.acos(max(-1.0, min(1.0, math.cos(rpy[0]) * math.cos(rpy[1]))))
+
+
+def inside_polygon(x, y, polygon):
+    """ Even-odd rule point in polygon test, polygon given as a sequence of (x, y) vertices. """
+    inside = False
+    x0, y0 = polygon[-1]
+    for x1, y1 in polygon:
+        if (y1 > y) != (y0 > y) and x < (x0 - x1) * (y - y1) / (y0 - y1) + x1:
+            inside = not inside
+        x0, y0 = x1, y1
+    return inside
+
+
+class SafetyMonitor:
+    """
+    SafetyMonitor: Watchdog sending an emergency request when a safety condition trips.
+
+    Sample based conditions (tilt, geofence) are checked in the listener thread on every state sample and wake the
+    watchdog thread immediately; time based conditions (stale streams, heartbeat, custom) are checked by the watchdog
+    every 1 / `rate` seconds. The watchdog is the only thread sending, through a DataWriter created at start(), so a
+    trip never waits on the event loop, on publishReq or on the writer cache of the communicator.
+
+    Once tripped, the monitor stays latched (the request is sent `repeat` times) until reset().
+
+    The watchdog still needs the GIL: a thread busy in Python code can hold it for sys.getswitchinterval() (5 ms by
+    default) before the watchdog runs. `switch_interval` lowers it process wide to bound that delay, from start() until
+    stop() restores the previous value.
+
+    Parameters:
+        communicator: DDSCommunicator of the robot (needs prepare_request and subscribe_sync).
+        action (str): "Damp" or "StopMove".
+        max_tilt (float): Maximum tilt in radians, None to disable.
+        geofence (list): (x, y) polygon vertices, None to disable.
+        stale (dict): Topic -> maximum sample age in seconds. Topics without a sample yet count from start().
+        heartbeat_timeout (float): Seconds without heartbeat() before tripping, None to disable.
+        state_topic (str): SportModeState_ topic the tilt and geofence are checked on.
+        rate (float): Watchdog evaluation rate in Hz.
+        priority (int): SCHED_FIFO priority (1-99) of the watchdog thread, needs CAP_SYS_NICE (Linux only).
+        switch_interval (float): New sys.setswitchinterval() value in seconds, None keeps the current one.
+        repeat (int): Number of times the request is written when tripping, DDS best effort links may drop one.
+        on_trip: Called on the watchdog thread with the trip record after the request was sent.
+    """
+    def __init__(self, communicator, action="Damp", max_tilt=None, geofence=None, stale=None, heartbeat_timeout=None,
+                 state_topic="rt/sportmodestate", rate=500.0, priority=None, switch_interval=None, repeat=3,
+                 on_trip=None):
+        if action not in ("Damp", "StopMove"):
+            raise ValueError("action must be 'Damp' or 'StopMove'.")
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        if geofence is not None and len(geofence) < 3:
+            raise ValueError("A geofence needs at least 3 vertices.")
+        self.communicator = communicator
+        self.action = action
+        self.max_tilt = max_tilt
+        self.geofence = [(float(x), float(y)) for x, y in geofence] if geofence is not None else None
+        self.stale = dict(stale or {})
+        self.heartbeat_timeout = heartbeat_timeout
+        self.state_topic = state_topic
+        self.period = 1.0 / rate
+        self.priority = priority
+        self.switch_interval = switch_interval
+        self.repeat = max(1, repeat)
+        self.on_trip = on_trip
+
+        self.conditions = {}  # name -> function(now) returning True when violated
+        self.last_seen = {}  # topic -> time.monotonic() of the latest sample
+        self.last_heartbeat = None
+        self.trip = None  # Record of the current trip, None while armed
+        self.trips = []
+        self.reaction_times = deque(maxlen=1000)
+        self._violation = None  # (reason, observed time) set by the listener thread
+        self._wake = threading.Event()
+        self._request = None
+        self._thread = None
+        self._running = False
+        self._callbacks = {}
+        self._previous_switch_interval = None
+
+    def add_condition(self, name, check):
+        """ Adds a custom condition, `check(now)` runs on the watchdog thread and returns True to trip. """
+        self.conditions[name] = check
+
+    def heartbeat(self):
+        """ Signals that the control code is alive, callable from any thread. """
+        self.last_heartbeat = time.monotonic()
+
+    # Lifecycle
+
+    def start(self):
+        """ Creates the writer and the request, subscribes to the monitored topics and starts the watchdog. """
+        if self._running:
+            return
+        self._request = self.communicator.prepare_request(
+            self.communicator.get_topic_by_name("SPORT_MOD"),
+            {"api_id": SPORT_CLIENT_API_ID[self.action], "priority": 1},
+        )
+        now = time.monotonic()
+        self.last_heartbeat = now
+        for topic in set(self.stale) | {self.state_topic}:
+            self.last_seen.setdefault(topic, now)
+            callback = self._state_callback if topic == self.state_topic else self._stamp_callback(topic)
+            self._callbacks[topic] = callback
+            self.communicator.subscribe_sync(topic, None, callback)
+
+        if self.switch_interval is not None:
+            self._previous_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(self.switch_interval)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="safety-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Safety monitor armed, action {self.action}")
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for topic, callback in self._callbacks.items():
+            self.communicator.unsubscribe(topic, callback)
+        self._callbacks.clear()
+        if self._previous_switch_interval is not None:
+            sys.setswitchinterval(self._previous_switch_interval)
+            self._previous_switch_interval = None
+
+    def reset(self):
+        """ Re-arms the monitor after a trip; the heartbeat and stream ages restart from now. """
+        now = time.monotonic()
+        self.last_heartbeat = now
+        for topic in self.last_seen:
+            self.last_seen[topic] = now
+        self._violation = None
+        self.trip = None
+
+    # Listener threads
+
+    def _stamp_callback(self, topic):
+        def on_sample(sample):
+            self.last_seen[topic] = time.monotonic()
+        return on_sample
+
+    def _state_callback(self, sample):
+        now = time.monotonic()
+        self.last_seen[self.state_topic] = now
+        if self._violation is not None or self.trip is not None:
+            return
+        reason = None
+        if self.max_tilt is not None:
+            tilt = tilt_of(sample.imu_state.rpy)
+            if tilt > self.max_tilt:
+                reason = f"tilt {math.degrees(tilt):.1f} deg"
+        if reason is None and self.geofence is not None:
+            x, y = sample.position[0], sample.position[1]
+            if not inside_polygon(x, y, self.geofence):
+                reason = f"geofence left at ({x:.2f}, {y:.2f})"
+        if reason is not None:
+            self._violation = (reason, now)
+            self._wake.set()
+
+    # Watchdog thread
+
+    def _configure_scheduling(self):
+        if self.priority is None:
+            return
+        try:
+            # pid 0 is the calling thread on Linux
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Safety monitor: could not set SCHED_FIFO priority {self.priority}: {e}")
+
+    def _check(self, now):
+        """ (reason, time the violation became observable) of the first violated condition, or None. """
+        if self._violation is not None:
+            return self._violation
+        for topic, max_age in self.stale.items():
+            if now - self.last_seen[topic] > max_age:
+                return f"{topic} stale", self.last_seen[topic] + max_age
+        if self.heartbeat_timeout is not None and now - self.last_heartbeat > self.heartbeat_timeout:
+            return "heartbeat lost", self.last_heartbeat + self.heartbeat_timeout
+        for name, check in self.conditions.items():
+            if check(now):
+                return name, now
+        return None
+
+    def _run(self):
+        self._configure_scheduling()
+        while self._running:
+            self._wake.wait(self.period)
+            self._wake.clear()
+            if not self._running:
+                return
+            if self.trip is not None:
+                continue
+            try:
+                violation = self._check(time.monotonic())
+            except Exception as e:
+                violation = (f"condition failed: {e!r}", time.monotonic())
+            if violation is not None:
+                self._fire(*violation)
+
+    def _fire(self, reason, observed):
+        detected = time.monotonic()
+        sent = None
+        for _ in range(self.repeat):
+            try:
+                completed = self._request.send()
+            except Exception as e:
+                logger.error(f"Safety monitor: sending {self.action} failed: {e!r}")
+                continue
+            if sent is None:
+                sent = completed
+        if sent is None:
+            # Not latched, the next period tries again
+            return
+        reaction = sent - observed
+        self.trip = {"reason": reason, "action": self.action, "observed": observed, "detected": detected,
+                     "sent": sent, "reaction": reaction}
+        self.trips.append(self.trip)
+        self.reaction_times.append(reaction)
+        # Logging happens after the request is out, it's slow compared to the write
+        logger.critical(f"Safety monitor tripped ({reason}), {self.action} sent {reaction * 1000:.2f} ms after the violation")
+        if self.on_trip is not None:
+            try:
+                self.on_trip(self.trip)
+            except Exception as e:
+                logger.error(f"Safety monitor: on_trip failed: {e!r}")
+
+    def report(self):
+        """ Number of trips and the mean, max and last reaction time in seconds. """
+        times = list(self.reaction_times)
+        return {
+            "trips": len(self.trips),
+            "mean": sum(times) / len(times) if times else None,
+            "max": max(times) if times else None,
+            "last": times[-1] if times else None,
+        }
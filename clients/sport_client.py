@@ -3,7 +3,7 @@ import logging
 import math
 import asyncio
 from communicator.constants import SPORT_CLIENT_API_ID, SPORT_MODE_SWITCH_API_ID
-from communicator.idl.unitree_go.msg.dds_ import SportModeState_
+from communicator.cyclonedds.typeRegistry import type_registry
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +17,28 @@ The sport_client is divided into three main components: SportClient, SportState,
    which requires firmware version 1.0.23 or later.
 '''
 
+def move_parameters(args):
+    """ Validated Move parameters from a dict with x, y (m/s) and z (rad/s) speeds, missing speeds are 0. """
+    # Ensure x, y, and z keys exist in args with a default value of 0 if absent
+    x = float(args.get('x', 0))
+    y = float(args.get('y', 0))
+    z = float(args.get('z', 0))
+
+    # Validate the speed ranges
+    if not (-2.5 <= x <= 5):
+        raise ValueError("x speed is out of the valid range [-2.5, 5].")
+    if not (-2.5 <= y <= 5):
+        raise ValueError("y speed is out of the valid range [-2.5, 5].")
+    if not (-4 <= z <= 4):
+        raise ValueError("z speed is out of the valid range [-4, 4].")
+
+    # Speed parameters
+    return {
+        'x': x,  # Linear velocity in the x direction
+        'y': y,  # Linear velocity in the y direction
+        'z': z   # Angular velocity around the z-axis
+    }
+
 class SportClient():
     """
     SportClient: This class is used to send high-level commands and actions, as well as to follow trajectories
@@ -206,25 +228,7 @@ class SportClient():
                 - y: Linear velocity in the y direction (m/s). Value range: [-2.5, 5].
                 - z: Angular velocity around the z-axis (rad/s). Value range: [-4, 4].
         """
-        # Ensure x, y, and z keys exist in args with a default value of 0 if absent
-        x = float(args.get('x', 0))
-        y = float(args.get('y', 0))
-        z = float(args.get('z', 0))
-
-        # Validate the speed ranges
-        if not (-2.5 <= x <= 5):
-            raise ValueError("x speed is out of the valid range [-2.5, 5].")
-        if not (-2.5 <= y <= 5):
-            raise ValueError("y speed is out of the valid range [-2.5, 5].")
-        if not (-4 <= z <= 4):
-            raise ValueError("z speed is out of the valid range [-4, 4].")
-
-        # Speed parameters
-        para = {
-            'x': x,  # Linear velocity in the x direction
-            'y': y,  # Linear velocity in the y direction
-            'z': z   # Angular velocity around the z-axis
-        }
+        para = move_parameters(args)
 
         action_id = SPORT_CLIENT_API_ID["Move"] 
         response = await self.doRequest(action_id, parameter=para, noreply=not ack)
@@ -436,15 +440,22 @@ class SportClient():
     async def TrajectoryFollow(self, path_points, ack=False):
         """
         Sends a trajectory consisting of multiple points to the robot for it to follow.
+
+        Parameters:
+        path_points: 30 PathPoint_ objects, or a (30, 7) NumPy array with the PathPoint_ fields as columns
+                     (see algorithms.trajectory), which is encoded without building intermediate objects.
         """
         if len(path_points) != 30:
             raise ValueError("Exactly 30 path points are required.")
 
         action_id = SPORT_CLIENT_API_ID["TrajectoryFollow"]
-        js_path = [point.__dict__ for point in path_points]  # Convert each PathPoint to dictionary
-
-        # Convert the path list to a JSON formatted string
-        para = json.dumps(js_path)
+        if hasattr(path_points, "shape"):
+            # Imported here so that NumPy is only needed by callers passing arrays
+            from algorithms.trajectory import encode_path
+            para = encode_path(path_points)
+        else:
+            # Convert the path list to a JSON formatted string, sent as is by the communicator
+            para = json.dumps([point.__dict__ for point in path_points])
 
         # Send the request and await the response
         response = await self.doRequest(action_id, parameter=para, noreply=not ack)
@@ -896,18 +907,50 @@ class SportClient():
             logger.error(f"Command with api_id: {action_id} failed or no response received")
             return False
 
+class _FieldRecorder:
+    """ Read-only view of a sample recording the top-level fields a predicate reads. """
+    __slots__ = ("_sample", "_fields")
+
+    def __init__(self, sample):
+        self._sample = sample
+        self._fields = set()
+
+    def __getattr__(self, name):
+        self._fields.add(name)
+        return getattr(self._sample, name)
+
+
+class _Waiter:
+    __slots__ = ("predicate", "future", "fields")
+
+    def __init__(self, predicate, future):
+        self.predicate = predicate
+        self.future = future
+        self.fields = frozenset()
+
+
+_MISSING = object()
+
+
 class SportState:
     """
     SportState: This class is designed to obtain high-level motion states of the Go2, such as position, speed, and posture.
-    """
-    _instance = None
+    One instance exists per communicator, so every robot handled by the process gets its own state.
 
+    wait_for() resolves on the first sample matching a predicate. Each waiter is indexed by the fields its predicate
+    read when last evaluated, and is only evaluated again when one of them changes: a deterministic predicate reading
+    the same values returns the same result. A sample therefore costs one comparison per watched field plus the
+    evaluation of the waiters whose inputs changed, however many waiters are pending.
+    """
     def __new__(cls, communicator, frequency='lf'):
-        # Ensuring only one instance of SportState is created
-        if cls._instance is None:
-            cls._instance = super(SportState, cls).__new__(cls)
-            cls._instance.initialized = False
-        return cls._instance
+        # Ensuring only one instance of SportState is created per communicator. It's kept on the communicator, not in
+        # a class-level registry, so both are released together.
+        instance = getattr(communicator, "_sport_state", None)
+        if instance is None:
+            instance = super(SportState, cls).__new__(cls)
+            instance.initialized = False
+            communicator._sport_state = instance
+        return instance
 
     def __init__(self, communicator, frequency='lf'):
         if not self.initialized:
@@ -915,8 +958,13 @@ class SportState:
             self.frequency = frequency
             self.topic = self._get_topic_name(frequency)
             self.sport_state = None
+            self.data_type = None
             self.callbacks = set()
             self.listening = False
+            self._waiters = set()
+            self._fresh = set()  # Waiters not evaluated on any sample yet
+            self._index = {}  # field -> waiters whose predicate read it
+            self._values = {}  # field -> value in the last sample
             self.initialized = True
 
     def _get_topic_name(self, frequency):
@@ -932,15 +980,105 @@ class SportState:
             asyncio.create_task(self._start_listening())
 
     def remove_callback(self, callback):
-        """ Remove a specific callback and stop listening if no callbacks remain. """
+        """ Remove a specific callback and stop listening if no callbacks or waiters remain. """
         self.callbacks.discard(callback)
-        if not self.callbacks and self.listening:
+        if not self.callbacks and not self._waiters and self.listening:
             asyncio.create_task(self._stop_listening())
 
+    async def wait_for(self, predicate, timeout=None):
+        """
+        Waits until a SportModeState_ sample satisfies `predicate`, e.g.
+
+            state = await sport_state.wait_for(lambda s: s.mode == 1 and s.progress >= 1.0, timeout=5)
+
+        The current state is checked first. The predicate must only depend on the sample it is given.
+        Returns the matching sample, or None on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(predicate, loop.create_future())
+        if self.sport_state is not None and self._evaluate(waiter, self.sport_state):
+            return waiter.future.result()
+
+        self._waiters.add(waiter)
+        if self.sport_state is None:
+            self._fresh.add(waiter)
+        else:
+            self._remember(self.sport_state)
+        if not self.listening:
+            await self._start_listening()
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            logger.info(f"wait_for timed out after {timeout} s")
+            return None
+        finally:
+            self._remove_waiter(waiter)
+            # Like remove_callback: the subscription made for the waiters ends with the last of them
+            if not self.callbacks and not self._waiters and self.listening:
+                asyncio.create_task(self._stop_listening())
+
+    def _evaluate(self, waiter, sample):
+        """ Evaluates a waiter on a sample and re-indexes it by the fields read, returns True once it is done. """
+        recorder = _FieldRecorder(sample)
+        try:
+            matched = waiter.predicate(recorder)
+        except Exception as e:
+            if not waiter.future.done():
+                waiter.future.set_exception(e)
+            return True
+        if matched:
+            if not waiter.future.done():
+                waiter.future.set_result(sample)
+            return True
+
+        fields = frozenset(recorder._fields)
+        self._unindex(waiter, waiter.fields - fields)
+        for field in fields - waiter.fields:
+            self._index.setdefault(field, set()).add(waiter)
+        waiter.fields = fields
+        return False
+
+    def _remove_waiter(self, waiter):
+        self._waiters.discard(waiter)
+        self._fresh.discard(waiter)
+        self._unindex(waiter, waiter.fields)
+        waiter.fields = frozenset()
+
+    def _unindex(self, waiter, fields):
+        for field in fields:
+            waiters = self._index.get(field)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._index[field]
+                    self._values.pop(field, None)
+
+    def _check_waiters(self, sample):
+        """ Evaluates the waiters depending on a field that changed since the previous sample. """
+        due = self._fresh
+        self._fresh = set()
+        values = self._values
+        for field, waiters in self._index.items():
+            value = getattr(sample, field, _MISSING)
+            if values.get(field, _MISSING) != value:
+                values[field] = value
+                due = due | waiters
+        for waiter in due:
+            if waiter in self._waiters and self._evaluate(waiter, sample):
+                self._remove_waiter(waiter)
+        self._remember(sample)
+
+    def _remember(self, sample):
+        """ Records the value of fields indexed since the sample the waiters were last evaluated on. """
+        for field in self._index.keys() - self._values.keys():
+            self._values[field] = getattr(sample, field, _MISSING)
+
     async def _process_data(self, data):
-        """ Process incoming data and execute callbacks. """
-        if isinstance(data, SportModeState_):
+        """ Process incoming data, resolve the matching waiters and execute callbacks. """
+        if isinstance(data, self.data_type):
             self.sport_state = data
+            if self._waiters:
+                self._check_waiters(data)
             await asyncio.gather(*(callback(data) for callback in self.callbacks))
         else:
             logger.error("Incorrect data type received.")
@@ -948,13 +1086,14 @@ class SportState:
     async def _start_listening(self):
         """Start listening to the topic only if not already listening."""
         if not self.listening:
-            self.communicator.subscribe(self.topic, SportModeState_, self._process_data)
+            self.data_type = type_registry.get_type("unitree_go.msg.dds_.SportModeState_")
+            self.communicator.subscribe(self.topic, self.data_type, self._process_data)
             self.listening = True
             logger.info(f"Subscribed to {self.topic}")
 
     async def _stop_listening(self):
-        """Stop listening to the topic."""
-        if self.listening:
+        """Stop listening to the topic, unless a callback or waiter was added since the stop was requested."""
+        if self.listening and not self.callbacks and not self._waiters:
             self.communicator.unsubscribe(self.topic)
             self.listening = False
             logger.info(f"Unsubscribed from {self.topic}")
@@ -0,0 +1,84 @@
+import inspect
+import logging
+import functools
+from clients.sport_client import SportClient
+from clients.motion_switcher_client import MotionSwitcher
+
+logger = logging.getLogger(__name__)
+
+'''
+Synchronous API for control code running in its own (real-time) thread, without an asyncio event loop.
+
+- SyncClient: Exposes the methods of an async client (SportClient, MotionSwitcher) as blocking calls.
+- SportClientSync / MotionSwitcherSync: Ready-made synchronous clients.
+
+Requests are sent with the blocking communicator.request(), which shares the writers and response readers used by the
+async API, so both APIs can be used on the same communicator at the same time. For state, use
+communicator.subscribe_sync() (callbacks in the listener thread) or communicator.latest(topic) (non-blocking read).
+'''
+
+class _BlockingRequests:
+    """
+    Communicator facade whose publishReq completes without ever suspending, by delegating to the blocking request().
+    Coroutines of the clients built on it therefore run to completion in the calling thread.
+    """
+    def __init__(self, communicator):
+        self.communicator = communicator
+
+    def __getattr__(self, name):
+        return getattr(self.communicator, name)
+
+    async def publishReq(self, topic, requestData, timeout=5, **kwargs):
+        return self.communicator.request(topic, requestData, timeout=timeout, **kwargs)
+
+
+def _run_sync(coroutine):
+    """ Drives a coroutine that never suspends to completion and returns its result. """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("Synchronous client call tried to wait on the event loop.")
+
+
+class SyncClient:
+    """
+    SyncClient: Wraps an async client class so that each of its coroutine methods becomes a blocking call.
+
+    Parameters:
+        client_class: Async client class taking the communicator as its first argument, e.g. SportClient.
+        communicator: Communicator providing request() (e.g. DDSCommunicator).
+    """
+    def __init__(self, client_class, communicator, *args, **kwargs):
+        self.communicator = communicator
+        self.client = client_class(_BlockingRequests(communicator), *args, **kwargs)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            return _run_sync(attribute(*args, **kwargs))
+
+        # Cache the wrapper, hot loops shouldn't pay for the lookup on every call
+        setattr(self, name, call)
+        return call
+
+
+class SportClientSync(SyncClient):
+    """
+    SportClientSync: Blocking version of SportClient, e.g. SportClientSync(communicator).Move({'x': 0.3})
+    """
+    def __init__(self, communicator):
+        super().__init__(SportClient, communicator)
+
+
+class MotionSwitcherSync(SyncClient):
+    """
+    MotionSwitcherSync: Blocking version of MotionSwitcher.
+    """
+    def __init__(self, communicator):
+        super().__init__(MotionSwitcher, communicator)
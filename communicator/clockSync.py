@@ -0,0 +1,266 @@
+import math
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+'''
+Robot-to-host clock synchronisation and transport latency measurement.
+
+- ClockSync: Estimates the offset and drift between the robot clock (message stamps) and the host monotonic clock.
+- LatencyHistogram: Fixed, log-spaced latency histogram with O(log bins) insertion and percentile queries.
+- LatencyMonitor: Reads the robot stamp of each delivered sample, feeds the ClockSync, annotates the sample with its
+  transport latency (attribute `transport_latency`, seconds) and keeps one histogram per topic.
+'''
+
+# Robot-side stamp of the messages that carry one, in seconds, keyed by IDL class name
+STAMP_EXTRACTORS = {
+    "SportModeState_": lambda s: s.stamp.sec + s.stamp.nanosec * 1e-9,
+    "LidarState_": lambda s: s.stamp,
+    "HeightMap_": lambda s: s.stamp,
+    "PoseStamped_": lambda s: s.header.stamp.sec + s.header.stamp.nanosec * 1e-9,
+    "PointStamped_": lambda s: s.header.stamp.sec + s.header.stamp.nanosec * 1e-9,
+    "TwistStamped_": lambda s: s.header.stamp.sec + s.header.stamp.nanosec * 1e-9,
+    "PoseWithCovarianceStamped_": lambda s: s.header.stamp.sec + s.header.stamp.nanosec * 1e-9,
+}
+
+
+class ClockSync:
+    """
+    ClockSync: Maps robot time to host monotonic time as host = robot + offset + drift * (robot - reference).
+
+    Every observation (robot stamp, host receive time) is an upper bound of the true offset, larger by the transport
+    delay. The estimator keeps the minimum of (host - robot) per window of `window` seconds, fits a line through the
+    minima of the last `windows` windows (offset and drift), and lowers it by half the smallest request round-trip
+    when round-trips are reported. Work per observation is O(1); the fit runs once per window.
+
+    Parameters:
+        window (float): Window length in seconds of robot time.
+        windows (int): Number of window minima used for the fit.
+        reset_threshold (float): Observations more than this (seconds) below the estimate, i.e. received before they
+            could have been sent, reset the estimator at once, e.g. after a robot reboot or a clock step.
+        reset_after (float): Observations more than reset_threshold above the estimate are late samples and keep
+            their latency; only when every observation stays that far above for this long (seconds of host time) is
+            it taken as a backward clock step and the estimator reset.
+    """
+    def __init__(self, window=2.0, windows=30, reset_threshold=1.0, reset_after=5.0):
+        self.window = window
+        self.reset_threshold = reset_threshold
+        self.reset_after = reset_after
+        self.minima = deque(maxlen=windows)
+        self.min_round_trip = math.inf
+        self.reset()
+
+    def reset(self):
+        self.minima.clear()
+        self.reference = None
+        self.offset = None
+        self.drift = 0.0
+        self._window_start = None
+        self._window_min = math.inf
+        self._window_min_robot = 0.0
+        self._late_since = None
+
+    @property
+    def synchronized(self):
+        return self.offset is not None
+
+    def add_sample(self, robot_time, host_time):
+        """ Adds an observation: a message stamped `robot_time` was received at `host_time` (time.monotonic). """
+        observed = host_time - robot_time
+        if self.offset is not None:
+            deviation = observed - self._raw_offset(robot_time)
+            if deviation < -self.reset_threshold:
+                logger.warning(f"Robot clock jumped forward by {-deviation:.3f} s, resetting clock sync")
+                self.reset()
+            elif deviation > self.reset_threshold:
+                # A late sample keeps its latency and leaves the estimate alone; a stall ends, a clock step doesn't
+                if self._late_since is None:
+                    self._late_since = host_time
+                if host_time - self._late_since < self.reset_after:
+                    return
+                logger.warning(f"Robot clock jumped back by {deviation:.3f} s, resetting clock sync")
+                self.reset()
+            else:
+                self._late_since = None
+
+        if self._window_start is None:
+            self._window_start = robot_time
+            self.reference = robot_time
+
+        if observed < self._window_min:
+            self._window_min = observed
+            self._window_min_robot = robot_time
+
+        if robot_time - self._window_start >= self.window:
+            self.minima.append((self._window_min_robot - self.reference, self._window_min))
+            self._fit()
+            self._window_start = robot_time
+            self._window_min = math.inf
+        elif not self.minima:
+            # Until the first window closes, the running minimum is the best estimate
+            self.offset = self._window_min
+
+    def add_round_trip(self, round_trip):
+        """ Reports the duration (seconds) of a request/response round-trip with the robot. """
+        if round_trip < self.min_round_trip:
+            self.min_round_trip = round_trip
+
+    def _fit(self):
+        count = len(self.minima)
+        if count == 1:
+            self.offset = self.minima[0][1]
+            self.drift = 0.0
+            return
+        mean_t = sum(t for t, _ in self.minima) / count
+        mean_o = sum(o for _, o in self.minima) / count
+        variance = sum((t - mean_t) ** 2 for t, _ in self.minima)
+        self.drift = sum((t - mean_t) * (o - mean_o) for t, o in self.minima) / variance if variance else 0.0
+        # Offset of the lower envelope at the reference time
+        self.offset = min(o - self.drift * t for t, o in self.minima)
+
+    def _raw_offset(self, robot_time):
+        return self.offset + self.drift * (robot_time - self.reference)
+
+    def to_host(self, robot_time):
+        """ Host monotonic time corresponding to a robot timestamp, or None before the first observation. """
+        if self.offset is None:
+            return None
+        return robot_time + self._raw_offset(robot_time) - self._one_way()
+
+    def to_robot(self, host_time):
+        """ Robot timestamp corresponding to a host monotonic time (inverse of to_host), or None before the first observation. """
+        if self.offset is None:
+            return None
+        return (host_time + self._one_way() - self.offset + self.drift * self.reference) / (1.0 + self.drift)
+
+    def _one_way(self):
+        # The lower envelope still includes the minimum one-way delay, half the best round-trip approximates it
+        return self.min_round_trip / 2 if self.min_round_trip != math.inf else 0.0
+
+    def latency(self, robot_time, host_time):
+        """ Transport latency (seconds) of a message stamped `robot_time` and received at `host_time`. """
+        stamp = self.to_host(robot_time)
+        return None if stamp is None else host_time - stamp
+
+
+class LatencyHistogram:
+    """
+    LatencyHistogram: Latency distribution over fixed log-spaced bins from 10 us to 10 s.
+    """
+    BOUNDS = [10e-6 * 10 ** (i / 10) for i in range(61)]  # 10 bins per decade
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, latency):
+        self.counts[bisect.bisect_left(self.BOUNDS, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency < self.min:
+            self.min = latency
+        if latency > self.max:
+            self.max = latency
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        """ Upper bound of the bin holding the p-th percentile (p in [0, 100]), or None if empty. """
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return self.BOUNDS[index] if index < len(self.BOUNDS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max if self.count else None,
+        }
+
+
+class LatencyMonitor:
+    """
+    LatencyMonitor: Annotates samples with their transport latency and keeps a LatencyHistogram per topic.
+    Samples without a known stamp are left untouched.
+
+    Every topic gets a ClockSync of its own: topics are stamped by different processes on the robot, whose clocks
+    (and offsets to the host) need not agree. Request round-trips bound the one-way delay of all of them.
+
+    Parameters:
+        clock_factory: Callable returning a new ClockSync, called once per stamped topic.
+    """
+    def __init__(self, clock_factory=ClockSync):
+        self.clock_factory = clock_factory
+        self.clocks = {}  # topic -> ClockSync
+        self.histograms = {}
+        self.min_round_trip = math.inf
+        self._extractors = {}  # class -> extractor or None
+        # Clocks are created from listener threads while round-trips arrive on the event loop
+        self._lock = threading.Lock()
+
+    def clock_for(self, topic):
+        """ ClockSync of a topic's stamps, created on first use. """
+        clock = self.clocks.get(topic)
+        if clock is None:
+            with self._lock:
+                clock = self.clocks.get(topic)
+                if clock is None:
+                    clock = self.clock_factory()
+                    clock.add_round_trip(self.min_round_trip)
+                    self.clocks[topic] = clock
+        return clock
+
+    def observe(self, topic, sample, host_time=None):
+        """ Processes a sample received at host_time (time.monotonic), returns its latency in seconds or None. """
+        cls = type(sample)
+        extractor = self._extractors.get(cls, False)
+        if extractor is False:
+            extractor = self._extractors[cls] = STAMP_EXTRACTORS.get(cls.__name__)
+        if extractor is None:
+            return None
+
+        if host_time is None:
+            host_time = time.monotonic()
+        robot_time = extractor(sample)
+        clock = self.clock_for(topic)
+        clock.add_sample(robot_time, host_time)
+        latency = clock.latency(robot_time, host_time)
+        sample.transport_latency = latency
+
+        histogram = self.histograms.get(topic)
+        if histogram is None:
+            histogram = self.histograms[topic] = LatencyHistogram()
+        histogram.add(latency)
+        return latency
+
+    def add_round_trip(self, round_trip):
+        with self._lock:
+            if round_trip >= self.min_round_trip:
+                return
+            self.min_round_trip = round_trip
+            clocks = list(self.clocks.values())
+        for clock in clocks:
+            clock.add_round_trip(round_trip)
+
+    def summary(self):
+        """ Latency statistics per topic, in seconds. """
+        return {topic: histogram.summary() for topic, histogram in self.histograms.items()}
@@ -6,11 +6,26 @@ class CommunicatorWrapper:
     def subscribe(self, topic, data_type, callback):
         raise NotImplementedError
     
+    def subscribe_by_name(self, name, callback):
+        raise NotImplementedError
+
     def unsubscribe(self, topic):
         raise NotImplementedError
 
     async def publishReq (self, topic, requestData, timeout=5):
         raise NotImplementedError
+
+    def request(self, topic, requestData, timeout=5):
+        raise NotImplementedError
+
+    def prepare_request(self, topic, requestData, qos=None, writer=None):
+        raise NotImplementedError
+
+    def subscribe_sync(self, topic, data_type, callback):
+        raise NotImplementedError
+
+    def latest(self, topic):
+        raise NotImplementedError
     
     def get_topic_by_name(self, name):
         raise NotImplementedError
\ No newline at end of file
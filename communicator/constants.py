@@ -145,8 +145,109 @@ DDS_ONLY_TOPICS = {
     "SPORT_MOD_STATE": "rt/sportmodestate",
     "SPORT_MOD_STATE_MF": "rt/mf/sportmodestate",
     "ULIDAR": "rt/utlidar/voxel_map",
+    "ULIDAR_HEIGHT_MAP": "rt/utlidar/height_map_array",
     "LOW_STATE": "rt/lowstate",
 }
 
 # Combine WebRTC topics with DDS-specific topics for comprehensive DDS topics
-DDS_TOPICS = {**WEBRTC_TOPICS, **DDS_ONLY_TOPICS}
\ No newline at end of file
+DDS_TOPICS = {**WEBRTC_TOPICS, **DDS_ONLY_TOPICS}
+
+# IDL typename of the messages carried on each topic, lets the communicator subscribe by topic name alone.
+# Request/response topics are registered by the type registry from their naming convention.
+DDS_TOPIC_TYPES = {
+    "rt/lowstate": "unitree_go.msg.dds_.LowState_",
+    "rt/lf/lowstate": "unitree_go.msg.dds_.LowState_",
+    "rt/sportmodestate": "unitree_go.msg.dds_.SportModeState_",
+    "rt/mf/sportmodestate": "unitree_go.msg.dds_.SportModeState_",
+    "rt/lf/sportmodestate": "unitree_go.msg.dds_.SportModeState_",
+    "rt/utlidar/lidar_state": "unitree_go.msg.dds_.LidarState_",
+    "rt/utlidar/robot_pose": "geometry_msgs.msg.dds_.PoseStamped_",
+    "rt/utlidar/height_map_array": "unitree_go.msg.dds_.HeightMap_",
+    "rt/utlidar/switch": "std_msgs.msg.dds_.String_",
+    "rt/uwbstate": "unitree_go.msg.dds_.UwbState_",
+    "rt/wirelesscontroller": "unitree_go.msg.dds_.WirelessController_",
+    "rt/servicestate": "std_msgs.msg.dds_.String_",
+    "rt/multiplestate": "std_msgs.msg.dds_.String_",
+    "rt/audiohub/player/state": "std_msgs.msg.dds_.String_",
+    "rt/gptflowfeedback": "std_msgs.msg.dds_.String_",
+    "rt/arm_Command": "std_msgs.msg.dds_.String_",
+    "rt/arm_Feedback": "std_msgs.msg.dds_.String_",
+}
+
+
+# CycloneDDS configuration profiles, applied on top of the network interface and discovery settings.
+# Keys are element paths below <Domain>, "@name" addresses an attribute of the element. Socket buffers are requested
+# through "max" so that a lower OS limit (net.core.rmem_max) only degrades throughput instead of failing startup.
+DDS_CONFIG_PROFILES = {
+    # Plain configuration, CycloneDDS defaults
+    "default": {},
+
+    # Wired link to the robot: deliver on the receive thread, no batching, large datagrams
+    "low_latency_wired": {
+        "General/MaxMessageSize": "65500B",
+        "General/FragmentSize": "8000B",
+        "Internal/SocketReceiveBufferSize@max": "4MB",
+        "Internal/SocketSendBufferSize@max": "2MB",
+        "Internal/WriteBatch": "false",
+        "Internal/MultipleReceiveThreads": "true",
+        "Internal/SynchronousDeliveryPriorityThreshold": "0",
+        "Internal/SynchronousDeliveryLatencyBound": "inf",
+        "Internal/NackDelay": "0 ms",
+    },
+
+    # Wi-Fi: datagrams below the MTU to avoid IP fragmentation, large receive buffers to absorb bursts
+    "lossy_wifi": {
+        "General/MaxMessageSize": "1400B",
+        "General/FragmentSize": "1300B",
+        "Internal/SocketReceiveBufferSize@max": "8MB",
+        "Internal/SocketSendBufferSize@max": "1MB",
+        "Internal/WriteBatch": "false",
+        "Internal/MultipleReceiveThreads": "true",
+        "Internal/NackDelay": "10 ms",
+        "Internal/RetransmitMerging": "adaptive",
+        "Internal/Watermarks/WhcHigh": "200kB",
+    },
+
+    # Point clouds, height maps and video: throughput over latency
+    "bulk_lidar_video": {
+        "General/MaxMessageSize": "65500B",
+        "General/FragmentSize": "62000B",
+        "Internal/SocketReceiveBufferSize@max": "16MB",
+        "Internal/SocketSendBufferSize@max": "8MB",
+        "Internal/WriteBatch": "true",
+        "Internal/MultipleReceiveThreads": "true",
+        "Internal/Watermarks/WhcHigh": "2MB",
+        "Internal/Watermarks/WhcHighInit": "500kB",
+    },
+}
+
+
+# QoS profiles for topics, requests and responses. Settings:
+# - reliability: "reliable" or "best_effort"
+# - history: depth of the keep-last history, or "all"
+# - max_blocking_time_ms: how long a reliable write may block on a full history
+# - durability: "volatile" or "transient_local"
+# - time_based_filter_ms: minimum separation between samples delivered to a reader
+# - deadline_ms: maximum expected gap between samples, reported as "deadline_missed" (writers must offer it too)
+DDS_QOS_PROFILES = {
+    # High-rate state streams: a lost sample is superseded by the next one, only the newest is of interest
+    "state": {"reliability": "best_effort", "history": 1, "durability": "volatile"},
+    # Requests and responses: every message matters, a small history covers a few requests in flight
+    "rpc": {"reliability": "reliable", "history": 8, "max_blocking_time_ms": 100, "durability": "volatile"},
+}
+
+# QoS profile of each topic, request/response topics use "rpc". Topics not listed keep the CycloneDDS defaults.
+DDS_TOPIC_QOS = {
+    "rt/lowstate": "state",
+    "rt/lf/lowstate": "state",
+    "rt/sportmodestate": "state",
+    "rt/mf/sportmodestate": "state",
+    "rt/lf/sportmodestate": "state",
+    "rt/utlidar/voxel_map": "state",
+    "rt/utlidar/voxel_map_compressed": "state",
+    "rt/utlidar/lidar_state": "state",
+    "rt/utlidar/robot_pose": "state",
+    "rt/utlidar/height_map_array": "state",
+    "rt/uwbstate": "state",
+    "rt/wirelesscontroller": "state",
+}
@@ -1,6 +1,8 @@
 import os
 import time
 import random
+import itertools
+import threading
 import asyncio
 import json
 import logging
@@ -12,91 +14,342 @@ from cyclonedds.topic import Topic
 from cyclonedds.core import Listener, Qos, Policy, Entity
 from cyclonedds.util import duration
 from communicator.communicatorWrapper import CommunicatorWrapper
-import xml.etree.ElementTree as ET
-
-from communicator.idl.unitree_api.msg.dds_ import RequestIdentity_, RequestLease_, RequestPolicy_, RequestHeader_, Request_, Response_
-from communicator.idl.std_msgs.msg.dds_ import String_
+from communicator.cyclonedds.typeRegistry import type_registry, REQUEST_TYPENAME, RESPONSE_TYPENAME
+from communicator.cyclonedds.ddsConfig import build_config
+from communicator.cyclonedds.ddsQos import get_qos
+from communicator.cyclonedds.waitsetEngine import WaitSetEngine
+from communicator.clockSync import ClockSync, LatencyMonitor
 
 logger = logging.getLogger(__name__)
 
-class DDSCommunicator(CommunicatorWrapper):
-    # Class variable to hold the DomainParticipant instance
-    _participant = None
+class SampleFilter:
+    """
+    SampleFilter: Decimation of a subscription, evaluated in the listener thread so that dropped samples never reach
+    the event loop. Keeps every `every_nth` sample and at most `max_rate_hz` samples per second.
+    """
+    __slots__ = ("min_interval", "every_nth", "count", "next_time")
+
+    def __init__(self, max_rate_hz=None, every_nth=None):
+        if max_rate_hz is not None and max_rate_hz <= 0:
+            raise ValueError("max_rate_hz must be positive.")
+        if every_nth is not None and (int(every_nth) != every_nth or every_nth < 1):
+            raise ValueError("every_nth must be an integer >= 1.")
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz else 0.0
+        self.every_nth = int(every_nth or 1)
+        self.count = 0
+        self.next_time = 0.0
+
+    def accept(self, now):
+        """ Returns True if the sample received at `now` (time.monotonic) is to be delivered. """
+        self.count += 1
+        if self.count < self.every_nth or now < self.next_time:
+            return False
+        self.count = 0
+        # Keep the average rate on target, but don't build up credit after a gap in the stream
+        if now - self.next_time > self.min_interval:
+            self.next_time = now + self.min_interval
+        else:
+            self.next_time += self.min_interval
+        return True
 
-    def __init__(self, interface="eth0"):
-        self.name = "DDS"
-        self._set_network(interface)
 
-        # If a DomainParticipant has not been created, do so with the updated configuration
-        if DDSCommunicator._participant is None:
-            # Directly use the path to the XML configuration file when creating the Domain
-            DDSCommunicator._participant = DomainParticipant(domain_id=0)
+class PreparedRequest:
+    """
+    PreparedRequest: A Request_ built ahead of time with a dedicated DataWriter. send() only stamps a new request id,
+    serializes and writes it, without touching the locks or writer cache shared with publishReq, so it can be called
+    from any thread while the event loop is busy. Every send is a distinct request for the robot.
+    """
+    __slots__ = ("writer", "request", "ids")
 
-        self.participant = DDSCommunicator._participant
-        self.current_id = random.randint(0, 2147483647)
+    def __init__(self, writer, request, ids):
+        self.writer = writer
+        self.request = request
+        self.ids = ids  # Request id counter of the communicator
+
+    def send(self):
+        """ Writes the request with a fresh id, returns the time.monotonic() at which the write completed. """
+        self.request.header.identity.id = next(self.ids)
+        self.writer.write(self.request)
+        return time.monotonic()
+
+
+class DDSCommunicator(CommunicatorWrapper):
+    """
+    DDSCommunicator: CycloneDDS transport bound to one robot, identified by its DDS domain and network interface.
+    Several communicators can live in one process (e.g. one per robot on distinct domains); DomainParticipants are
+    shared between communicators bound to the same (domain_id, interface).
+
+    The CycloneDDS configuration is generated in memory from a profile of DDS_CONFIG_PROFILES
+    ("default", "low_latency_wired", "lossy_wifi", "bulk_lidar_video") when the participant is created.
+    """
+    # Class variables holding the DomainParticipant instances keyed by (domain_id, interface)
+    _participants = {}
+    _participant_profiles = {}
+    _participants_lock = threading.Lock()
+
+    def __init__(self, interface="eth0", domain_id=0, profile="default"):
+        self.name = "DDS"
+        self.interface = interface
+        self.domain_id = domain_id
+        self.participant = self._get_participant(domain_id, interface, profile)
+        # next() on a count is atomic, ids can be drawn from any thread without a lock
+        self.request_ids = itertools.count(random.randint(0, 2147483647) + 1)
         self.readers = {} # Use a dictionary to manage readers by topic name
         self.topics = {}  # Cache topics to avoid recreating them
         self.writers = {}  # Cache for DataWriter instances
         self.callbacks = {} # Cache for callback instances
+        self.filters = {}  # Decimation filters by topic and callback
         self.deferred_unsubscriptions = {}  # Manage deferred unsubscriptions
+        self.sync_callbacks = {}  # Callbacks invoked directly in the listener thread, by topic
+        self.listeners = {}  # Listener of each subscribed topic
+        self.loops = {}  # Event loop the async callbacks of each topic run on
+        self.engine = None  # Optional WaitSet engine replacing the listeners
+        self.latency_monitor = None  # Optional transport latency measurement
+        self.latest_samples = {}  # Latest valid sample of each subscribed topic
+        self.status_callbacks = {}  # Callbacks for the DDS statuses of each topic's reader
+        self.pending_requests = set()  # Ids of requests waiting for a response
+        self.responses = {}  # Responses taken on behalf of another pending request
+        self._request_lock = threading.Lock()
+        self._create_lock = threading.RLock()  # Topic, writer and response reader creation
         self.main_loop = asyncio.get_event_loop()
     
+    @classmethod
+    def _get_participant(cls, domain_id, interface, profile="default"):
+        """Return the DomainParticipant for (domain_id, interface), creating it with the matching configuration on first use."""
+        with cls._participants_lock:
+            key = (domain_id, interface)
+            if key not in cls._participants:
+                # CycloneDDS reads the configuration once per domain, a domain can't be bound to two interfaces
+                for other_domain, other_interface in cls._participants:
+                    if other_domain == domain_id:
+                        raise ValueError(f"DDS domain {domain_id} is already bound to interface {other_interface}, "
+                                         f"use a different domain_id for robots on {interface}")
+
+                cls._set_network(interface, domain_id, profile)
+                cls._participants[key] = DomainParticipant(domain_id=domain_id)
+                cls._participant_profiles[key] = profile
+                logger.info(f"Created DomainParticipant for domain {domain_id} on {interface}")
+            elif cls._participant_profiles[key] != profile:
+                logger.warning(f"DDS domain {domain_id} on {interface} already runs with profile "
+                               f"{cls._participant_profiles[key]}, ignoring profile {profile}")
+            return cls._participants[key]
+
     def _create_topic(self, topic, data_type):  
 
         if topic not in self.topics:
-            self.topics[topic] = Topic(self.participant, topic, data_type) 
-            # time.sleep(2)
+            with self._create_lock:
+                if topic not in self.topics:
+                    # Topic QoS comes from DDS_TOPIC_QOS, readers and writers may override it
+                    self.topics[topic] = Topic(self.participant, topic, data_type, qos=get_qos(topic))
+                    # time.sleep(2)
         return self.topics[topic]
 
-    def publish(self, topic, data, data_type):
-
-        topic_instance = self._create_topic(topic, data_type)
-
+    def publish(self, topic, data, data_type, qos=None):
+        """
+        Publish a sample on a topic. `qos` overrides the QoS of DDS_TOPIC_QOS (a Qos, a profile name or a dict of settings),
+        it only takes effect when the writer for the topic is created.
+        """
         # Check if a writer for this topic already exists, if not, create it
-        if topic not in self.writers:
-            self.writers[topic] = DataWriter(self.participant, topic_instance)
-            time.sleep(0.5) #Wait a bit after topic creation
-
-        writer = self.writers[topic]
+        writer = self.writers.get(topic)
+        if writer is None:
+            with self._create_lock:
+                writer = self.writers.get(topic)
+                if writer is None:
+                    topic_instance = self._create_topic(topic, data_type)
+                    writer = DataWriter(self.participant, topic_instance, qos=get_qos(topic, qos))
+                    time.sleep(0.5) #Wait a bit after topic creation
+                    # Published only once discovered, concurrent callers wait on the lock instead of writing too early
+                    self.writers[topic] = writer
 
         logger.debug(f"Data to publish: {data}")
         writer.write(data)
 
-    def subscribe(self, topic, data_type, callback=None):
+    def subscribe(self, topic, data_type=None, callback=None, qos=None, max_rate_hz=None, every_nth=None):
+        """
+        Subscribe to a topic, `callback` is awaited on the running event loop for every sample.
+        `qos` overrides the QoS of DDS_TOPIC_QOS (a Qos, a profile name or a dict of settings) when the reader is created.
+
+        `max_rate_hz` and `every_nth` decimate the samples delivered to this callback. Samples are dropped in the
+        listener thread, before anything is scheduled on the event loop. To also filter on the DDS side, pass
+        qos={"time_based_filter_ms": ...}; it applies to the reader and therefore to every callback of the topic.
+        """
+        # Fall back to the type registered for the topic when no type is given
+        if data_type is None:
+            data_type = type_registry.get_type_for_topic(topic)
+
         # Initialize callback list for the topic if it does not exist
         if topic not in self.callbacks:
             self.callbacks[topic] = []
 
         # Add the callback to the list of callbacks for this topic if it's not already present
-        if callback not in self.callbacks[topic]:
+        if callback is not None and callback not in self.callbacks[topic]:
             self.callbacks[topic].append(callback)
             logger.debug(f"Added new callback for {topic}")
 
+        topic_filters = self.filters.setdefault(topic, {})
+        if max_rate_hz is not None or every_nth is not None:
+            topic_filters[callback] = SampleFilter(max_rate_hz, every_nth)
+        else:
+            topic_filters.pop(callback, None)
+
         if topic not in self.readers:
-            topic_instance = self._create_topic(topic, data_type)
-            current_loop = asyncio.get_running_loop()
-
-            class CustomListener(Listener):
-                def __init__(self, callbacks, topic, current_loop):
-                    super().__init__()
-                    self.callbacks = callbacks
-                    self.topic = topic
-                    self.current_loop = current_loop
-
-                def on_data_available(self, reader):
-                    samples = reader.take(N=100)
-                    for sample in samples:
-                        if sample.sample_info.valid_data:
-                            for cb in self.callbacks.get(self.topic, []):
-                                asyncio.run_coroutine_threadsafe(cb(sample), self.current_loop)
-                        else:
-                            logger.error("Received invalid data.")
+            self._create_reader(topic, data_type, qos)
+
+        # The reader may have been created by subscribe_sync, outside of any event loop
+        if self.loops.get(topic) is None and callback is not None:
+            self.loops[topic] = asyncio.get_running_loop()
+
+    def subscribe_sync(self, topic, data_type=None, callback=None, qos=None, max_rate_hz=None, every_nth=None):
+        """
+        Subscribe with a plain function called directly in the CycloneDDS listener thread, no event loop involved.
+        The callback must return quickly; it shares the reader of the topic with the asyncio callbacks.
+        latest(topic) gives the most recent sample of any subscribed topic without a callback.
+        """
+        if data_type is None:
+            data_type = type_registry.get_type_for_topic(topic)
+
+        callbacks = self.callbacks.setdefault(topic, [])
+        if callback is not None and callback not in callbacks:
+            callbacks.append(callback)
+            self.sync_callbacks.setdefault(topic, set()).add(callback)
+
+        topic_filters = self.filters.setdefault(topic, {})
+        if max_rate_hz is not None or every_nth is not None:
+            topic_filters[callback] = SampleFilter(max_rate_hz, every_nth)
+        else:
+            topic_filters.pop(callback, None)
+
+        if topic not in self.readers:
+            self._create_reader(topic, data_type, qos)
+
+    def _create_reader(self, topic, data_type, qos=None):
+        """
+        Create the reader of a topic. Samples are dispatched to the callbacks from a CycloneDDS listener,
+        or by the WaitSet engine threads when the engine is enabled.
+        """
+        topic_instance = self._create_topic(topic, data_type)
+        try:
+            self.loops[topic] = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loops[topic] = None
+
+        class CustomListener(Listener):
+            def __init__(self, communicator, topic):
+                super().__init__()
+                self.communicator = communicator
+                self.topic = topic
+
+            def on_data_available(self, reader):
+                self.communicator._dispatch(self.topic, reader.take(N=100))
+
+            def on_liveliness_changed(self, reader, status):
+                self.communicator._dispatch_status(self.topic, "liveliness_changed", status)
 
+            def on_requested_deadline_missed(self, reader, status):
+                self.communicator._dispatch_status(self.topic, "deadline_missed", status)
+
+        if self.engine is None:
             # Create the listener and data reader
-            listener = CustomListener(self.callbacks, topic, current_loop)
-            reader = DataReader(self.participant, topic_instance, listener=listener)
-            self.readers[topic] = reader
-            logger.info(f"Subscribed to {topic}")
+            listener = CustomListener(self, topic)
+            reader = DataReader(self.participant, topic_instance, qos=get_qos(topic, qos), listener=listener)
+            self.listeners[topic] = listener
+        else:
+            reader = DataReader(self.participant, topic_instance, qos=get_qos(topic, qos))
+            self.engine.add_reader(topic, reader)
+        self.readers[topic] = reader
+        logger.info(f"Subscribed to {topic}")
+
+    def _dispatch(self, topic, samples):
+        """Deliver samples taken from the reader of a topic, called from the listener or an engine thread."""
+        now = time.monotonic()
+        callbacks = self.callbacks.get(topic, [])
+        filters = self.filters.get(topic, {})
+        sync_callbacks = self.sync_callbacks.get(topic, ())
+        loop = self.loops.get(topic)
+        latency_monitor = self.latency_monitor
+        for sample in samples:
+            if sample.sample_info.valid_data:
+                if latency_monitor is not None:
+                    latency_monitor.observe(topic, sample, now)
+                self.latest_samples[topic] = sample
+                for cb in callbacks:
+                    sample_filter = filters.get(cb)
+                    if sample_filter is not None and not sample_filter.accept(now):
+                        continue
+                    if cb in sync_callbacks:
+                        try:
+                            cb(sample)
+                        except Exception as e:
+                            logger.error(f"Callback for {topic} failed: {e}")
+                    else:
+                        asyncio.run_coroutine_threadsafe(cb(sample), loop)
+            else:
+                logger.error("Received invalid data.")
+
+    def add_status_callback(self, topic, callback):
+        """
+        Register `callback(kind, status)` for the DDS statuses of a topic's reader, called in the listener thread:
+        "liveliness_changed" (status.alive_count is the number of live writers) and "deadline_missed" (only with a
+        deadline_ms QoS). Statuses are delivered by the reader listeners, not by the WaitSet engine.
+        """
+        self.status_callbacks.setdefault(topic, []).append(callback)
+
+    def remove_status_callback(self, topic, callback):
+        callbacks = self.status_callbacks.get(topic, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def _dispatch_status(self, topic, kind, status):
+        for callback in self.status_callbacks.get(topic, ()):
+            try:
+                callback(kind, status)
+            except Exception as e:
+                logger.error(f"Status callback for {topic} failed: {e}")
+
+    def enable_latency_monitor(self, clock_factory=ClockSync):
+        """
+        Estimate the robot clocks from the stamps of received messages and request round-trips, annotate every stamped
+        sample with its `transport_latency` (seconds) and keep latency histograms per topic (see communicator.clockSync).
+        `clock_factory` creates the ClockSync of each topic.
+        """
+        if self.latency_monitor is None:
+            self.latency_monitor = LatencyMonitor(clock_factory)
+        return self.latency_monitor
+
+    def use_waitset_engine(self, threads=1, batch=100, affinity=None, priority=None):
+        """
+        Service all subscriptions of this communicator from dedicated threads blocking on DDS WaitSets, instead of
+        one CycloneDDS listener per reader. Must be called before the first subscription, stop_waitset_engine() stops it.
+        See communicator.cyclonedds.waitsetEngine.WaitSetEngine for the parameters.
+        """
+        if self.listeners:
+            raise RuntimeError("The WaitSet engine must be enabled before subscribing to any topic.")
+        if self.engine is None:
+            self.engine = WaitSetEngine(self.participant, self._dispatch, threads=threads, batch=batch,
+                                        affinity=affinity, priority=priority)
+            self.engine.start()
+        return self.engine
+
+    def stop_waitset_engine(self):
+        """
+        Stop the WaitSet engine threads. The subscriptions they service are closed first, their readers have no
+        listener to fall back to; topics subscribed afterwards use listeners again.
+        """
+        if self.engine is None:
+            return
+        for topic in list(self.callbacks):
+            self.unsubscribe(topic)
+        self.engine.stop()
+        self.engine = None
+
+    def subscribe_by_name(self, name, callback=None, qos=None, max_rate_hz=None, every_nth=None):
+        """
+        Subscribe to a topic by its name in DDS_TOPICS (e.g. "LOW_STATE"), the IDL type is looked up in the type registry.
+        Returns the resolved topic so it can be passed to unsubscribe.
+        """
+        topic = self.get_topic_by_name(name)
+        self.subscribe(topic, type_registry.get_type_for_topic(topic), callback, qos, max_rate_hz, every_nth)
+        return topic
 
     def unsubscribe(self, topic, callback=None):
         """Unsubscribe from a topic immediately without deferred actions."""
@@ -108,6 +361,8 @@ class DDSCommunicator(CommunicatorWrapper):
         if callback:
             if callback in self.callbacks.get(topic, []):
                 self.callbacks[topic].remove(callback)
+                self.filters.get(topic, {}).pop(callback, None)
+                self.sync_callbacks.get(topic, set()).discard(callback)
                 logger.info(f"Callback removed from {topic}, callback: {callback}")
             else:
                 logger.warning(f"Callback not found for {topic}")
@@ -115,85 +370,187 @@ class DDSCommunicator(CommunicatorWrapper):
         # If no callbacks remain, or no specific callback was specified, clean up immediately
         if not callback or not self.callbacks[topic]:
             """Clean up reader and callback resources for a topic."""
+            if self.engine is not None:
+                self.engine.remove_reader(topic)  # Detach from the WaitSet before the reader goes away
             if topic in self.readers:
                 del self.readers[topic]  # Clean up the data reader
             if topic in self.callbacks:
                 del self.callbacks[topic]  # Remove all callbacks associated with the topic
+            self.filters.pop(topic, None)
+            self.sync_callbacks.pop(topic, None)
+            self.listeners.pop(topic, None)
+            self.loops.pop(topic, None)
+            self.latest_samples.pop(topic, None)
             logger.info(f"Unsubscribed from {topic}")
 
     
-    async def publishReq(self, topic, requestData, timeout=5):
-        if not topic.endswith("/request"):
-            logger.error("The request should end with '/request'")
-            return
-        
+    def _build_request(self, requestData):
+        """Return (request_id, Request_) for the request data passed to publishReq/request."""
+        # IDL types are resolved lazily, only the first request pays for importing them
+        Request_ = type_registry.get_type(REQUEST_TYPENAME)
+        RequestHeader_ = type_registry.get_type("unitree_api.msg.dds_.RequestHeader_")
+        RequestIdentity_ = type_registry.get_type("unitree_api.msg.dds_.RequestIdentity_")
+        RequestLease_ = type_registry.get_type("unitree_api.msg.dds_.RequestLease_")
+        RequestPolicy_ = type_registry.get_type("unitree_api.msg.dds_.RequestPolicy_")
+
         # Prepare the request message
-        self.current_id += 1
-        request_id = requestData.get('request_id', self.current_id)
+        request_id = requestData.get('request_id')
+        if request_id is None:
+            request_id = next(self.request_ids)
         identity = RequestIdentity_(request_id, requestData.get('api_id', 0))
         lease = RequestLease_(requestData.get('lease', 0))
         policy = RequestPolicy_(priority=requestData.get('priority', 0), noreply=requestData.get('noreply', False))
         header = RequestHeader_(identity=identity, lease=lease, policy=policy)
-        parameter = json.dumps(requestData.get('parameter'), ensure_ascii=False) if requestData.get('parameter') is not None else ''
-        request = Request_(header=header, parameter=parameter, binary=[])
-
-        if not requestData.get('noreply', False):
-            response_topic_name = topic.replace("/request", "/response")
-            # Make sure the topic and reader are ready
-            topic_instance = self._create_topic(response_topic_name, Response_)
-            if response_topic_name not in self.readers:
-                self.readers[response_topic_name] = DataReader(self.participant, topic_instance)
-
-            # Send the request
-            self.publish(topic, request, Request_)
-            logger.info(f"Request sent to {topic} with id: {request_id}")
-
-            # Polling for response
-            start_time = time.time()
-            while (time.time() - start_time) < timeout:
-                samples = self.readers[response_topic_name].take(N=1)
-                for sample in samples:
-                    if sample.sample_info.valid_data and sample.header.identity.id == request_id:
-                        if sample.header.status.code == 0:
-                            logger.info("Request successful with status code 0.")
-                            return sample  # Return the whole response object if successful
-                        else:
-                            error_description = DDS_ERROR_DESCRIPTIONS.get(sample.header.status.code, "Unknown error code")
-                            logger.error(f"Request failed with status code {sample.header.status.code}: {error_description}")
-                            return None
-                        
-            logger.error(f"Response from {response_topic_name} timed out")
-        else:
+        # Strings are parameters the client already encoded as JSON, encoding them again would send a JSON string literal
+        parameter = requestData.get('parameter')
+        if parameter is None:
+            parameter = ''
+        elif not isinstance(parameter, str):
+            parameter = json.dumps(parameter, ensure_ascii=False)
+        return request_id, Request_(header=header, parameter=parameter, binary=[])
+
+    def _send_request(self, topic, requestData, qos=None):
+        """Publish a request, returns (request_id, response topic) or (request_id, None) when no reply is expected."""
+        request_id, request = self._build_request(requestData)
+        Request_ = type_registry.get_type(REQUEST_TYPENAME)
+
+        if requestData.get('noreply', False):
             # Send the request without expecting a response
-            self.publish(topic, request, Request_)
+            self.publish(topic, request, Request_, qos)
             logger.info(f"Request sent with no reply expected to {topic} with id: {request_id}")
+            return request_id, None
+
+        response_topic_name = topic.replace("/request", "/response")
+        # Make sure the topic and reader are ready
+        if response_topic_name not in self.readers:
+            with self._create_lock:
+                if response_topic_name not in self.readers:
+                    topic_instance = self._create_topic(response_topic_name, type_registry.get_type(RESPONSE_TYPENAME))
+                    self.readers[response_topic_name] = DataReader(self.participant, topic_instance, qos=get_qos(response_topic_name, qos))
+
+        # Register the id before sending, so a concurrent caller taking the response keeps it for us
+        with self._request_lock:
+            self.pending_requests.add(request_id)
+
+        # Send the request
+        self.publish(topic, request, Request_, qos)
+        logger.info(f"Request sent to {topic} with id: {request_id}")
+        return request_id, response_topic_name
+
+    def _take_response(self, response_topic_name, request_id):
+        """
+        Return the response to request_id if it has arrived, otherwise None. Responses to other requests in flight
+        (from the async and the synchronous API alike) are kept until their caller picks them up.
+        """
+        with self._request_lock:
+            response = self.responses.pop(request_id, None)
+            if response is not None:
+                return response
+            for sample in self.readers[response_topic_name].take(N=16):
+                if not sample.sample_info.valid_data:
+                    continue
+                sample_id = sample.header.identity.id
+                if sample_id == request_id:
+                    response = sample
+                elif sample_id in self.pending_requests:
+                    self.responses[sample_id] = sample
+            return response
+
+    def _finish_request(self, request_id, response, response_topic_name, sent_time):
+        """Release the bookkeeping of a request and return the response if it was successful."""
+        with self._request_lock:
+            self.pending_requests.discard(request_id)
+            self.responses.pop(request_id, None)
+
+        if response is not None and self.latency_monitor is not None:
+            self.latency_monitor.add_round_trip(time.monotonic() - sent_time)
+
+        if response is None:
+            logger.error(f"Response from {response_topic_name} timed out")
             return None
-
+        if response.header.status.code == 0:
+            logger.info("Request successful with status code 0.")
+            return response  # Return the whole response object if successful
+        error_description = DDS_ERROR_DESCRIPTIONS.get(response.header.status.code, "Unknown error code")
+        logger.error(f"Request failed with status code {response.header.status.code}: {error_description}")
         return None
 
-    
-    def get_topic_by_name(self, name):
-        return DDS_TOPICS[name]
-    
-    def _set_network(self, interface):
+    def prepare_request(self, topic, requestData, qos=None, writer=None):
+        """
+        Build a request once, together with a DataWriter of its own, for a command that must go out without delay
+        (e.g. an emergency Damp from a watchdog thread). The request is sent without reply; see PreparedRequest.
+        `writer` reuses the writer of another PreparedRequest of the same topic, e.g. for the steps of a mission.
+        """
+        if not topic.endswith("/request"):
+            raise ValueError("The request should end with '/request'")
+        _, request = self._build_request(dict(requestData, noreply=True))
+        if writer is None:
+            topic_instance = self._create_topic(topic, type_registry.get_type(REQUEST_TYPENAME))
+            writer = DataWriter(self.participant, topic_instance, qos=get_qos(topic, qos))
+            time.sleep(0.5)  # Let discovery match the new writer before it is needed
+        return PreparedRequest(writer, request, self.request_ids)
+
+    async def publishReq(self, topic, requestData, timeout=5, qos=None, poll_interval=0.0005):
+        if not topic.endswith("/request"):
+            logger.error("The request should end with '/request'")
+            return
+
+        sent_time = time.monotonic()
+        if topic in self.writers:
+            request_id, response_topic_name = self._send_request(topic, requestData, qos)
+        else:
+            # The first request creates the writer and waits for its discovery, off the event loop
+            request_id, response_topic_name = await asyncio.get_running_loop().run_in_executor(
+                None, self._send_request, topic, requestData, qos)
+        if response_topic_name is None:
+            return None
 
-        current_path = os.path.dirname(os.path.abspath(__file__))
-        cyclonedds_config_path = os.path.join(current_path, "cyclonedds.xml")
-        tree = ET.parse(cyclonedds_config_path)
-        root = tree.getroot()
+        # Polling for response, yielding to the event loop between polls so concurrent requests and callbacks run
+        deadline = time.monotonic() + timeout
+        response = self._take_response(response_topic_name, request_id)
+        while response is None and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            response = self._take_response(response_topic_name, request_id)
 
-        # Find the NetworkInterface element and change its name attribute
-        for network_interface in root.findall(".//NetworkInterface"):
-            network_interface.set("name", interface)  # Change the interface name
+        return self._finish_request(request_id, response, response_topic_name, sent_time)
 
-        # Save the modified XML back to the file
-        tree.write(cyclonedds_config_path)
+    def request(self, topic, requestData, timeout=5, qos=None, poll_interval=0.0005):
+        """
+        Blocking counterpart of publishReq for threads that don't run an event loop.
+        Shares the writers and response readers with publishReq; returns the response, or None on error/timeout or noreply.
+        """
+        if not topic.endswith("/request"):
+            logger.error("The request should end with '/request'")
+            return None
 
-         # Set the CYCLONEDDS_URI environment variable to point to the updated config file
-        os.environ['CYCLONEDDS_URI'] = cyclonedds_config_path
-        logger.info(f"CYCLONEDDS_URI set to: {cyclonedds_config_path}")
+        sent_time = time.monotonic()
+        request_id, response_topic_name = self._send_request(topic, requestData, qos)
+        if response_topic_name is None:
+            return None
 
-        logger.info(f"DDS Domain configured with network interface {interface}")
+        deadline = time.monotonic() + timeout
+        response = self._take_response(response_topic_name, request_id)
+        while response is None and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            response = self._take_response(response_topic_name, request_id)
 
+        return self._finish_request(request_id, response, response_topic_name, sent_time)
 
+    def latest(self, topic):
+        """
+        Return the latest valid sample received on a subscribed topic without blocking, or None.
+        The first call on a topic that isn't subscribed yet subscribes to it (the type comes from the type registry).
+        """
+        sample = self.latest_samples.get(topic)
+        if sample is None and topic not in self.readers:
+            self.subscribe_sync(topic)
+        return sample
 
+    def get_topic_by_name(self, name):
+        return DDS_TOPICS[name]
+    
+    @staticmethod
+    def _set_network(interface, domain_id=0, profile="default"):
+        # The configuration is passed inline: no file is read or written, and it is picked up by the next domain created
+        os.environ['CYCLONEDDS_URI'] = build_config(interface, domain_id, profile)
+        logger.info(f"DDS Domain {domain_id} configured with network interface {interface}, profile {profile}")
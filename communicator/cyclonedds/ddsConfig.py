@@ -0,0 +1,46 @@
+import logging
+import xml.etree.ElementTree as ET
+from communicator.constants import DDS_CONFIG_PROFILES
+
+logger = logging.getLogger(__name__)
+
+
+def build_config(interface, domain_id=0, profile="default"):
+    """
+    Builds a CycloneDDS XML configuration in memory, suitable for the CYCLONEDDS_URI environment variable.
+
+    Parameters:
+        interface (str): Network interface connected to the robot, e.g. "eth0" or "wlan0".
+        domain_id (int): DDS domain the configuration applies to.
+        profile (str or dict): Name of a profile in DDS_CONFIG_PROFILES, or a dict of settings in the same format.
+
+    Returns:
+        str: The configuration, starting with <CycloneDDS>.
+    """
+    if isinstance(profile, str):
+        if profile not in DDS_CONFIG_PROFILES:
+            raise ValueError(f"Unknown DDS config profile '{profile}', available: {', '.join(DDS_CONFIG_PROFILES)}")
+        settings = DDS_CONFIG_PROFILES[profile]
+    else:
+        settings = profile
+
+    root = ET.Element("CycloneDDS")
+    domain = ET.SubElement(root, "Domain", Id=str(domain_id))
+    general = ET.SubElement(domain, "General")
+    interfaces = ET.SubElement(general, "Interfaces")
+    ET.SubElement(interfaces, "NetworkInterface", name=interface, priority="default", multicast="default")
+    discovery = ET.SubElement(domain, "Discovery")
+    ET.SubElement(discovery, "EnableTopicDiscoveryEndpoints").text = "true"
+
+    for path, value in settings.items():
+        path, _, attribute = path.partition("@")
+        element = domain
+        for tag in path.split("/"):
+            child = element.find(tag)
+            element = child if child is not None else ET.SubElement(element, tag)
+        if attribute:
+            element.set(attribute, value)
+        else:
+            element.text = value
+
+    return ET.tostring(root, encoding="unicode")
@@ -0,0 +1,76 @@
+import logging
+from cyclonedds.core import Qos, Policy
+from cyclonedds.util import duration
+from communicator.constants import DDS_QOS_PROFILES, DDS_TOPIC_QOS
+
+logger = logging.getLogger(__name__)
+
+# Qos objects per topic, built once
+_topic_qos_cache = {}
+
+
+def topic_settings(topic):
+    """ Returns the QoS settings of a topic from DDS_TOPIC_QOS, request/response topics use the "rpc" profile. """
+    profile = DDS_TOPIC_QOS.get(topic)
+    if profile is None and (topic.endswith("/request") or topic.endswith("/response")):
+        profile = "rpc"
+    return DDS_QOS_PROFILES[profile] if profile else {}
+
+
+def build_qos(settings):
+    """ Converts QoS settings (see DDS_QOS_PROFILES) into a cyclonedds Qos, or None when there is nothing to set. """
+    policies = []
+
+    reliability = settings.get("reliability")
+    if reliability == "reliable":
+        policies.append(Policy.Reliability.Reliable(max_blocking_time=duration(milliseconds=settings.get("max_blocking_time_ms", 100))))
+    elif reliability == "best_effort":
+        policies.append(Policy.Reliability.BestEffort)
+    elif reliability is not None:
+        raise ValueError(f"Unknown reliability '{reliability}'")
+
+    history = settings.get("history")
+    if history == "all":
+        policies.append(Policy.History.KeepAll)
+    elif history is not None:
+        policies.append(Policy.History.KeepLast(history))
+
+    durability = settings.get("durability")
+    if durability == "volatile":
+        policies.append(Policy.Durability.Volatile)
+    elif durability == "transient_local":
+        policies.append(Policy.Durability.TransientLocal)
+    elif durability is not None:
+        raise ValueError(f"Unknown durability '{durability}'")
+
+    time_based_filter = settings.get("time_based_filter_ms")
+    if time_based_filter:
+        policies.append(Policy.TimeBasedFilter(filter_time=duration(milliseconds=time_based_filter)))
+
+    deadline = settings.get("deadline_ms")
+    if deadline:
+        # A reader only matches writers offering a deadline at least as short, the Go2 writers offer none
+        policies.append(Policy.Deadline(duration(milliseconds=deadline)))
+
+    return Qos(*policies) if policies else None
+
+
+def get_qos(topic, override=None):
+    """
+    Returns the Qos for a topic, or None for the CycloneDDS defaults.
+
+    Parameters:
+        topic (str): Topic name, looked up in DDS_TOPIC_QOS.
+        override: Per-call override. Either a cyclonedds Qos used as is, the name of a profile in DDS_QOS_PROFILES,
+            or a dict of settings merged over the topic's settings.
+    """
+    if override is None:
+        if topic not in _topic_qos_cache:
+            _topic_qos_cache[topic] = build_qos(topic_settings(topic))
+        return _topic_qos_cache[topic]
+
+    if isinstance(override, Qos):
+        return override
+    if isinstance(override, str):
+        return build_qos(DDS_QOS_PROFILES[override])
+    return build_qos({**topic_settings(topic), **override})
@@ -0,0 +1,79 @@
+import importlib
+import logging
+import threading
+from communicator.constants import DDS_TOPICS, DDS_TOPIC_TYPES
+
+logger = logging.getLogger(__name__)
+
+# All generated IDL packages live below this package (see communicator/idl)
+IDL_PACKAGE = "communicator.idl"
+
+REQUEST_TYPENAME = "unitree_api.msg.dds_.Request_"
+RESPONSE_TYPENAME = "unitree_api.msg.dds_.Response_"
+
+
+class TypeRegistry:
+    """
+    TypeRegistry: Resolves IDL types lazily, either by typename (e.g. "unitree_go.msg.dds_.LowState_")
+    or by the topic they are published on. Nothing under communicator/idl is imported until a type is
+    requested for the first time; at that point its module is imported and the cyclonedds serializer is built,
+    so every later lookup is a plain dictionary hit.
+    """
+    def __init__(self):
+        self._types = {}        # typename -> resolved IDL class
+        self._topic_types = {}  # topic -> typename
+        self._lock = threading.Lock()
+
+    def register_topic(self, topic, typename):
+        """ Associates a topic with the typename of the messages published on it. """
+        self._topic_types[topic] = typename
+
+    def get_typename(self, topic):
+        try:
+            return self._topic_types[topic]
+        except KeyError:
+            raise KeyError(f"No IDL type registered for topic {topic}") from None
+
+    def get_type(self, typename):
+        """ Returns the IDL class for a typename, importing it on first use. """
+        datatype = self._types.get(typename)
+        if datatype is None:
+            with self._lock:
+                datatype = self._types.get(typename)
+                if datatype is None:
+                    datatype = self._load(typename)
+                    self._types[typename] = datatype
+        return datatype
+
+    def get_type_for_topic(self, topic):
+        """ Returns the IDL class for the messages published on a topic, importing it on first use. """
+        return self.get_type(self.get_typename(topic))
+
+    def topics(self):
+        """ Returns every topic with a registered type. """
+        return list(self._topic_types)
+
+    def is_loaded(self, typename):
+        return typename in self._types
+
+    @staticmethod
+    def _load(typename):
+        module_name, _, type_name = typename.rpartition(".")
+        module = importlib.import_module(f"{IDL_PACKAGE}.{module_name}")
+        datatype = getattr(module, type_name)
+
+        # Build the (de)serialization machine now instead of on the first write/read of the hot path
+        datatype.__idl__.populate()
+        logger.debug(f"Loaded IDL type {typename}")
+        return datatype
+
+
+# Shared registry: typed topics from constants, request/response topics known from their naming convention
+type_registry = TypeRegistry()
+for _topic, _typename in DDS_TOPIC_TYPES.items():
+    type_registry.register_topic(_topic, _typename)
+for _topic in DDS_TOPICS.values():
+    if _topic.endswith("/request"):
+        type_registry.register_topic(_topic, REQUEST_TYPENAME)
+    elif _topic.endswith("/response"):
+        type_registry.register_topic(_topic, RESPONSE_TYPENAME)
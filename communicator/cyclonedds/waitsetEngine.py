@@ -0,0 +1,139 @@
+import os
+import logging
+import threading
+from cyclonedds.core import WaitSet, ReadCondition, GuardCondition, SampleState, ViewState, InstanceState
+from cyclonedds.util import duration
+
+logger = logging.getLogger(__name__)
+
+class WaitSetEngine:
+    """
+    WaitSetEngine: Services DDS readers from a fixed set of dedicated threads instead of CycloneDDS listener threads.
+
+    Every thread blocks on its own WaitSet holding the read conditions of the readers assigned to it (round-robin, in
+    subscription order). When woken up it takes up to `batch` samples from each of its readers, in a fixed order, and
+    passes them to `dispatch(topic, samples)`.
+
+    Parameters:
+        participant: DomainParticipant owning the readers.
+        dispatch: Called with (topic, samples) from the engine threads.
+        threads (int): Number of engine threads.
+        batch (int): Maximum number of samples taken from a reader per wake-up.
+        affinity: CPU ids the threads are pinned to, either one iterable of ints for all threads or a list with one
+            iterable per thread (Linux only).
+        priority (int): SCHED_FIFO priority (1-99) of the threads; needs CAP_SYS_NICE, falls back to the default
+            scheduling with a warning otherwise (Linux only).
+        timeout_ms (int): Upper bound of a single wait, the threads check for shutdown at this interval.
+    """
+    def __init__(self, participant, dispatch, threads=1, batch=100, affinity=None, priority=None, timeout_ms=100):
+        if threads < 1:
+            raise ValueError("The engine needs at least one thread.")
+        self.participant = participant
+        self.dispatch = dispatch
+        self.batch = batch
+        self.priority = priority
+        self.timeout = duration(milliseconds=timeout_ms)
+        self.affinity = self._per_thread_affinity(affinity, threads)
+
+        self._workers = [_EngineThread(self, index) for index in range(threads)]
+        self._assignments = {}  # topic -> worker
+        self._next_worker = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _per_thread_affinity(affinity, threads):
+        if affinity is None:
+            return [None] * threads
+        affinity = list(affinity)
+        if not affinity:
+            raise ValueError("affinity must list at least one CPU, use None for no pinning.")
+        if isinstance(affinity[0], int):
+            return [set(affinity)] * threads
+        per_thread = [set(affinity[index % len(affinity)]) for index in range(threads)]
+        if not all(per_thread):
+            raise ValueError("Every thread's affinity must list at least one CPU.")
+        return per_thread
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self):
+        """ Stops the threads and waits for them to exit; the readers attached stay open. """
+        for worker in self._workers:
+            worker.stop()
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.join()
+
+    def add_reader(self, topic, reader):
+        with self._lock:
+            worker = self._workers[self._next_worker]
+            self._next_worker = (self._next_worker + 1) % len(self._workers)
+            self._assignments[topic] = worker
+        worker.add_reader(topic, reader)
+
+    def remove_reader(self, topic):
+        with self._lock:
+            worker = self._assignments.pop(topic, None)
+        if worker is not None:
+            worker.remove_reader(topic)
+
+
+class _EngineThread(threading.Thread):
+    def __init__(self, engine, index):
+        super().__init__(name=f"dds-waitset-{index}", daemon=True)
+        self.engine = engine
+        self.index = index
+        self.waitset = WaitSet(engine.participant)
+        # Wakes the thread up for shutdown
+        self.guard = GuardCondition(engine.participant)
+        self.waitset.attach(self.guard)
+        self.readers = ()  # (topic, reader, condition), replaced as a whole so the thread can iterate without locking
+        self.running = True
+        self._lock = threading.Lock()
+
+    def add_reader(self, topic, reader):
+        condition = ReadCondition(reader, SampleState.NotRead | ViewState.Any | InstanceState.Any)
+        with self._lock:
+            self.readers = self.readers + ((topic, reader, condition),)
+            self.waitset.attach(condition)
+
+    def remove_reader(self, topic):
+        with self._lock:
+            for entry in self.readers:
+                if entry[0] == topic:
+                    self.waitset.detach(entry[2])
+            self.readers = tuple(entry for entry in self.readers if entry[0] != topic)
+
+    def stop(self):
+        self.running = False
+        self.guard.set(True)
+
+    def _configure_scheduling(self):
+        affinity = self.engine.affinity[self.index]
+        if affinity:
+            try:
+                # pid 0 is the calling thread on Linux
+                os.sched_setaffinity(0, affinity)
+            except (AttributeError, OSError) as e:
+                logger.warning(f"{self.name}: could not set CPU affinity {affinity}: {e}")
+        if self.engine.priority is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.engine.priority))
+            except (AttributeError, OSError) as e:
+                logger.warning(f"{self.name}: could not set SCHED_FIFO priority {self.engine.priority}: {e}")
+
+    def run(self):
+        self._configure_scheduling()
+        dispatch = self.engine.dispatch
+        batch = self.engine.batch
+        while self.running:
+            self.waitset.wait(self.engine.timeout)
+            for topic, reader, _ in self.readers:
+                samples = reader.take(N=batch)
+                if samples:
+                    try:
+                        dispatch(topic, samples)
+                    except Exception as e:
+                        logger.error(f"{self.name}: dispatching {topic} failed: {e}")
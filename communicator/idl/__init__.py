@@ -5,9 +5,18 @@
 
 """
 
-from . import builtin_interfaces
-from . import geometry_msgs
-from . import std_msgs
-from . import unitree_api
-from . import unitree_go
+import importlib
+
 __all__ = ["builtin_interfaces","geometry_msgs", "std_msgs", "unitree_api", "unitree_go"]
+
+def __getattr__(name):
+    # Message packages are imported on first access, see communicator/cyclonedds/typeRegistry.py
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return __all__
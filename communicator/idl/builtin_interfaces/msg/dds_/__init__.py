@@ -5,5 +5,18 @@
 
 """
 
-from ._Time_ import Time_
+import importlib
+
 __all__ = ["Time_", ]
+
+def __getattr__(name):
+    # Types are imported on first access so that only the modules a process actually uses are loaded
+    if name in __all__:
+        value = getattr(importlib.import_module(f"._{name}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return __all__
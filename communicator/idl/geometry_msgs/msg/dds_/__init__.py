@@ -5,19 +5,18 @@
 
 """
 
-from ._Point32_ import Point32_
-from ._Point_ import Point_
-from ._PointStamped_ import PointStamped_
-from ._Pose2D_ import Pose2D_
-from ._Pose_ import Pose_
-from ._PoseStamped_ import PoseStamped_
-from ._PoseWithCovariance_ import PoseWithCovariance_
-from ._PoseWithCovarianceStamped_ import PoseWithCovarianceStamped_
-from ._Quaternion_ import Quaternion_
-from ._QuaternionStamped_ import QuaternionStamped_
-from ._Twist_ import Twist_
-from ._TwistStamped_ import TwistStamped_
-from ._TwistWithCovariance_ import TwistWithCovariance_
-from ._TwistWithCovarianceStamped_ import TwistWithCovarianceStamped_
-from ._Vector3_ import Vector3_
+import importlib
+
 __all__ = ["Point32_", "Point_", "PointStamped_", "Pose2D_", "Pose_", "PoseStamped_", "PoseWithCovariance_", "PoseWithCovarianceStamped_", "Quaternion_", "QuaternionStamped_", "Twist_", "TwistStamped_", "TwistWithCovariance_", "TwistWithCovarianceStamped_", "Vector3_", ]
+
+def __getattr__(name):
+    # Types are imported on first access so that only the modules a process actually uses are loaded
+    if name in __all__:
+        value = getattr(importlib.import_module(f"._{name}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return __all__
@@ -5,12 +5,18 @@
 
 """
 
-from ._RequestHeader_ import RequestHeader_
-from ._RequestIdentity_ import RequestIdentity_
-from ._RequestLease_ import RequestLease_
-from ._RequestPolicy_ import RequestPolicy_
-from ._Request_ import Request_
-from ._ResponseHeader_ import ResponseHeader_
-from ._ResponseStatus_ import ResponseStatus_
-from ._Response_ import Response_
+import importlib
+
 __all__ = ["RequestHeader_", "RequestIdentity_", "RequestLease_", "RequestPolicy_", "Request_", "ResponseHeader_", "ResponseStatus_", "Response_", ]
+
+def __getattr__(name):
+    # Types are imported on first access so that only the modules a process actually uses are loaded
+    if name in __all__:
+        value = getattr(importlib.import_module(f"._{name}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return __all__
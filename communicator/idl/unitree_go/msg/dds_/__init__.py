@@ -5,26 +5,18 @@
 
 """
 
-from ._AudioData_ import AudioData_
-from ._BmsCmd_ import BmsCmd_
-from ._BmsState_ import BmsState_
-from ._Error_ import Error_
-from ._Go2FrontVideoData_ import Go2FrontVideoData_
-from ._HeightMap_ import HeightMap_
-from ._IMUState_ import IMUState_
-from ._InterfaceConfig_ import InterfaceConfig_
-from ._LidarState_ import LidarState_
-from ._LowCmd_ import LowCmd_
-from ._LowState_ import LowState_
-from ._MotorCmd_ import MotorCmd_
-from ._MotorState_ import MotorState_
-from ._PathPoint_ import PathPoint_
-from ._Req_ import Req_
-from ._Res_ import Res_
-from ._SportModeCmd_ import SportModeCmd_
-from ._SportModeState_ import SportModeState_
-from ._TimeSpec_ import TimeSpec_
-from ._UwbState_ import UwbState_
-from ._UwbSwitch_ import UwbSwitch_
-from ._WirelessController_ import WirelessController_
+import importlib
+
 __all__ = ["AudioData_", "BmsCmd_", "BmsState_", "Error_", "Go2FrontVideoData_", "HeightMap_", "IMUState_", "InterfaceConfig_", "LidarState_", "LowCmd_", "LowState_", "MotorCmd_", "MotorState_", "PathPoint_", "Req_", "Res_", "SportModeCmd_", "SportModeState_", "TimeSpec_", "UwbState_", "UwbSwitch_", "WirelessController_", ]
+
+def __getattr__(name):
+    # Types are imported on first access so that only the modules a process actually uses are loaded
+    if name in __all__:
+        value = getattr(importlib.import_module(f"._{name}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,355 @@
+import sys
+import time
+import struct
+import logging
+from operator import attrgetter
+from multiprocessing import shared_memory, resource_tracker
+
+logger = logging.getLogger(__name__)
+
+'''
+Shared-memory snapshots of state messages.
+
+- StateLayout: fixed binary layout of a state message, flattening the fields of an IDL sample into a struct.
+- SharedStateSegment: shared-memory segment of fixed-size slots. Each slot holds the latest snapshot written by a single
+  writer and is guarded by a seqlock, so readers in other processes never block the writer and never see a torn snapshot.
+- StatePublisher: subscribes once to state topics (SportModeState_, LowState_) and publishes every decoded sample into a
+  named segment, so local processes (planner, logger, UI) share one DDS reader instead of opening their own.
+- StateReader: attaches to a segment published by a StatePublisher from any process on the same machine.
+'''
+
+class StateLayout:
+    """
+    StateLayout: Fixed binary layout of a state message.
+
+    Parameters:
+        name (str): Name of the layout, stored in the segment so readers can check they attach to the right data.
+        fields (list of tuple): (field name, attribute path on the sample, struct code, count) for each field.
+            Fields with a count greater than 1 are fixed-size arrays. The path may also be a callable taking the sample.
+    """
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.struct = struct.Struct("<" + "".join(f"{count}{code}" for _, _, code, count in fields))
+        self._getters = [(path if callable(path) else attrgetter(path), count > 1) for _, path, _, count in fields]
+
+        # Slices of the flat value tuple belonging to each field
+        self._slices = []
+        offset = 0
+        for field_name, _, _, count in fields:
+            self._slices.append((field_name, offset, offset + count, count > 1))
+            offset += count
+
+    @property
+    def size(self):
+        return self.struct.size
+
+    def flatten(self, sample):
+        """ Returns the values of a sample in layout order, ready to be packed. """
+        values = []
+        for getter, is_array in self._getters:
+            if is_array:
+                values.extend(getter(sample))
+            else:
+                values.append(getter(sample))
+        return values
+
+    def to_dict(self, values):
+        """ Converts a flat value tuple back into a dictionary keyed by field name. """
+        return {name: (values[start:end] if is_array else values[start]) for name, start, end, is_array in self._slices}
+
+
+SPORT_MODE_STATE_LAYOUT = StateLayout("SportModeState_", [
+    ("stamp_sec", "stamp.sec", "i", 1),
+    ("stamp_nanosec", "stamp.nanosec", "I", 1),
+    ("error_code", "error_code", "I", 1),
+    ("mode", "mode", "B", 1),
+    ("progress", "progress", "f", 1),
+    ("gait_type", "gait_type", "B", 1),
+    ("foot_raise_height", "foot_raise_height", "f", 1),
+    ("position", "position", "f", 3),
+    ("body_height", "body_height", "f", 1),
+    ("velocity", "velocity", "f", 3),
+    ("yaw_speed", "yaw_speed", "f", 1),
+    ("range_obstacle", "range_obstacle", "f", 4),
+    ("foot_force", "foot_force", "h", 4),
+    ("foot_position_body", "foot_position_body", "f", 12),
+    ("foot_speed_body", "foot_speed_body", "f", 12),
+    ("quaternion", "imu_state.quaternion", "f", 4),
+    ("gyroscope", "imu_state.gyroscope", "f", 3),
+    ("accelerometer", "imu_state.accelerometer", "f", 3),
+    ("rpy", "imu_state.rpy", "f", 3),
+    ("imu_temperature", "imu_state.temperature", "B", 1),
+])
+
+
+# Go2 reports 20 motor slots in LowState_, the first 12 are the leg joints
+LOW_STATE_MOTORS = 20
+
+LOW_STATE_LAYOUT = StateLayout("LowState_", [
+    ("tick", "tick", "I", 1),
+    ("level_flag", "level_flag", "B", 1),
+    ("quaternion", "imu_state.quaternion", "f", 4),
+    ("gyroscope", "imu_state.gyroscope", "f", 3),
+    ("accelerometer", "imu_state.accelerometer", "f", 3),
+    ("rpy", "imu_state.rpy", "f", 3),
+    ("imu_temperature", "imu_state.temperature", "B", 1),
+    ("motor_mode", lambda s: [m.mode for m in s.motor_state], "B", LOW_STATE_MOTORS),
+    ("q", lambda s: [m.q for m in s.motor_state], "f", LOW_STATE_MOTORS),
+    ("dq", lambda s: [m.dq for m in s.motor_state], "f", LOW_STATE_MOTORS),
+    ("ddq", lambda s: [m.ddq for m in s.motor_state], "f", LOW_STATE_MOTORS),
+    ("tau_est", lambda s: [m.tau_est for m in s.motor_state], "f", LOW_STATE_MOTORS),
+    ("motor_temperature", lambda s: [m.temperature for m in s.motor_state], "B", LOW_STATE_MOTORS),
+    ("motor_lost", lambda s: [m.lost for m in s.motor_state], "I", LOW_STATE_MOTORS),
+    ("bms_soc", "bms_state.soc", "B", 1),
+    ("bms_current", "bms_state.current", "i", 1),
+    ("foot_force", "foot_force", "h", 4),
+    ("foot_force_est", "foot_force_est", "h", 4),
+    ("wireless_remote", "wireless_remote", "B", 40),
+    ("power_v", "power_v", "f", 1),
+    ("power_a", "power_a", "f", 1),
+])
+
+# Layouts of the topics a StatePublisher can share, keyed by their name in DDS_TOPICS
+SHARED_STATE_LAYOUTS = {
+    "SPORT_MOD_STATE": SPORT_MODE_STATE_LAYOUT,
+    "SPORT_MOD_STATE_MF": SPORT_MODE_STATE_LAYOUT,
+    "SPORT_MOD_STATE_LF": SPORT_MODE_STATE_LAYOUT,
+    "LOW_STATE": LOW_STATE_LAYOUT,
+    "LOW_STATE_LF": LOW_STATE_LAYOUT,
+}
+
+
+class SharedStateSegment:
+    """
+    SharedStateSegment: Shared-memory segment holding the latest snapshot of a StateLayout in each of its slots.
+
+    Every slot starts with a sequence counter and the host time of the write (time.monotonic_ns). The writer makes the
+    counter odd before packing the snapshot and even afterwards; readers retry when the counter is odd or changed while
+    they were copying. There must be a single writer per slot.
+
+    Parameters:
+        layout (StateLayout): Layout of the snapshots.
+        slots (int): Number of slots, e.g. one per robot.
+        name (str): Name of the shared memory block. Required when attaching, generated when creating if omitted.
+        create (bool): Create the block (writer side) or attach to an existing one (reader side).
+        track (bool): When attaching, let this process' resource tracker know about the block. Processes started by the
+            creator through multiprocessing share its tracker and may keep it; unrelated processes must not, otherwise
+            their tracker removes the block when they exit.
+    """
+    # Segment header: layout name, number of slots, slot size
+    HEADER = struct.Struct("<32sII")
+    # Slot header: sequence counter, host write time in nanoseconds
+    SLOT_HEADER = struct.Struct("<Qq")
+
+    def __init__(self, layout, slots=1, name=None, create=False, track=False):
+        self.layout = layout
+        # Keep slots 8 bytes aligned so the counters are written in one store
+        self.slot_size = (self.SLOT_HEADER.size + layout.size + 7) & ~7
+
+        if create:
+            size = self.HEADER.size + slots * self.slot_size
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.HEADER.pack_into(self.shm.buf, 0, layout.name.encode(), slots, self.slot_size)
+            self.shm.buf[self.HEADER.size:size] = bytes(size - self.HEADER.size)
+        else:
+            self.shm = self._attach(name, track)
+            layout_name, slots, slot_size = self.HEADER.unpack_from(self.shm.buf, 0)
+            if layout_name.rstrip(b"\0").decode() != layout.name or slot_size != self.slot_size:
+                self.shm.close()
+                raise ValueError(f"Shared memory {name} does not hold {layout.name} snapshots")
+
+        self.name = self.shm.name
+        self.slots = slots
+        self.owner = create
+        self._sequences = [0] * slots  # Writer side sequence counters
+        self._views = {}  # slot -> memoryview handed out by payload_view, released by close()
+
+    @staticmethod
+    def _attach(name, track):
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=track)
+        shm = shared_memory.SharedMemory(name=name)
+        if not track:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+    def _offset(self, slot):
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"Slot {slot} out of range [0, {self.slots})")
+        return self.HEADER.size + slot * self.slot_size
+
+    def write(self, slot, sample):
+        """ Writes a snapshot of an IDL sample into a slot. """
+        self.write_values(slot, self.layout.flatten(sample))
+
+    def write_values(self, slot, values):
+        """ Writes already flattened values into a slot. """
+        offset = self._offset(slot)
+        buf = self.shm.buf
+        sequence = self._sequences[slot] + 1
+
+        self.SLOT_HEADER.pack_into(buf, offset, sequence, time.monotonic_ns())  # odd: write in progress
+        self.layout.struct.pack_into(buf, offset + self.SLOT_HEADER.size, *values)
+        self.SLOT_HEADER.pack_into(buf, offset, sequence + 1, time.monotonic_ns())  # even: snapshot complete
+
+        self._sequences[slot] = sequence + 1
+
+    def read_values(self, slot, retries=100):
+        """
+        Returns (sequence, monotonic write time in ns, values) of the latest snapshot in a slot,
+        or None if nothing was written yet. The sequence increases by 2 with every write.
+        """
+        offset = self._offset(slot)
+        buf = self.shm.buf
+        payload_offset = offset + self.SLOT_HEADER.size
+
+        for _ in range(retries):
+            sequence, stamp = self.SLOT_HEADER.unpack_from(buf, offset)
+            if sequence & 1:
+                continue
+            values = self.layout.struct.unpack_from(buf, payload_offset)
+            if self.SLOT_HEADER.unpack_from(buf, offset)[0] == sequence:
+                return (sequence, stamp, values) if sequence else None
+
+        logger.warning(f"Could not get a consistent snapshot of slot {slot} after {retries} retries")
+        return None
+
+    def read(self, slot, retries=100):
+        """ Returns (sequence, monotonic write time in ns, dict of fields) of the latest snapshot, or None. """
+        snapshot = self.read_values(slot, retries)
+        if snapshot is None:
+            return None
+        sequence, stamp, values = snapshot
+        return sequence, stamp, self.layout.to_dict(values)
+
+    def sequence(self, slot):
+        """ Returns the current sequence counter of a slot without copying the snapshot. """
+        return self.SLOT_HEADER.unpack_from(self.shm.buf, self._offset(slot))[0]
+
+    def payload_view(self, slot):
+        """
+        Returns a memoryview on the packed snapshot of a slot, without copying. The content may change at any time:
+        take sequence() before using the view and check is_consistent() afterwards.
+        The same view is returned on every call; close() releases it, after which it can no longer be used.
+        """
+        view = self._views.get(slot)
+        if view is None:
+            offset = self._offset(slot) + self.SLOT_HEADER.size
+            view = self._views[slot] = self.shm.buf[offset:offset + self.layout.size]
+        return view
+
+    def close(self):
+        """
+        Releases the payload views, detaches from the segment, and removes it if this instance created it.
+        Objects still exporting a view's memory (e.g. numpy.frombuffer arrays) must be deleted first, BufferError
+        is raised otherwise.
+        """
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def is_consistent(self, slot, sequence):
+        """ True if the slot was complete at `sequence` and hasn't been written since. """
+        return not sequence & 1 and self.sequence(slot) == sequence
+
+
+
+def segment_name(name, prefix="go2"):
+    """ Shared memory name of the segment publishing the topic `name` (a key of DDS_TOPICS). """
+    return f"{prefix}_{name.lower()}"
+
+
+class StatePublisher:
+    """
+    StatePublisher: Decodes state topics once and publishes the latest sample of each into its own shared memory segment.
+
+    Parameters:
+        communicator: Communicator to subscribe with.
+        topics (iterable of str): Names of the topics in DDS_TOPICS to share, must be keys of SHARED_STATE_LAYOUTS.
+        prefix (str): Prefix of the segment names, to tell several robots or publishers apart.
+    """
+    def __init__(self, communicator, topics=("SPORT_MOD_STATE", "LOW_STATE"), prefix="go2"):
+        self.communicator = communicator
+        self.topics = list(topics)
+        self.prefix = prefix
+        self.segments = {}
+        self._callbacks = {}
+
+    def start(self):
+        """ Creates the segments and subscribes to the topics. Must be called from within the event loop. """
+        for name in self.topics:
+            layout = SHARED_STATE_LAYOUTS[name]
+            shm_name = segment_name(name, self.prefix)
+            try:
+                segment = SharedStateSegment(layout, name=shm_name, create=True)
+            except FileExistsError:
+                # Left over by a publisher that didn't shut down cleanly
+                logger.warning(f"Replacing stale shared memory segment {shm_name}")
+                stale = shared_memory.SharedMemory(name=shm_name)
+                stale.close()
+                stale.unlink()
+                segment = SharedStateSegment(layout, name=shm_name, create=True)
+            self.segments[name] = segment
+
+            async def publish(sample, segment=segment):
+                segment.write(0, sample)
+
+            self._callbacks[name] = publish
+            topic = self.communicator.subscribe_by_name(name, publish)
+            logger.info(f"Sharing {topic} in shared memory segment {shm_name}")
+
+    def stop(self):
+        """ Unsubscribes and removes the segments. """
+        for name, callback in self._callbacks.items():
+            self.communicator.unsubscribe(self.communicator.get_topic_by_name(name), callback)
+        for segment in self.segments.values():
+            segment.close()
+        self._callbacks.clear()
+        self.segments.clear()
+
+
+class StateReader:
+    """
+    StateReader: Lock-free access to the latest sample shared by a StatePublisher, usable from any local process.
+
+    Parameters:
+        name (str): Name of the topic in DDS_TOPICS, e.g. "SPORT_MOD_STATE" or "LOW_STATE".
+        prefix (str): Segment name prefix used by the publisher.
+    """
+    def __init__(self, name="SPORT_MOD_STATE", prefix="go2"):
+        self.name = name
+        self.segment = SharedStateSegment(SHARED_STATE_LAYOUTS[name], name=segment_name(name, prefix))
+
+    def latest(self):
+        """ Returns (sequence, monotonic write time in ns, dict of fields) of the latest sample, or None. """
+        return self.segment.read(0)
+
+    def latest_values(self):
+        """ Same as latest() but returns the flat value tuple in layout order, avoiding the dictionary. """
+        return self.segment.read_values(0)
+
+    def sequence(self):
+        """ Sequence number of the latest sample, increases by 2 with every sample. """
+        return self.segment.sequence(0)
+
+    def view(self):
+        """
+        Zero-copy access: returns (sequence, memoryview) on the packed sample. Decode what is needed from the view
+        (e.g. with struct.unpack_from or numpy.frombuffer) and discard the result if is_consistent(sequence) is False.
+        The view is valid until close(); arrays created on it with numpy.frombuffer must be deleted before close().
+        """
+        return self.segment.sequence(0), self.segment.payload_view(0)
+
+    def is_consistent(self, sequence):
+        return self.segment.is_consistent(0, sequence)
+
+    @property
+    def layout(self):
+        return self.segment.layout
+
+    def close(self):
+        self.segment.close()
@@ -0,0 +1,283 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+'''
+Detection of stalled streams, e.g. rt/sportmodestate samples that stop arriving when the Wi-Fi link degrades.
+
+- TimerWheel: Hashed timer wheel, O(1) scheduling, expiry work proportional to the timers due.
+- LivenessMonitor: Tracks the time of the latest sample of every watched topic and reports a stall when a topic has
+   been silent for longer than its allowed gap, and a recovery on the next sample. All topics share one timer thread;
+   a sample only stores its receive time. DDS liveliness (all writers of a topic lost) and deadline-missed statuses
+   are used as additional stall signals where the communicator reports them.
+'''
+
+
+class TimerWheel:
+    """
+    TimerWheel: `slots` buckets of `resolution` seconds. A timer lands in the bucket of its due tick; timers further
+    away than one turn of the wheel stay in their bucket until the turn they are due in.
+
+    Parameters:
+        resolution (float): Tick length in seconds, the precision of the timers.
+        slots (int): Number of buckets.
+    """
+    def __init__(self, resolution=0.005, slots=512):
+        if resolution <= 0 or slots < 1:
+            raise ValueError("resolution and slots must be positive.")
+        self.resolution = resolution
+        self.slots = [[] for _ in range(slots)]
+        self.start = time.monotonic()
+        self.tick = 0  # Next tick to expire
+        self.pending = 0
+
+    def _tick_at(self, when):
+        return int((when - self.start) / self.resolution)
+
+    def schedule(self, when, item):
+        """ Schedules `item` to expire at time.monotonic() `when` (rounded up to the next tick). """
+        if not self.pending:
+            # Skip the ticks that passed while the wheel was empty
+            self.tick = max(self.tick, self._tick_at(time.monotonic()))
+        due = max(self.tick, self._tick_at(when) + 1)
+        self.slots[due % len(self.slots)].append((due, item))
+        self.pending += 1
+
+    def advance(self, now):
+        """ Expires every tick up to `now`, returns the items due. """
+        last = self._tick_at(now)
+        expired = []
+        while self.tick <= last and self.pending:
+            slot = self.slots[self.tick % len(self.slots)]
+            if slot:
+                keep = [entry for entry in slot if entry[0] > self.tick]
+                if len(keep) != len(slot):
+                    expired.extend(item for due, item in slot if due <= self.tick)
+                    slot[:] = keep
+            self.tick += 1
+        self.pending -= len(expired)
+        self.tick = max(self.tick, last + 1)
+        return expired
+
+    def next_time(self):
+        """ time.monotonic() at which the next tick expires, None when no timer is pending. """
+        return self.start + self.tick * self.resolution if self.pending else None
+
+
+class _Stream:
+    __slots__ = ("topic", "max_gap", "last_seen", "stalled", "scheduled", "stall_count", "stalled_since")
+
+    def __init__(self, topic, max_gap, now):
+        self.topic = topic
+        self.max_gap = max_gap
+        self.last_seen = now
+        self.stalled = False
+        self.scheduled = False
+        self.stall_count = 0
+        self.stalled_since = None
+
+
+class LivenessMonitor:
+    """
+    LivenessMonitor: Per-topic stall and recovery detection.
+
+    A topic expected at `rate` Hz stalls once no sample arrived for `tolerance` periods, so with the default of 2 a
+    stall is reported one period after the first missing sample (plus at most one wheel tick). The timer of a topic is
+    not moved on every sample: when it expires, it is simply pushed to the latest sample's deadline, so a stream costs
+    one timer operation per allowed gap, whatever its rate.
+
+    Callbacks get (topic, info), info a dict with "event" ("stall" or "recover"), "reason", "time" and "gap" (seconds
+    of silence). Coroutine functions are scheduled on the event loop that called start(), plain functions run in the
+    timer or listener thread and must return quickly.
+
+    Parameters:
+        communicator: Communicator providing subscribe_sync (and add_status_callback for DDS statuses).
+        resolution (float): Timer wheel tick in seconds.
+        slots (int): Timer wheel size; gaps up to resolution * slots cost a single expiry.
+        on_stall, on_recover: Callbacks for every watched topic.
+    """
+    def __init__(self, communicator=None, resolution=0.005, slots=512, on_stall=None, on_recover=None):
+        self.communicator = communicator
+        self.wheel = TimerWheel(resolution, slots)
+        self.streams = {}
+        self.callbacks = {}  # topic -> (on_stall, on_recover)
+        self.on_stall = on_stall
+        self.on_recover = on_recover
+        self.events = deque(maxlen=1000)  # Latest stall and recover events as (topic, info)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._handlers = {}
+        self._loop = None
+        self._thread = None
+        self._running = False
+
+    # Configuration
+
+    def watch(self, topic, rate=None, max_gap=None, tolerance=2.0, on_stall=None, on_recover=None, subscribe=True):
+        """
+        Watches a topic expected at `rate` Hz, or with at most `max_gap` seconds between samples.
+        With `subscribe`, samples are taken from a subscribe_sync handler; otherwise call seen(topic) for every sample.
+        """
+        if max_gap is None:
+            if not rate or rate <= 0:
+                raise ValueError("Either a positive rate or max_gap is needed.")
+            max_gap = tolerance / rate
+        now = time.monotonic()
+        with self._lock:
+            stream = self.streams.get(topic)
+            if stream is None:
+                stream = self.streams[topic] = _Stream(topic, max_gap, now)
+            stream.max_gap = max_gap
+            self.callbacks[topic] = (on_stall, on_recover)
+            self._schedule(stream)
+        self._wake.set()
+
+        if subscribe and self.communicator is not None and topic not in self._handlers:
+            handler = self._sample_handler(stream)
+            self.communicator.subscribe_sync(topic, None, handler)
+            status_handler = None
+            if hasattr(self.communicator, "add_status_callback"):
+                status_handler = self._status_handler(stream)
+                self.communicator.add_status_callback(topic, status_handler)
+            self._handlers[topic] = (handler, status_handler)
+
+    def unwatch(self, topic):
+        handlers = self._handlers.pop(topic, None)
+        if handlers is not None:
+            handler, status_handler = handlers
+            self.communicator.unsubscribe(topic, handler)
+            if status_handler is not None:
+                self.communicator.remove_status_callback(topic, status_handler)
+        with self._lock:
+            # Pending timers of the stream find it gone and are dropped
+            self.streams.pop(topic, None)
+            self.callbacks.pop(topic, None)
+
+    # Lifecycle
+
+    def start(self):
+        """ Starts the timer thread. Call from the event loop when coroutine callbacks are used. """
+        if self._running:
+            return
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="topic-liveness", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Samples and statuses
+
+    def _sample_handler(self, stream):
+        def on_sample(sample):
+            self.seen(stream.topic)
+        return on_sample
+
+    def seen(self, topic, now=None):
+        """ Records a sample of `topic`; O(1), takes the lock only when the topic recovers from a stall. """
+        stream = self.streams.get(topic)
+        if stream is None:
+            return
+        now = time.monotonic() if now is None else now
+        gap = now - stream.last_seen
+        stream.last_seen = now
+        if stream.stalled:
+            with self._lock:
+                if not stream.stalled:
+                    return
+                stream.stalled = False
+                self._schedule(stream)
+            self._wake.set()
+            self._notify(stream, {"event": "recover", "reason": "sample received", "time": now, "gap": gap})
+
+    def _status_handler(self, stream):
+        def on_status(kind, status):
+            if kind == "liveliness_changed" and status.alive_count == 0:
+                self._stall(stream, "all writers lost", time.monotonic())
+            elif kind == "deadline_missed":
+                self._stall(stream, "DDS deadline missed", time.monotonic())
+        return on_status
+
+    # Timers
+
+    def _schedule(self, stream):
+        """ Puts the stream's timer on the wheel unless it is already there, under the lock. """
+        if not stream.scheduled and not stream.stalled:
+            stream.scheduled = True
+            self.wheel.schedule(stream.last_seen + stream.max_gap, stream)
+
+    def _stall(self, stream, reason, now):
+        with self._lock:
+            if stream.stalled or self.streams.get(stream.topic) is not stream:
+                return
+            stream.stalled = True
+            stream.stall_count += 1
+            stream.stalled_since = stream.last_seen
+        self._notify(stream, {"event": "stall", "reason": reason, "time": now, "gap": now - stream.last_seen})
+
+    def _run(self):
+        while self._running:
+            next_time = self.wheel.next_time()
+            self._wake.wait(None if next_time is None else max(0.0, next_time - time.monotonic()))
+            self._wake.clear()
+            now = time.monotonic()
+            stalled = []
+            with self._lock:
+                for stream in self.wheel.advance(now):
+                    stream.scheduled = False
+                    if self.streams.get(stream.topic) is not stream or stream.stalled:
+                        continue
+                    if now - stream.last_seen >= stream.max_gap:
+                        stalled.append(stream)
+                    else:
+                        # Samples arrived since the timer was set, move it to the latest deadline
+                        self._schedule(stream)
+            for stream in stalled:
+                self._stall(stream, "no sample", now)
+
+    def _notify(self, stream, info):
+        self.events.append((stream.topic, info))
+        if info["event"] == "stall":
+            logger.warning(f"{stream.topic} stalled ({info['reason']}), silent for {info['gap'] * 1000:.0f} ms")
+        else:
+            logger.info(f"{stream.topic} recovered after {info['gap'] * 1000:.0f} ms")
+        index = 0 if info["event"] == "stall" else 1
+        specific = self.callbacks.get(stream.topic, (None, None))[index]
+        general = (self.on_stall, self.on_recover)[index]
+        for callback in (specific, general):
+            if callback is None:
+                continue
+            try:
+                result = callback(stream.topic, info)
+                if asyncio.iscoroutine(result):
+                    if self._loop is None:
+                        result.close()
+                        raise RuntimeError("coroutine callbacks need start() to be called from the event loop")
+                    asyncio.run_coroutine_threadsafe(result, self._loop)
+            except Exception as e:
+                logger.error(f"Liveness callback for {stream.topic} failed: {e!r}")
+
+    # Queries
+
+    def is_stalled(self, topic):
+        return self.streams[topic].stalled
+
+    def age(self, topic, now=None):
+        """ Seconds since the latest sample of a topic (since watch() before the first one). """
+        return (time.monotonic() if now is None else now) - self.streams[topic].last_seen
+
+    def stalled(self):
+        """ Topics currently stalled. """
+        return [topic for topic, stream in self.streams.items() if stream.stalled]
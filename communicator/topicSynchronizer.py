@@ -0,0 +1,221 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from operator import attrgetter
+import numpy as np
+from communicator.clockSync import STAMP_EXTRACTORS
+
+logger = logging.getLogger(__name__)
+
+'''
+Approximate-time alignment of several topics.
+
+- TopicSynchronizer: Buffers the samples of every topic in a bounded ring buffer and emits, for every sample of the
+   reference topic, a tuple with the sample of each other topic closest in time (within `slop`), or values
+   interpolated between the two samples surrounding the reference time. Matching runs in the listener threads;
+   every sample is appended and discarded once, so the work per sample is amortized O(1).
+'''
+
+
+class TopicSynchronizer:
+    """
+    TopicSynchronizer: Matches the samples of several topics by time.
+
+    The first topic is the reference, usually the slowest stream (e.g. LiDAR frames or odometry). A reference sample
+    at time t is emitted once every other topic has a sample at or after t (so the closest one is known) or once it
+    can no longer get one within the slop, i.e. a reference sample more than `slop` newer exists; the latest earlier
+    sample is then used as is, also for interpolated topics. Reference samples without a match within `slop` on every
+    topic are dropped.
+
+    An interpolated topic is interpolated between the samples on either side of t when they are at most `max_gap`
+    apart, even if one of them is farther than `slop` from t; otherwise the sample nearest to t is used, within `slop`.
+
+    Parameters:
+        communicator: Communicator the topics are subscribed on (subscribe_sync).
+        topics (list of str): DDS topics, the reference topic first.
+        callback: Called with a tuple of one entry per topic. Coroutine functions are scheduled on the event loop that
+            called start(), plain functions are called in the listener thread and must return quickly.
+        slop (float): Maximum time difference in seconds between a reference sample and the samples matched to it.
+        queue_size (int): Samples buffered per topic.
+        stamp: How the time of a sample is obtained: "receive" (host time.monotonic at delivery, comparable across all
+            topics), "header" (the robot stamp of the message, see clockSync.STAMP_EXTRACTORS) or a function of the
+            sample.
+        interpolate (dict): Topic -> {name: attribute path or function} of numeric fields to interpolate at the
+            reference time. The entry of such a topic in the emitted tuple is a dict name -> value (float or
+            numpy array) instead of a sample.
+        max_gap (float): Maximum time in seconds between the two samples interpolated between, defaults to 2 * slop.
+    """
+    def __init__(self, communicator, topics, callback, slop=0.01, queue_size=100, stamp="receive", interpolate=None,
+                 max_gap=None):
+        if len(topics) < 2:
+            raise ValueError("At least two topics are needed.")
+        if len(set(topics)) != len(topics):
+            raise ValueError("Topics must be distinct.")
+        if slop < 0:
+            raise ValueError("slop must not be negative.")
+        self.communicator = communicator
+        self.topics = list(topics)
+        self.callback = callback
+        self.slop = slop
+        self.max_gap = 2 * slop if max_gap is None else max_gap
+        if self.max_gap < 0:
+            raise ValueError("max_gap must not be negative.")
+        self.stamp = stamp
+        self.interpolate = {
+            topic: {name: path if callable(path) else attrgetter(path) for name, path in fields.items()}
+            for topic, fields in (interpolate or {}).items()
+        }
+        unknown = set(self.interpolate) - set(self.topics[1:])
+        if unknown:
+            raise ValueError(f"Interpolation is only available for non-reference topics, got {unknown}")
+        # How far before a reference sample the samples of each topic are still of use
+        self._reach = [max(slop, self.max_gap) if topic in self.interpolate else slop for topic in self.topics]
+
+        # One ring buffer of (stamp, sample) per topic
+        self.queues = [deque(maxlen=queue_size) for _ in self.topics]
+        self.emitted = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._handlers = {}
+        self._loop = None
+        self._is_coroutine = asyncio.iscoroutinefunction(callback)
+
+    def start(self):
+        """ Subscribes to the topics. Call from the event loop when the callback is a coroutine function. """
+        if self._is_coroutine:
+            self._loop = asyncio.get_running_loop()
+        for index, topic in enumerate(self.topics):
+            handler = self._handler(index)
+            self._handlers[topic] = handler
+            self.communicator.subscribe_sync(topic, None, handler)
+
+    def stop(self):
+        for topic, handler in self._handlers.items():
+            self.communicator.unsubscribe(topic, handler)
+        self._handlers.clear()
+        with self._lock:
+            for queue in self.queues:
+                queue.clear()
+
+    def _stamp_of(self, sample):
+        if self.stamp == "receive":
+            return time.monotonic()
+        if self.stamp == "header":
+            extractor = STAMP_EXTRACTORS.get(type(sample).__name__)
+            if extractor is None:
+                raise ValueError(f"No stamp known for {type(sample).__name__}, use stamp='receive' or a function")
+            return extractor(sample)
+        return self.stamp(sample)
+
+    def _handler(self, index):
+        def on_sample(sample):
+            self.add(index, self._stamp_of(sample), sample)
+        return on_sample
+
+    def add(self, index, stamp, sample):
+        """ Adds a sample of topic number `index` (order of `topics`) with its stamp, emitting any completed match. """
+        with self._lock:
+            queue = self.queues[index]
+            if queue and stamp < queue[-1][0]:
+                # Out of order, matching relies on increasing stamps
+                return
+            if index == 0 and len(queue) == queue.maxlen:
+                self.dropped += 1
+            queue.append((stamp, sample))
+            matches = self._match()
+        for match in matches:
+            self._emit(match)
+
+    def _match(self):
+        """ Resolves the pending reference samples that can be decided, oldest first. """
+        matches = []
+        reference = self.queues[0]
+        slop = self.slop
+        reach = self._reach
+        while reference:
+            t, reference_sample = reference[0]
+            # A reference sample can't wait longer than the slop once newer references exist
+            expired = len(reference) > 1 and reference[-1][0] - t > slop
+            entries = [reference_sample]
+            decided = True
+            for index in range(1, len(self.queues)):
+                queue = self.queues[index]
+                # Samples too old for this and, as reference stamps increase, for every later reference sample
+                while queue and queue[0][0] < t - reach[index]:
+                    queue.popleft()
+                # Skip samples before the one closest to t, keeping the last one before t for interpolation
+                while len(queue) >= 2 and queue[1][0] <= t:
+                    queue.popleft()
+                if not queue:
+                    decided = False
+                    break
+                head = queue[0]
+                if head[0] >= t:
+                    entries.append((head, head))
+                elif len(queue) >= 2:
+                    entries.append((head, queue[1]))
+                elif expired:
+                    # No closer sample can arrive any more, the older one is used if within the slop
+                    entries.append((head, head))
+                else:
+                    # Only an older sample so far, a closer one may still arrive
+                    decided = False
+                    break
+            if not decided:
+                if expired:
+                    reference.popleft()
+                    self.dropped += 1
+                    continue
+                break
+
+            reference.popleft()
+            match = self._resolve(t, entries)
+            if match is None:
+                self.dropped += 1
+            else:
+                matches.append(match)
+        return matches
+
+    def _resolve(self, t, entries):
+        """ Builds the output tuple from the (before, after) samples around t, None if a topic has no usable sample. """
+        result = [entries[0]]
+        for index, (before, after) in enumerate(entries[1:], start=1):
+            fields = self.interpolate.get(self.topics[index])
+            if fields is None:
+                stamp, sample = before if abs(before[0] - t) <= abs(after[0] - t) else after
+                if abs(stamp - t) > self.slop:
+                    return None
+                result.append(sample)
+                continue
+            span = after[0] - before[0]
+            if 0 < span <= self.max_gap and before[0] <= t <= after[0]:
+                fraction = (t - before[0]) / span
+            else:
+                # Nothing to interpolate between, take the nearest sample
+                if abs(before[0] - t) > abs(after[0] - t):
+                    before = after
+                if abs(before[0] - t) > self.slop:
+                    return None
+                after, fraction = before, 0.0
+            values = {}
+            for name, getter in fields.items():
+                low, high = getter(before[1]), getter(after[1])
+                if isinstance(low, (int, float)):
+                    values[name] = low + fraction * (high - low)
+                else:
+                    low = np.asarray(low, dtype=float)
+                    values[name] = low + fraction * (np.asarray(high, dtype=float) - low)
+            result.append(values)
+        return tuple(result)
+
+    def _emit(self, match):
+        self.emitted += 1
+        if self._is_coroutine:
+            asyncio.run_coroutine_threadsafe(self.callback(match), self._loop)
+            return
+        try:
+            self.callback(match)
+        except Exception as e:
+            logger.error(f"Synchronizer callback failed: {e!r}")
@@ -0,0 +1,26 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import xml.etree.ElementTree as ET
+import pytest
+from communicator.cyclonedds.ddsConfig import build_config
+
+
+def test_profile_settings_are_written_as_elements_and_attributes():
+    root = ET.fromstring(build_config("wlan0", domain_id=3, profile="lossy_wifi"))
+    domain = root.find("Domain")
+    assert domain.get("Id") == "3"
+    assert domain.find("General/Interfaces/NetworkInterface").get("name") == "wlan0"
+    # Settings extend the elements the base configuration already contains
+    assert len(domain.findall("General")) == 1
+    assert domain.find("General/MaxMessageSize").text == "1400B"
+    assert domain.find("Internal/SocketReceiveBufferSize").get("max") == "8MB"
+    assert domain.find("Internal/Watermarks/WhcHigh").text == "200kB"
+
+
+def test_custom_and_unknown_profiles():
+    root = ET.fromstring(build_config("eth0", profile={"Tracing/Verbosity": "fine"}))
+    assert root.find("Domain/Tracing/Verbosity").text == "fine"
+    with pytest.raises(ValueError):
+        build_config("eth0", profile="missing")
@@ -0,0 +1,23 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import asyncio
+import pytest
+from clients.fleet import FleetRunner
+
+
+def test_calls_fail_when_the_worker_dies():
+    async def run():
+        # Out of range domain: Robot.dds raises in the worker, or cyclonedds is missing; either way the worker exits
+        fleet = FleetRunner([{"name": "dog", "interface": "lo", "domain_id": -1}], workers=1)
+        await fleet.start()
+        try:
+            with pytest.raises(ConnectionError):
+                await fleet.call("dog", "sport", "Hello", timeout=30)
+            with pytest.raises(ConnectionError):
+                await fleet.call("dog", "sport", "Hello", timeout=30)
+        finally:
+            await fleet.stop()
+
+    asyncio.run(run())
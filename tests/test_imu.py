@@ -0,0 +1,65 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from algorithms.imu import AttitudeEstimator, affine_scan
+
+
+def recording(count=500, seed=0):
+    """ Gyroscope and accelerometer samples of a slowly wobbling, walking robot. """
+    rng = np.random.default_rng(seed)
+    t = np.arange(count) * 0.002
+    gyro = np.stack((0.3 * np.sin(3 * t), 0.2 * np.cos(2 * t), 0.5 + 0.1 * np.sin(t)), axis=1)
+    accel = np.array([0.0, 0.0, 9.81]) + rng.normal(0.0, 0.5, (count, 3))
+    return gyro + rng.normal(0.0, 0.01, (count, 3)), accel
+
+
+def sequential(estimator, gyro, accel, dt):
+    states = []
+    for w, f in zip(gyro, accel):
+        estimator.update(w, f, dt)
+        states.append((estimator.rpy, estimator.velocity))
+    return np.array([s[0] for s in states]), np.array([s[1] for s in states])
+
+
+def test_affine_scan_matches_the_recursion():
+    rng = np.random.default_rng(1)
+    matrices, offsets, initial = rng.normal(0, 0.5, (37, 3, 3)), rng.normal(size=(37, 3)), rng.normal(size=3)
+    expected, x = [], initial
+    for m, b in zip(matrices, offsets):
+        x = m @ x + b
+        expected.append(x)
+    assert np.allclose(affine_scan(matrices.copy(), offsets.copy(), initial), expected)
+
+
+def test_batch_matches_sequential_updates():
+    gyro, accel = recording()
+    rpy, velocity = sequential(AttitudeEstimator(), gyro, accel, 0.002)
+
+    # Small chunks exercise the hand-over of the state between prefix scans
+    estimator = AttitudeEstimator(chunk=64)
+    result = estimator.batch(gyro[:300], accel[:300], dt=0.002)
+    assert np.allclose(result["rpy"], rpy[:300], atol=1e-9)
+    assert np.allclose(result["velocity"], velocity[:300], atol=1e-9)
+
+    # Sequential updates continue where the batch stopped
+    rest_rpy, rest_velocity = sequential(estimator, gyro[300:], accel[300:], 0.002)
+    assert np.allclose(rest_rpy, rpy[300:], atol=1e-9)
+    assert np.allclose(rest_velocity, velocity[300:], atol=1e-9)
+
+
+def test_reset_restores_the_initial_state():
+    gyro, accel = recording(100)
+    estimator = AttitudeEstimator()
+    estimator.batch(gyro, accel, timestamps=np.arange(100) * 0.002)
+    assert estimator.initialized and estimator.last_time is not None
+
+    estimator.reset(yaw=0.5)
+    assert not estimator.initialized and estimator.last_time is None
+    assert estimator.rpy == (0.0, 0.0, 0.5)
+    assert estimator.velocity == (0.0, 0.0, 0.0)
+
+    # After a reset the first sample only initializes the attitude again
+    estimator.update((0.0, 0.0, 1.0), (0.0, 0.0, 9.81), 0.002)
+    assert estimator.rpy == (0.0, 0.0, 0.5)
@@ -0,0 +1,56 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+from algorithms.kinematics import (forward_kinematics, inverse_kinematics, jacobian, HIP_OFFSETS, THIGH_LENGTH,
+                                   CALF_LENGTH)
+
+
+def standing_joints(count=200, seed=0):
+    """ Joint positions around the standing pose, knees bent backwards. """
+    rng = np.random.default_rng(seed)
+    q = np.tile([0.0, 0.8, -1.6], (count, 4))
+    return q + rng.uniform(-0.3, 0.3, q.shape)
+
+
+def test_fk_ik_round_trip():
+    q = standing_joints()
+    feet = forward_kinematics(q)
+    assert np.allclose(inverse_kinematics(feet), q, atol=1e-8)
+    assert np.allclose(forward_kinematics(inverse_kinematics(feet)), feet, atol=1e-8)
+
+
+def test_single_sample_keeps_its_shape():
+    q = standing_joints(1)[0]
+    assert forward_kinematics(q).shape == (12,)
+    assert np.allclose(inverse_kinematics(forward_kinematics(q)), q, atol=1e-8)
+
+
+def test_jacobian_matches_finite_differences():
+    q = standing_joints(1, seed=1)[0]
+    jac = jacobian(q)
+    step = 1e-6
+    for joint in range(12):
+        dq = np.zeros(12)
+        dq[joint] = step
+        numeric = (forward_kinematics(q + dq) - forward_kinematics(q - dq)) / (2 * step)
+        leg = joint // 3
+        assert np.allclose(numeric.reshape(4, 3)[leg], jac[leg, :, joint % 3], atol=1e-6)
+
+
+def test_unreachable_target_extends_the_leg_towards_it():
+    feet = forward_kinematics(standing_joints(1)[0]).reshape(4, 3)
+    # Far below every hip, beyond the leg length
+    feet[:, 2] = -1.0
+    q = inverse_kinematics(feet.ravel()).reshape(4, 3)
+    assert np.allclose(q[:, 2], 0.0, atol=1e-6)
+    reached = forward_kinematics(q.ravel()).reshape(4, 3)
+    assert np.all(np.linalg.norm(reached - HIP_OFFSETS, axis=1) <= THIGH_LENGTH + CALF_LENGTH + 0.1)
+    assert np.all(reached[:, 2] < -0.4)
+
+
+def test_wrong_shape_is_rejected():
+    with pytest.raises(ValueError):
+        forward_kinematics(np.zeros(9))
@@ -0,0 +1,63 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from algorithms.occupancy import OccupancyMap
+
+
+def wall(x=1.0, size=4):
+    """ Centers of the 0.1 m voxels of a square wall about x meters in front of the origin. """
+    y, z = np.meshgrid(np.arange(-size, size), np.arange(-size, size), indexing="ij")
+    return (np.stack((np.full(y.size, round(x / 0.1)), y.ravel(), z.ravel()), axis=1) + 0.5) * 0.1
+
+
+def test_hits_become_occupied_across_chunks():
+    grid = OccupancyMap(resolution=0.1, chunk_size=4, decay_time=None)
+    points = wall()
+    grid.integrate(points, stamp=0.0)
+    # The wall is centered on the origin, so it is split over several chunks
+    assert len(grid) > 1
+    assert grid.occupied(points).all()
+    assert not grid.occupied(points + [0.5, 0.0, 0.0]).any()
+    assert np.allclose(np.sort(grid.occupied_points(), axis=0), np.sort(points, axis=0))
+    assert np.isclose(grid.raycast([0.0, 0.05, 0.05], [[1.0, 0.0, 0.0]])[0], 1.0)
+
+
+def test_rays_clear_free_space():
+    grid = OccupancyMap(resolution=0.1, chunk_size=4, decay_time=None, miss=0.4)
+    grid.integrate(wall(1.0), stamp=0.0)
+    grid.integrate(wall(1.0), stamp=0.0)
+    # The wall moved away, the rays to it pass through the old position
+    for _ in range(5):
+        grid.integrate(wall(2.0, size=8), origin=[0.0, 0.0, 0.0], stamp=0.0)
+    assert not grid.occupied(wall(1.0)).any()
+    assert grid.occupied(wall(2.0, size=8)).all()
+
+
+def test_evidence_decays():
+    grid = OccupancyMap(resolution=0.1, decay_time=1.0, hit=2.0)
+    grid.integrate(wall(), stamp=0.0)
+    assert np.allclose(grid.evidence(wall(), now=1.0), 2.0 * np.exp(-1.0))
+    assert not grid.occupied(wall(), now=1.0).any()
+
+
+def test_full_pool_evicts_the_farthest_chunks():
+    grid = OccupancyMap(resolution=0.1, chunk_size=4, max_chunks=16, decay_time=None, miss=0.0)
+    grid.integrate(wall(20.0), origin=[0.0, 0.0, 0.0], stamp=0.0)
+    for x in range(16):
+        grid.integrate([[x * 0.4 + 0.05, 0.05, 0.05]], origin=[0.0, 0.0, 0.0], stamp=0.0)
+    assert len(grid) <= 16
+    assert not grid.occupied(wall(20.0)).any()
+    assert grid.occupied([[0.05, 0.05, 0.05]]).all()
+
+
+def test_clear_and_evict():
+    grid = OccupancyMap(resolution=0.1, chunk_size=4, decay_time=None)
+    grid.integrate(np.concatenate((wall(1.0), wall(10.0))), stamp=0.0)
+    assert grid.evict([0.0, 0.0, 0.0], 5.0) > 0
+    assert grid.occupied(wall(1.0)).all() and not grid.occupied(wall(10.0)).any()
+    grid.clear()
+    assert len(grid) == 0 and not grid.occupied(wall(1.0)).any()
+    grid.integrate(wall(1.0), stamp=0.0)
+    assert grid.occupied(wall(1.0)).all()
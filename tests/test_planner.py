@@ -0,0 +1,51 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from algorithms.planner import traversal_cost, HeightMapPlanner
+
+
+def sparse_unknown(level, fraction=0.01, size=100, seed=0):
+    rng = np.random.default_rng(seed)
+    heights = np.full((size, size), level, dtype=np.float32)
+    heights[rng.random(heights.shape) < fraction] = np.nan
+    return heights
+
+
+def test_flat_ground_with_unknown_cells_is_not_lethal():
+    for level in (-0.3, 0.0, 1.0):
+        cost = traversal_cost(sparse_unknown(level), 0.05)
+        assert not np.isinf(cost).any(), level
+
+
+def test_single_unknown_cell_on_raised_ground():
+    heights = np.full((50, 50), 1.0, dtype=np.float32)
+    heights[25, 25] = np.nan
+    cost = traversal_cost(heights, 0.05)
+    assert not np.isinf(cost).any()
+    assert cost[25, 25] == 3.0
+
+
+def test_wall_is_still_lethal_next_to_unknown_cells():
+    heights = sparse_unknown(-0.3)
+    heights[:, 50:] = 0.3
+    cost = traversal_cost(heights, 0.05, robot_radius=0.0)
+    assert np.isinf(cost[10:90, 50]).sum() > 70
+
+
+def test_plan_on_raised_ground_with_unknown_cells():
+    planner = HeightMapPlanner()
+    planner.update_map(sparse_unknown(-0.3), (0.0, 0.0), 0.05)
+    assert planner.plan((0.5, 0.5), (4.5, 4.5)) is not None
+
+
+def test_trajectory_to_the_current_position_holds_still():
+    planner = HeightMapPlanner()
+    planner.update_map(np.zeros((100, 100), dtype=np.float32), (0.0, 0.0), 0.05)
+    path = planner.plan_trajectory((1.0, 1.0), (1.0, 1.0))
+    assert path is not None
+    assert np.allclose(path[:, 1:3], (1.0, 1.0))
+    assert np.allclose(path[:, 4:], 0.0)
+    path = planner.plan_trajectory((1.0, 1.0, 0.5), (1.0, 1.0))
+    assert np.allclose(path[:, 3], 0.5)
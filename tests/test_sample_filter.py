@@ -0,0 +1,39 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+pytest.importorskip("cyclonedds")
+from communicator.cyclonedds.ddsCommunicator import SampleFilter
+
+
+def accepted(sample_filter, times):
+    return [time for time in times if sample_filter.accept(time)]
+
+
+def test_every_nth_sample_is_kept():
+    times = [index * 0.125 for index in range(9)]
+    assert accepted(SampleFilter(every_nth=3), times) == times[2::3]
+
+
+def test_rate_limit_keeps_the_average_rate():
+    times = [index * 0.125 for index in range(16)]
+    assert accepted(SampleFilter(max_rate_hz=2), times) == [0.0, 0.5, 1.0, 1.5]
+
+
+def test_rate_limit_does_not_burst_after_a_gap():
+    sample_filter = SampleFilter(max_rate_hz=2)
+    accepted(sample_filter, [0.0, 0.125])
+    assert accepted(sample_filter, [10.0 + index * 0.125 for index in range(8)]) == [10.0, 10.5]
+
+
+def test_both_limits_combine():
+    times = [index * 0.125 for index in range(16)]
+    assert accepted(SampleFilter(max_rate_hz=2, every_nth=2), times) == [0.125, 0.5, 1.0, 1.5]
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        SampleFilter(max_rate_hz=0)
+    with pytest.raises(ValueError):
+        SampleFilter(every_nth=1.5)
@@ -0,0 +1,48 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import struct
+import pytest
+from types import SimpleNamespace
+from communicator.sharedState import SharedStateSegment, StateReader, SPORT_MODE_STATE_LAYOUT, segment_name
+
+
+def sport_state(mode):
+    imu = SimpleNamespace(quaternion=(1.0, 0.0, 0.0, 0.0), gyroscope=(0.0,) * 3, accelerometer=(0.0, 0.0, 9.8),
+                          rpy=(0.0,) * 3, temperature=40)
+    return SimpleNamespace(stamp=SimpleNamespace(sec=1, nanosec=2), error_code=0, mode=mode, progress=0.0,
+                           gait_type=1, foot_raise_height=0.08, position=(1.0, 2.0, 0.3), body_height=0.32,
+                           velocity=(0.0,) * 3, yaw_speed=0.0, range_obstacle=(0.0,) * 4, foot_force=(0,) * 4,
+                           foot_position_body=(0.0,) * 12, foot_speed_body=(0.0,) * 12, imu_state=imu)
+
+
+@pytest.fixture
+def publisher():
+    prefix = f"test{os.getpid()}"
+    segment = SharedStateSegment(SPORT_MODE_STATE_LAYOUT, name=segment_name("SPORT_MOD_STATE", prefix), create=True)
+    yield segment, prefix
+    segment.close()
+
+
+def test_publish_read_close(publisher):
+    segment, prefix = publisher
+    reader = StateReader("SPORT_MOD_STATE", prefix)
+    assert reader.latest() is None
+
+    segment.write(0, sport_state(mode=3))
+    sequence, _, fields = reader.latest()
+    assert sequence == 2 and fields["mode"] == 3
+    assert fields["position"] == pytest.approx((1.0, 2.0, 0.3))
+
+    sequence, view = reader.view()
+    assert reader.is_consistent(sequence)
+    # stamp sec, nanosec and error_code come before mode
+    assert struct.unpack_from("<B", view, 12)[0] == 3
+    segment.write(0, sport_state(mode=4))
+    assert not reader.is_consistent(sequence)
+
+    # The view is still referenced here, close() releases it
+    reader.close()
+    with pytest.raises(ValueError):
+        view[0]
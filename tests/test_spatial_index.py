@@ -0,0 +1,43 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from algorithms.spatial_index import KDTree
+
+
+def cloud(count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-5.0, 5.0, (count, 3)), rng.uniform(-6.0, 6.0, (100, 3))
+
+
+def brute_force_distances(points, queries):
+    return np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+
+
+def test_nearest_neighbours_match_brute_force():
+    points, queries = cloud()
+    tree = KDTree(points, leaf_size=16)
+    expected = brute_force_distances(points, queries)
+    for k in (1, 5, 40):
+        distances, indices = tree.query(queries, k=k)
+        order = np.argsort(expected, axis=1)[:, :k]
+        assert np.allclose(distances, np.take_along_axis(expected, order, axis=1))
+        assert np.allclose(np.take_along_axis(expected, indices, axis=1), distances)
+
+
+def test_missing_neighbours_are_padded():
+    distances, indices = KDTree(np.zeros((3, 2))).query([[1.0, 0.0]], k=5)
+    assert np.allclose(distances[0, :3], 1.0) and np.all(np.isinf(distances[0, 3:]))
+    assert list(indices[0, 3:]) == [-1, -1]
+
+
+def test_radius_queries_match_brute_force():
+    points, queries = cloud(seed=1)
+    tree = KDTree(points, leaf_size=16)
+    expected = brute_force_distances(points, queries)
+    indices, distances = tree.query_radius(queries, 1.5, return_distances=True)
+    for row, (found, found_distances) in enumerate(zip(indices, distances)):
+        assert sorted(found.tolist()) == np.flatnonzero(expected[row] <= 1.5).tolist()
+        assert np.allclose(found_distances, expected[row, found])
+    assert np.array_equal(tree.count_radius(queries, 1.5), (expected <= 1.5).sum(axis=1))
@@ -0,0 +1,46 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
+from communicator.topicLiveness import TimerWheel, LivenessMonitor
+
+
+def test_timers_expire_once_their_tick_passed():
+    wheel = TimerWheel(resolution=0.01, slots=8)
+    wheel.schedule(wheel.start + 0.05, "near")
+    # Further away than one turn of the wheel (0.08 s)
+    wheel.schedule(wheel.start + 0.25, "far")
+    assert wheel.advance(wheel.start + 0.03) == []
+    assert wheel.advance(wheel.start + 0.08) == ["near"]
+    # The slot of "far" is passed twice before it is due
+    assert wheel.advance(wheel.start + 0.2) == []
+    assert wheel.next_time() is not None
+    assert wheel.advance(wheel.start + 0.3) == ["far"]
+    assert wheel.next_time() is None
+
+
+def test_stall_and_recovery_of_a_topic():
+    stalls = []
+    monitor = LivenessMonitor(resolution=0.005, on_stall=lambda topic, info: stalls.append(topic))
+    monitor.watch("rt/lowstate", max_gap=0.1, subscribe=False)
+    monitor.start()
+    try:
+        # Regular samples keep moving the timer to the latest deadline
+        for _ in range(30):
+            monitor.seen("rt/lowstate")
+            time.sleep(0.01)
+        assert not monitor.is_stalled("rt/lowstate") and stalls == []
+
+        time.sleep(0.3)
+        assert monitor.is_stalled("rt/lowstate") and stalls == ["rt/lowstate"]
+
+        monitor.seen("rt/lowstate")
+        assert not monitor.is_stalled("rt/lowstate")
+        assert [info["event"] for _, info in monitor.events] == ["stall", "recover"]
+
+        # The timer is armed again after the recovery
+        time.sleep(0.3)
+        assert stalls == ["rt/lowstate", "rt/lowstate"]
+    finally:
+        monitor.stop()
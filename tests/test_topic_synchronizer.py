@@ -0,0 +1,66 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from communicator.topicSynchronizer import TopicSynchronizer
+
+
+def synchronizer(slop=0.05, interpolate=None):
+    matches = []
+    return TopicSynchronizer(None, ["a", "b"], matches.append, slop=slop, interpolate=interpolate), matches
+
+
+def test_older_sample_within_slop_is_emitted_once_the_reference_expires():
+    sync, matches = synchronizer()
+    sync.add(1, -0.01, "b0")
+    sync.add(0, 0.0, "a0")
+    assert matches == []
+    sync.add(0, 0.1, "a1")
+    assert matches == [("a0", "b0")]
+    assert sync.dropped == 0
+
+
+def test_reference_without_sample_within_slop_is_dropped():
+    sync, matches = synchronizer()
+    sync.add(1, -0.2, "b0")
+    sync.add(0, 0.0, "a0")
+    sync.add(0, 0.1, "a1")
+    assert matches == []
+    assert sync.dropped == 1
+
+
+def test_closest_sample_is_matched():
+    sync, matches = synchronizer()
+    sync.add(0, 0.0, "a0")
+    sync.add(1, -0.01, "b0")
+    assert matches == []
+    sync.add(1, 0.02, "b1")
+    assert matches == [("a0", "b0")]
+
+
+def test_interpolation_between_surrounding_samples():
+    sync, matches = synchronizer(interpolate={"b": {"value": lambda sample: sample}})
+    sync.add(0, 0.0, "a0")
+    sync.add(1, -0.02, 1.0)
+    sync.add(1, 0.02, 3.0)
+    assert len(matches) == 1
+    assert matches[0][0] == "a0"
+    assert abs(matches[0][1]["value"] - 2.0) < 1e-9
+
+
+def test_interpolation_with_one_side_beyond_the_slop():
+    sync, matches = synchronizer(interpolate={"b": {"value": lambda sample: sample}})
+    sync.add(0, 0.0, "a0")
+    sync.add(1, -0.07, 0.0)
+    sync.add(1, 0.01, 8.0)
+    assert len(matches) == 1
+    assert abs(matches[0][1]["value"] - 7.0) < 1e-9
+
+
+def test_nearest_sample_when_the_gap_is_too_large_to_interpolate():
+    sync, matches = synchronizer(interpolate={"b": {"value": lambda sample: sample}})
+    sync.add(0, 0.0, "a0")
+    sync.add(1, -0.01, 1.0)
+    sync.add(1, 0.2, 3.0)
+    assert len(matches) == 1
+    assert matches[0][1]["value"] == 1.0
@@ -0,0 +1,44 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import json
+import numpy as np
+import pytest
+from algorithms.trajectory import TrajectoryGenerator, encode_path, PATH_FIELDS
+
+
+def test_straight_waypoints_are_followed_at_constant_speed():
+    path = TrajectoryGenerator().from_waypoints([(0.0, 0.0), (1.0, 0.0), (2.0, 0.0)], speed=0.5)
+    assert path.shape == (30, 7)
+    assert np.allclose(path[:, 0], np.arange(30) * 0.1)
+    # 2 m at 0.5 m/s: the end is reached after 4 s, beyond the horizon
+    assert np.allclose(path[:, 1], np.arange(30) * 0.05, atol=1e-9)
+    assert np.allclose(path[:, 2], 0.0) and np.allclose(path[:, 3], 0.0)
+    assert np.allclose(path[:, 4], 0.5, atol=1e-9)
+
+
+def test_the_end_of_the_waypoints_is_held():
+    path = TrajectoryGenerator().from_waypoints([(0.0, 0.0), (0.0, 0.5)], speed=0.5)
+    # Reached after 1 s, the remaining points hold the final pose
+    assert np.allclose(path[10:, 1:3], (0.0, 0.5))
+    assert np.allclose(path[10:, 4:6], 0.0)
+    assert np.allclose(path[:, 3], np.pi / 2)
+
+
+def test_velocity_profile_is_integrated_in_the_odometry_frame():
+    path = TrajectoryGenerator().from_velocity(0.3, vyaw=0.2, x=1.0, y=2.0, yaw=0.5)
+    assert np.allclose(path[0, 1:4], (1.0, 2.0, 0.5))
+    assert np.allclose(path[:, 3], 0.5 + np.arange(30) * 0.02)
+    assert np.allclose(np.hypot(path[:, 4], path[:, 5]), 0.3)
+    assert np.allclose(np.diff(path[:, 1]), path[:-1, 4] * 0.1)
+
+
+def test_encoded_path_matches_the_path_points():
+    path = TrajectoryGenerator().from_velocity(0.3, vyaw=0.2)
+    points = json.loads(encode_path(path))
+    assert len(points) == 30 and list(points[0]) == list(PATH_FIELDS)
+    assert np.allclose([[point[field] for field in PATH_FIELDS] for point in points], path)
+    path[3, 1] = np.nan
+    with pytest.raises(ValueError):
+        encode_path(path)
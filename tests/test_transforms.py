@@ -0,0 +1,20 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from algorithms.transforms import TransformBuffer
+
+
+def test_cached_lookup_expires_with_the_history():
+    buffer = TransformBuffer(capacity=4, static=())
+    for stamp in range(4):
+        buffer.add("odom", "base", float(stamp), (float(stamp), 0.0, 0.0))
+    rotation, translation = buffer.lookup("odom", "base", 0.5)
+    assert np.allclose(translation, (0.5, 0.0, 0.0))
+    assert buffer.lookup("odom", "base", 0.5) is not None and buffer.hits == 1
+
+    # At capacity the oldest half of the samples is dropped, 0.5 is no longer covered
+    buffer.add("odom", "base", 4.0, (4.0, 0.0, 0.0))
+    assert buffer.lookup("odom", "base", 0.5) is None
+    assert np.allclose(buffer.lookup("odom", "base", 2.5)[1], (2.5, 0.0, 0.0))
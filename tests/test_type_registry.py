@@ -0,0 +1,27 @@
+# Add clients and communicator directory to sys path
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from communicator.constants import DDS_TOPICS
+from communicator.cyclonedds.typeRegistry import TypeRegistry, type_registry, REQUEST_TYPENAME, RESPONSE_TYPENAME
+
+
+def test_request_and_response_topics_resolve_by_name():
+    assert type_registry.get_typename("rt/api/sport/request") == REQUEST_TYPENAME
+    assert type_registry.get_typename("rt/api/sport/response") == RESPONSE_TYPENAME
+    for topic in DDS_TOPICS.values():
+        if topic.endswith("/request") or topic.endswith("/response"):
+            assert topic in type_registry.topics()
+    with pytest.raises(KeyError):
+        type_registry.get_typename("rt/api/unknown/request")
+
+
+def test_types_are_imported_on_first_use():
+    pytest.importorskip("cyclonedds")
+    registry = TypeRegistry()
+    registry.register_topic("rt/api/sport/request", REQUEST_TYPENAME)
+    assert not registry.is_loaded(REQUEST_TYPENAME)
+    datatype = registry.get_type_for_topic("rt/api/sport/request")
+    assert datatype.__name__ == "Request_" and registry.is_loaded(REQUEST_TYPENAME)
+    assert registry.get_type(REQUEST_TYPENAME) is datatype